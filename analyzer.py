@@ -0,0 +1,208 @@
+from enum import Enum
+from element import Visitor
+
+
+class VariableUndefinedError(Exception):
+
+    def __init__(self, identifier):
+        self.identifier = identifier
+
+
+class NonlocalVariableError(Exception):
+
+    def __init__(self, identifier):
+        self.identifier = identifier
+
+
+class FunctionUndefinedError(Exception):
+
+    def __init__(self, identifier):
+        self.identifier = identifier
+
+
+class RedefinitionError(Exception):
+
+    def __init__(self, identifier):
+        self.identifier = identifier
+
+
+class NestingError(Exception):
+    pass
+
+
+class SemanticError(Exception):
+
+    def __init__(self, errors):
+        self.errors = errors
+
+
+class SymbolType(Enum):
+    CONST = 1
+    GLOBAL = 2
+    LOCAL = 3
+    PROCEDURE = 4
+
+    def name(self):
+        return SymbolType._names[self]
+
+
+SymbolType._names = {
+    SymbolType.CONST: 'const',
+    SymbolType.GLOBAL: 'global',
+    SymbolType.LOCAL: 'local',
+    SymbolType.PROCEDURE: 'procedure'
+}
+
+
+class Symbol(object):
+
+    def __init__(self, type, identifier, slot, name=None, value=None, procedure=None):
+        self.type = type
+        self.identifier = identifier
+        self.slot = slot
+        self.name = name
+        self.value = value
+        self.procedure = procedure
+
+    def is_variable(self):
+        return self.type == SymbolType.GLOBAL or self.type == SymbolType.LOCAL
+
+    def __str__(self):
+        return 'Symbol(%s, %s, %d)' % (self.type.name(), self.identifier, self.slot)
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class Scope(object):
+
+    def __init__(self, parent=None, procedure=None):
+        self.parent = parent
+        self.procedure = procedure
+        self.symbols = {}
+
+    def resolve(self, identifier):
+        scope = self
+        while scope is not None:
+            symbol = scope.symbols.get(identifier, None)
+            if symbol is not None:
+                return symbol
+
+            scope = scope.parent
+
+
+class Analyzer(Visitor):
+
+    def __init__(self, program, reserved_names=()):
+        self.program = program
+        self.symbols = []
+        self.names = set(reserved_names)
+        self.errors = []
+
+    def unique_name(self, identifier):
+        name = identifier
+        suffix = 0
+        while name in self.names:
+            suffix += 1
+            name = '%s.%d' % (identifier, suffix)
+
+        self.names.add(name)
+
+        return name
+
+    def define(self, scope, type, identifier, value=None):
+        if identifier in scope.symbols:
+            self.errors.append(RedefinitionError(identifier))
+
+        name = None
+        if type == SymbolType.GLOBAL or type == SymbolType.PROCEDURE:
+            name = self.unique_name(identifier)
+
+        symbol = Symbol(type, identifier, len(self.symbols), name, value, scope.procedure)
+        self.symbols.append(symbol)
+        scope.symbols[identifier] = symbol
+
+        return symbol
+
+    def resolve_variable(self, scope, identifier, assignable=False):
+        symbol = scope.resolve(identifier)
+
+        if symbol is None or symbol.type == SymbolType.PROCEDURE:
+            self.errors.append(VariableUndefinedError(identifier))
+        elif assignable and not symbol.is_variable():
+            self.errors.append(VariableUndefinedError(identifier))
+        elif symbol.type == SymbolType.LOCAL and symbol.procedure is not scope.procedure:
+            self.errors.append(NonlocalVariableError(identifier))
+        else:
+            return symbol
+
+    def analyze_subprogram(self, program, scope):
+        for const in program.consts:
+            const.symbol = self.define(scope, SymbolType.CONST, const.identifier, const.value)
+
+        type = SymbolType.GLOBAL if scope.procedure is None else SymbolType.LOCAL
+        for variable in program.variables:
+            variable.symbol = self.define(scope, type, variable.identifier)
+
+        for procedure in program.procedures:
+            procedure.symbol = self.define(scope, SymbolType.PROCEDURE, procedure.identifier)
+
+        for procedure in program.procedures:
+            self.analyze_subprogram(procedure.program, Scope(scope, procedure.symbol))
+
+        self.visit(program.sentence, scope)
+
+    def visit_assign(self, sentence, scope):
+        sentence.symbol = self.resolve_variable(scope, sentence.identifier, True)
+        sentence.expression.accept(self, scope)
+
+    def visit_call(self, sentence, scope):
+        symbol = scope.resolve(sentence.identifier)
+        if symbol is None or symbol.type != SymbolType.PROCEDURE:
+            self.errors.append(FunctionUndefinedError(sentence.identifier))
+            symbol = None
+        sentence.symbol = symbol
+
+    def visit_if(self, sentence, scope):
+        sentence.condition.accept(self, scope)
+        self.visit(sentence.body, scope)
+
+    def visit_while(self, sentence, scope):
+        sentence.condition.accept(self, scope)
+        self.visit(sentence.body, scope)
+
+    def visit_compound(self, sentence, scope):
+        for sub_sentence in sentence.sentences:
+            sub_sentence.accept(self, scope)
+
+    def visit_read(self, sentence, scope):
+        sentence.symbols = [self.resolve_variable(scope, identifier, True) for identifier in sentence.identifiers]
+
+    def visit_write(self, sentence, scope):
+        for expression in sentence.expressions:
+            expression.accept(self, scope)
+
+    def visit_number(self, expression, scope):
+        pass
+
+    def visit_identifier(self, expression, scope):
+        expression.symbol = self.resolve_variable(scope, expression.identifier)
+
+    def visit_binary(self, expression, scope):
+        expression.lhs.accept(self, scope)
+        expression.rhs.accept(self, scope)
+
+    def visit_odd(self, condition, scope):
+        condition.expression.accept(self, scope)
+
+    def visit_comparison(self, condition, scope):
+        condition.lhs.accept(self, scope)
+        condition.rhs.accept(self, scope)
+
+    def analyze(self):
+        self.analyze_subprogram(self.program, Scope())
+
+        if self.errors:
+            raise SemanticError(self.errors)
+
+        return self.program
@@ -0,0 +1,65 @@
+from ctypes import CDLL, CFUNCTYPE
+from llvmlite import binding
+
+
+def initialize():
+    try:
+        binding.initialize()
+    except RuntimeError:
+        pass
+
+    binding.initialize_native_target()
+    binding.initialize_native_asmprinter()
+
+
+def create_target_machine(level=0, jit=False):
+    target = binding.Target.from_default_triple()
+
+    if jit:
+        return target.create_target_machine(opt=level, jit=True)
+
+    return target.create_target_machine(opt=level, reloc='pic')
+
+
+def parse_module(ir_source):
+    module = binding.parse_assembly(ir_source)
+    module.verify()
+
+    return module
+
+
+def optimize_module(module, level, target_machine):
+    if level == 0:
+        return module
+
+    if hasattr(binding, 'create_pass_builder'):
+        options = binding.create_pipeline_tuning_options(speed_level=level)
+        pass_builder = binding.create_pass_builder(target_machine, options)
+        pass_builder.getModulePassManager().run(module, pass_builder)
+
+        return module
+
+    pass_manager_builder = binding.create_pass_manager_builder()
+    pass_manager_builder.opt_level = level
+    if level > 1:
+        pass_manager_builder.inlining_threshold = 275 if level > 2 else 225
+    pass_manager_builder.loop_vectorize = level > 1
+    pass_manager_builder.slp_vectorize = level > 1
+
+    pass_manager = binding.create_module_pass_manager()
+    target_machine.add_analysis_passes(pass_manager)
+    pass_manager_builder.populate(pass_manager)
+    pass_manager.run(module)
+
+    return module
+
+
+def execute(module, target_machine):
+    engine = binding.create_mcjit_compiler(module, target_machine)
+    engine.finalize_object()
+    engine.run_static_constructors()
+
+    main = CFUNCTYPE(None)(engine.get_function_address('main'))
+    main()
+
+    CDLL(None).fflush(None)
@@ -0,0 +1,136 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from subprocess import run, PIPE, STDOUT
+from pathlib import Path
+from time import perf_counter
+from parser import TokenError
+from analyzer import SemanticError
+from cache import Cache
+from backend import initialize, create_target_machine
+from pipeline import compile_object, error_messages
+from stats import Stats, measure
+
+
+target_machines = {}
+cache = None
+
+
+class OutputCollisionError(Exception):
+
+    def __init__(self, message):
+        self.message = message
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def collect_sources(paths):
+    sources = []
+
+    for path in paths:
+        if not os.path.isdir(path):
+            sources.append((path, Path(path).name.split('.')[0]))
+            continue
+
+        for directory, directory_names, file_names in os.walk(path):
+            directory_names.sort()
+            for file_name in sorted(file_names):
+                if file_name.endswith('.pl0'):
+                    source_file = os.path.join(directory, file_name)
+                    sources.append((source_file, os.path.splitext(os.path.relpath(source_file, path))[0]))
+
+    return sources
+
+
+def initialize_worker(levels, cache_directory, cache_size):
+    global cache
+
+    initialize()
+    for level in levels:
+        target_machines[level] = create_target_machine(level)
+
+    if cache_directory is not None:
+        cache = Cache(cache_directory, cache_size)
+
+
+def build_file(source_file, out_file, level, object_only, cc, collect_stats=False, trace_memory=False):
+    start = perf_counter()
+    stats = Stats(trace_memory) if collect_stats else None
+
+    try:
+        with open(source_file, 'r') as source_f:
+            source = source_f.read()
+
+        object_code = compile_object(source, level, target_machines[level], cache, stats=stats)
+    except (TokenError, SemanticError) as error:
+        return error_messages(error), perf_counter() - start, None
+    except OSError as error:
+        return [str(error)], perf_counter() - start, None
+
+    object_file = out_file + '.o'
+    if os.path.dirname(out_file):
+        os.makedirs(os.path.dirname(out_file), exist_ok=True)
+
+    with open(object_file, 'wb') as object_f:
+        object_f.write(object_code)
+
+    if not object_only:
+        with measure(stats, 'link', True):
+            result = run([cc, object_file, '-o', out_file], stdout=PIPE, stderr=STDOUT)
+        os.remove(object_file)
+
+        if result.returncode != 0:
+            return [result.stdout.decode(errors='replace').strip() or '%s exited with status %d' % (cc, result.returncode)], perf_counter() - start, None
+
+    return [], perf_counter() - start, stats.as_dict() if stats is not None else None
+
+
+def output_files(sources, output_directory):
+    owners = {}
+    out_files = []
+
+    for source_file, name in sources:
+        out_file = os.path.join(output_directory, name)
+        owner = owners.setdefault(os.path.normcase(os.path.normpath(out_file)), source_file)
+        if owner is not source_file:
+            raise OutputCollisionError('%s and %s would both be compiled to %s' % (owner, source_file, out_file))
+
+        out_files.append(out_file)
+
+    for path, source_file in owners.items():
+        parent = os.path.dirname(path)
+        while parent and parent != os.path.dirname(parent):
+            if parent in owners:
+                raise OutputCollisionError('%s would be compiled to %s, a directory needed by %s' % (owners[parent], parent, source_file))
+            parent = os.path.dirname(parent)
+
+    return out_files
+
+
+def compile_batch(sources, output_directory, level=0, object_only=False, cc='gcc', jobs=None, cache_directory=None, cache_size=0, collect_stats=False, trace_memory=False):
+    out_files = output_files(sources, output_directory)
+
+    return build_batch(sources, out_files, level, object_only, cc, jobs, cache_directory, cache_size, collect_stats, trace_memory)
+
+
+def build_batch(sources, out_files, level, object_only, cc, jobs, cache_directory, cache_size, collect_stats, trace_memory):
+    jobs = jobs or available_cores()
+    initargs = ((level,), cache_directory, cache_size)
+
+    with ProcessPoolExecutor(jobs, get_context('fork'), initialize_worker, initargs) as executor:
+        futures = []
+        for (source_file, name), out_file in zip(sources, out_files):
+            futures.append(executor.submit(build_file, source_file, out_file, level, object_only, cc, collect_stats, trace_memory))
+
+        for (source_file, name), future in zip(sources, futures):
+            try:
+                messages, elapsed, stats = future.result()
+            except Exception as error:
+                messages, elapsed, stats = [repr(error)], 0.0, None
+
+            yield source_file, messages, elapsed, stats
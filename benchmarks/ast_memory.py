@@ -0,0 +1,56 @@
+import gc
+import tracemalloc
+from time import perf_counter
+from element import walk
+from analyzer import Analyzer
+from optimizer import Optimizer
+from compiler import Compiler
+from lexer import Lexer
+from parser import Parser
+from benchmarks.generator import ProgramGenerator
+
+
+def retained_bytes(tokens):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    program = Parser(tokens).parse_program()
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return program, after - before
+
+
+def measure(tokens, repeat=3):
+    best = {}
+    for _ in range(repeat):
+        start = perf_counter()
+        program = Parser(tokens).parse_program()
+        timings = {'parse': perf_counter() - start}
+
+        for name, phase in (('analyze', Analyzer(program, Compiler.reserved_names).analyze), ('optimize', Optimizer(program).optimize), ('codegen', Compiler(program).compile)):
+            start = perf_counter()
+            phase()
+            timings[name] = perf_counter() - start
+
+        for name, elapsed in timings.items():
+            best[name] = min(elapsed, best.get(name, elapsed))
+
+    return best
+
+
+if __name__ == '__main__':
+    print('%10s %10s %10s %10s %10s %10s %10s %10s' % ('statements', 'tokens', 'nodes', 'AST (MB)', 'parse', 'analyze', 'optimize', 'codegen'))
+
+    for statements in (2000, 20000):
+        source = ProgramGenerator(0, statements=statements, procedures=20, identifiers=32).generate()
+        tokens = Lexer(source).lex()
+
+        program, size = retained_bytes(tokens)
+        nodes = sum(1 for node in walk(program))
+        best = measure(tokens)
+
+        print('%10d %10d %10d %10.2f %10.3f %10.3f %10.3f %10.3f' % (statements, len(tokens), nodes, size / 1048576, best['parse'], best['analyze'], best['optimize'], best['codegen']))
@@ -0,0 +1,59 @@
+from time import perf_counter
+import backend
+from analyzer import Analyzer
+from optimizer import Optimizer
+from compiler import Compiler
+from lexer import Lexer
+from parser import Parser
+
+
+statements = [
+    '    x := x + scale * 0 + offset - offset;',
+    '    if debug = 1 then write(x, y, z);',
+    '    y := (x * (width / 4) + y) / (height - width + 1);',
+    '    while debug > 0 do z := z + 1;',
+    '    z := z * 1 + (width * height - 6) / 2;',
+    '    if x >= y then write(z, width * height);'
+]
+
+
+def generate_source(lines):
+    source_lines = ['const debug = 0, scale = 3, offset = 7, width = 8, height = 8;', 'var x, y, z;', 'begin']
+    source_lines += [statements[index % len(statements)] for index in range(lines - 4)]
+    source_lines.append('end.')
+
+    return '\n'.join(source_lines)
+
+
+def measure(source, optimize, level=2):
+    program = Parser(Lexer(source).iter_tokens()).parse_program()
+    Analyzer(program, Compiler.reserved_names).analyze()
+
+    start = perf_counter()
+    optimizer = Optimizer(program)
+    if optimize:
+        optimizer.optimize()
+    ast_elapsed = perf_counter() - start
+
+    ir_source = Compiler(program).compile()
+
+    start = perf_counter()
+    target_machine = backend.create_target_machine(level)
+    module = backend.optimize_module(backend.parse_module(ir_source), level, target_machine)
+    target_machine.emit_object(module)
+    llvm_elapsed = perf_counter() - start
+
+    return optimizer.removed, ir_source.count('\n'), ast_elapsed, llvm_elapsed
+
+
+if __name__ == '__main__':
+    backend.initialize()
+
+    print('%8s %10s %14s %10s %10s %10s' % ('lines', 'optimizer', 'nodes removed', 'IR lines', 'AST (s)', 'LLVM (s)'))
+
+    for lines in (1000, 5000):
+        source = generate_source(lines)
+
+        for optimize in (False, True):
+            removed, ir_lines, ast_elapsed, llvm_elapsed = measure(source, optimize)
+            print('%8d %10s %14d %10d %10.3f %10.3f' % (lines, 'on' if optimize else 'off', removed, ir_lines, ast_elapsed, llvm_elapsed))
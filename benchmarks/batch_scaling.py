@@ -0,0 +1,59 @@
+import os
+import sys
+from glob import glob
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from batch import available_cores
+from benchmarks.lexer_scaling import generate_source
+
+
+main = os.path.join(os.path.dirname(__file__), '..', 'main.py')
+examples = sorted(glob(os.path.join(os.path.dirname(__file__), '..', 'Examples', '*.pl0')))
+
+
+def write_corpus(directory, files):
+    sources = [open(path).read() for path in examples] + [generate_source(100), generate_source(300)]
+
+    corpus = os.path.join(directory, 'corpus')
+    os.makedirs(corpus)
+
+    for index in range(files):
+        with open(os.path.join(corpus, 'program%03d.pl0' % index), 'w') as source_f:
+            source_f.write(sources[index % len(sources)])
+
+    return corpus
+
+
+def measure(command, directory):
+    start = perf_counter()
+    run(command, check=True, capture_output=True, cwd=directory)
+
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 42
+    cores = available_cores()
+
+    with TemporaryDirectory() as directory:
+        corpus = write_corpus(directory, files)
+        sources = sorted(glob(os.path.join(corpus, '*.pl0')))
+
+        start = perf_counter()
+        for source in sources:
+            run([sys.executable, main, source, '-O2', '-c', '-o', os.path.join(directory, 'program.o')], check=True, capture_output=True, cwd=directory)
+        sequential = perf_counter() - start
+
+        print('%d files, %d available cores' % (files, cores))
+        print('%24s %10s %10s %10s' % ('mode', 'seconds', 'files/s', 'speedup'))
+        print('%24s %10.2f %10.1f %10.2f' % ('one process per file', sequential, files / sequential, 1.0))
+
+        jobs = 1
+        while True:
+            elapsed = measure([sys.executable, main, corpus, '-O2', '-c', '-o', os.path.join(directory, 'out-%d' % jobs), '-j', str(jobs)], directory)
+            print('%24s %10.2f %10.1f %10.2f' % ('batch -j %d' % jobs, elapsed, files / elapsed, sequential / elapsed))
+
+            if jobs >= cores:
+                break
+            jobs = min(jobs * 2, cores)
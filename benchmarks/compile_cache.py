@@ -0,0 +1,82 @@
+import os
+import sys
+import shutil
+from glob import glob
+from modulefinder import ModuleFinder
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from cache import compiler_modules, compiler_version
+
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+main = os.path.join(root, 'main.py')
+
+
+def unlisted_modules():
+    finder = ModuleFinder()
+    finder.run_script(os.path.join(root, 'pipeline.py'))
+
+    imported = {'pipeline'}
+    for name, module in finder.modules.items():
+        if name != '__main__' and module.__file__ and os.path.dirname(os.path.abspath(module.__file__)) == root:
+            imported.add(name)
+
+    return sorted(imported - set(compiler_modules))
+
+
+def unversioned_modules():
+    unversioned = []
+
+    with TemporaryDirectory() as directory:
+        for name in compiler_modules:
+            shutil.copy(os.path.join(root, name + '.py'), directory)
+        version = compiler_version(directory)
+
+        for name in compiler_modules:
+            path = os.path.join(directory, name + '.py')
+            with open(path, 'rb') as module_f:
+                code = module_f.read()
+
+            with open(path, 'wb') as module_f:
+                module_f.write(code + b'\n')
+            if compiler_version(directory) == version:
+                unversioned.append(name)
+
+            with open(path, 'wb') as module_f:
+                module_f.write(code)
+
+    return unversioned
+
+
+def measure(path, directory, cache, level, warm):
+    command = [sys.executable, main, path, '-O%d' % level, '-o', 'program', '--cache', cache]
+
+    if warm:
+        run(command, check=True, capture_output=True, cwd=directory)
+
+    start = perf_counter()
+    run(command, check=True, capture_output=True, cwd=directory)
+    elapsed = perf_counter() - start
+
+    with open(os.path.join(directory, 'program'), 'rb') as program_f:
+        return elapsed, program_f.read()
+
+
+if __name__ == '__main__':
+    unlisted = unlisted_modules()
+    unversioned = unversioned_modules()
+    if unlisted or unversioned:
+        print('Modules missing from the cache version: %s' % ', '.join(unlisted + unversioned))
+        sys.exit(1)
+
+    print('%16s %6s %12s %12s %10s' % ('program', 'level', 'cold (ms)', 'warm (ms)', 'identical'))
+
+    with TemporaryDirectory() as directory:
+        for path in sorted(glob(os.path.join(os.path.dirname(__file__), '..', 'Examples', '*.pl0'))):
+            path = os.path.abspath(path)
+
+            for level in (0, 2):
+                cold, cold_program = measure(path, directory, os.path.join(directory, 'cold-%d' % level), level, False)
+                warm, warm_program = measure(path, directory, os.path.join(directory, 'warm-%d' % level), level, True)
+                print('%16s %6d %12.1f %12.1f %10s' % (os.path.basename(path), level, cold * 1000, warm * 1000, cold_program == warm_program))
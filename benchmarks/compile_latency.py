@@ -0,0 +1,74 @@
+import os
+from glob import glob
+from shutil import which
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import backend
+from analyzer import Analyzer
+from optimizer import Optimizer
+from compiler import Compiler
+from lexer import Lexer
+from parser import Parser
+
+
+def compile_ir(source):
+    program = Parser(Lexer(source).iter_tokens()).parse_program()
+    Analyzer(program, Compiler.reserved_names).analyze()
+    Optimizer(program).optimize()
+
+    return Compiler(program).compile()
+
+
+def build_with_llc(source, directory, link):
+    ir_file = os.path.join(directory, 'program.ll')
+    object_file = os.path.join(directory, 'program.o')
+
+    with open(ir_file, 'w') as ir_f:
+        ir_f.write(compile_ir(source))
+
+    run(['llc', '-filetype=obj', ir_file, '-o', object_file], check=True)
+    if link:
+        run(['gcc', object_file, '-o', os.path.join(directory, 'program')], check=True)
+
+
+def build_in_process(source, directory, link, target_machine):
+    object_file = os.path.join(directory, 'program.o')
+    module = backend.parse_module(compile_ir(source))
+
+    with open(object_file, 'wb') as object_f:
+        object_f.write(target_machine.emit_object(module))
+
+    if link:
+        run(['gcc', object_file, '-o', os.path.join(directory, 'program')], check=True)
+
+
+def measure(build, sources, repeat=10):
+    start = perf_counter()
+
+    for _ in range(repeat):
+        for source in sources:
+            build(source)
+
+    return (perf_counter() - start) / (repeat * len(sources))
+
+
+if __name__ == '__main__':
+    backend.initialize()
+    target_machine = backend.create_target_machine()
+
+    sources = [open(path).read() for path in sorted(glob(os.path.join(os.path.dirname(__file__), '..', 'Examples', '*.pl0')))]
+
+    with TemporaryDirectory() as directory:
+        cases = [
+            ('in-process, no link', lambda source: build_in_process(source, directory, False, target_machine)),
+            ('in-process + gcc', lambda source: build_in_process(source, directory, True, target_machine))
+        ]
+        if which('llc'):
+            cases = [
+                ('llc, no link', lambda source: build_with_llc(source, directory, False)),
+                ('llc + gcc', lambda source: build_with_llc(source, directory, True))
+            ] + cases
+
+        for name, build in cases:
+            print('%20s %10.2f ms/file' % (name, measure(build, sources) * 1000))
@@ -0,0 +1,40 @@
+from time import perf_counter
+import backend
+from analyzer import Analyzer
+from optimizer import Optimizer
+from compiler import Compiler
+from lexer import Lexer
+from parser import Parser
+from benchmarks.generator import ProgramGenerator
+
+
+def measure(source, drop_unreachable, target_machine, level=2):
+    program = Parser(Lexer(source).iter_tokens()).parse_program()
+    Analyzer(program, Compiler.reserved_names).analyze()
+    optimizer = Optimizer(program, drop_unreachable)
+    optimizer.optimize()
+
+    start = perf_counter()
+    ir_source = Compiler(program, level > 0).compile()
+    codegen_elapsed = perf_counter() - start
+
+    start = perf_counter()
+    module = backend.optimize_module(backend.parse_module(ir_source), level, target_machine)
+    target_machine.emit_object(module)
+    llvm_elapsed = perf_counter() - start
+
+    return len(optimizer.dropped), ir_source.count('\n'), codegen_elapsed, llvm_elapsed
+
+
+if __name__ == '__main__':
+    backend.initialize()
+    target_machine = backend.create_target_machine(2)
+
+    print('%8s %6s %8s %10s %12s %10s' % ('library', 'drop', 'dropped', 'IR lines', 'codegen (s)', 'LLVM (s)'))
+
+    for library in (0, 8, 32):
+        source = ProgramGenerator(0, statements=500, procedures=4, library=library).generate()
+
+        for drop_unreachable in (False, True):
+            dropped, ir_lines, codegen_elapsed, llvm_elapsed = measure(source, drop_unreachable, target_machine)
+            print('%8d %6s %8d %10d %12.3f %10.3f' % (library, 'on' if drop_unreachable else 'off', dropped, ir_lines, codegen_elapsed, llvm_elapsed))
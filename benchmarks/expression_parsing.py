@@ -0,0 +1,69 @@
+from random import Random
+from time import perf_counter
+from lexer import Lexer
+from parser import Parser
+
+
+def generate_flat_expression(random, terms):
+    groups = []
+
+    for _ in range(terms):
+        left, right = random.choice('abcd'), random.choice('abcd')
+        groups.append('(%s %s %d)' % (left, random.choice('+-*/'), random.randint(1, 9)) if random.random() < 0.5 else right)
+
+    return ' '.join(group + ' ' + random.choice('+-*/') for group in groups[:-1]) + ' ' + groups[-1]
+
+
+def generate_nested_expression(random, depth):
+    expression = random.choice('abcd')
+
+    for _ in range(depth):
+        expression = '(%s %s %s)' % (random.choice('abcd'), random.choice('+-*/'), expression)
+
+    return expression
+
+
+def generate_parenthesized_expression(random, depth):
+    return '(' * depth + random.choice('abcd') + ')' * depth
+
+
+def generate_source(statements, generate_expression, size):
+    random = Random(statements)
+
+    lines = ['var a, b, c, d;', 'begin']
+    for _ in range(statements):
+        lines.append('    a := %s;' % generate_expression(random, size))
+        lines.append('    while %s < %s do b := b + 1;' % (generate_expression(random, size), generate_expression(random, size)))
+    lines.append('end.')
+
+    return '\n'.join(lines)
+
+
+def benchmark(source, repeat=3):
+    tokens = Lexer(source).lex()
+    best = None
+
+    for _ in range(repeat):
+        start = perf_counter()
+        Parser(tokens).parse_program()
+        elapsed = perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return len(tokens), best
+
+
+if __name__ == '__main__':
+    cases = [
+        ('flat, 20 terms', generate_source(2000, generate_flat_expression, 20)),
+        ('flat, 200 terms', generate_source(200, generate_flat_expression, 200)),
+        ('nested, depth 20', generate_source(2000, generate_nested_expression, 20)),
+        ('nested, depth 200', generate_source(200, generate_nested_expression, 200)),
+        ('nested, depth 5000', generate_source(8, generate_nested_expression, 5000)),
+        ('parens, depth 100000', generate_source(1, generate_parenthesized_expression, 100000))
+    ]
+
+    for name, source in cases:
+        token_count, elapsed = benchmark(source)
+        print('%20s %10d tokens %10.3f seconds %12.0f tokens/second' % (name, token_count, elapsed, token_count / elapsed))
@@ -0,0 +1,146 @@
+import sys
+from random import Random
+
+
+class ProgramGenerator(object):
+
+    def __init__(self, seed=0, statements=200, expression_depth=3, nesting=2, procedures=4, identifiers=8, iterations=8, repetitions=1, library=0):
+        self.random = Random(seed)
+        self.statements = statements
+        self.expression_depth = expression_depth
+        self.nesting = nesting
+        self.procedures = procedures
+        self.identifiers = identifiers
+        self.iterations = iterations
+        self.repetitions = repetitions
+        self.library = library
+
+        self.variables = ['v%d' % index for index in range(identifiers)]
+        self.consts = ['k%d' % index for index in range(max(1, identifiers // 4))]
+        self.counters = ['i%d' % index for index in range(nesting)]
+        self.lines = []
+        self.budget = 0
+
+    def line(self, indent, text):
+        self.lines.append('    ' * indent + text)
+
+    def operand(self, locals):
+        choice = self.random.random()
+        if choice < 0.5:
+            return self.random.choice(self.variables + locals)
+        elif choice < 0.7:
+            return self.random.choice(self.consts)
+
+        return str(self.random.randint(0, 99))
+
+    def expression(self, depth, locals):
+        if depth == 0:
+            return self.operand(locals)
+
+        operator = self.random.choice('+-*/')
+        lhs = self.expression(self.random.randint(0, depth - 1), locals)
+        if operator == '/':
+            return '(%s / %d)' % (lhs, self.random.randint(1, 9))
+
+        return '(%s %s %s)' % (lhs, operator, self.expression(self.random.randint(0, depth - 1), locals))
+
+    def condition(self, locals):
+        if self.random.random() < 0.2:
+            return 'odd %s' % self.expression(1, locals)
+
+        operator = self.random.choice(('=', '#', '<', '<=', '>', '>='))
+
+        return '%s %s %s' % (self.expression(1, locals), operator, self.expression(1, locals))
+
+    def statement(self, indent, level, locals):
+        self.budget -= 1
+        choice = self.random.random()
+
+        if choice < 0.45 or self.budget <= 0:
+            target = self.random.choice(self.variables + locals)
+            self.line(indent, '%s := %s;' % (target, self.expression(self.expression_depth, locals)))
+        elif choice < 0.55:
+            self.line(indent, 'write(%s);' % self.expression(self.expression_depth, locals))
+        elif choice < 0.75:
+            self.line(indent, 'if %s then' % self.condition(locals))
+            self.block(indent, level, locals)
+        elif level < self.nesting:
+            counter = self.counters[level]
+            self.line(indent, '%s := 0;' % counter)
+            self.line(indent, 'while %s < %d do' % (counter, self.random.randint(1, self.iterations)))
+            self.line(indent, 'begin')
+            self.statements_until(indent + 1, level + 1, locals, self.random.randint(1, 4))
+            self.line(indent + 1, '%s := %s + 1;' % (counter, counter))
+            self.line(indent, 'end')
+        else:
+            target = self.random.choice(self.variables + locals)
+            self.line(indent, '%s := %s + 1;' % (target, target))
+
+    def block(self, indent, level, locals):
+        self.line(indent, 'begin')
+        self.statements_until(indent + 1, level, locals, self.random.randint(1, 3))
+        self.line(indent, 'end')
+
+    def statements_until(self, indent, level, locals, count):
+        for _ in range(count):
+            self.statement(indent, level, locals)
+
+    def body(self, statements, locals, calls, repetitions=1):
+        self.line(0, 'begin')
+
+        for local in locals:
+            self.line(1, '%s := 0;' % local)
+
+        indent = 1
+        if repetitions > 1:
+            self.line(1, 'r := 0;')
+            self.line(1, 'while r < %d do' % repetitions)
+            self.line(1, 'begin')
+            indent = 2
+
+        for callee in calls:
+            self.line(indent, 'call %s;' % callee)
+
+        self.budget = statements
+        while self.budget > 0:
+            self.statement(indent, 0, locals)
+
+        if repetitions > 1:
+            self.line(2, 'r := r + 1;')
+            self.line(1, 'end')
+
+        self.line(0, 'end')
+
+    def procedure(self, prefix, index, statements):
+        locals = ['%s%dl%d' % (prefix, index, local) for local in range(self.random.randint(0, 3))]
+
+        self.line(0, '')
+        self.line(0, 'procedure %s%d;' % (prefix, index))
+        if locals:
+            self.line(0, 'var %s;' % ', '.join(locals))
+
+        calls = []
+        if index > 0 and self.random.random() < 0.5:
+            calls.append('%s%d' % (prefix, index - 1))
+        self.body(statements, locals, calls)
+
+    def generate(self):
+        consts = ', '.join('%s = %d' % (name, self.random.randint(1, 20)) for name in self.consts)
+        self.line(0, 'const %s;' % consts)
+        self.line(0, 'var %s;' % ', '.join(self.variables + self.counters + ['r']))
+
+        statements = max(1, self.statements // (self.procedures + 1))
+        for index in range(self.procedures):
+            self.procedure('p', index, statements)
+        for index in range(self.library):
+            self.procedure('lib', index, statements)
+
+        self.line(0, '')
+        self.body(statements, [], ['p%d' % index for index in range(self.procedures)], self.repetitions)
+        self.line(0, '.')
+
+        return '\n'.join(self.lines) + '\n'
+
+
+if __name__ == '__main__':
+    print(ProgramGenerator(int(sys.argv[1]) if len(sys.argv) > 1 else 0).generate())
@@ -0,0 +1,70 @@
+import os
+import sys
+from tempfile import TemporaryDirectory
+import backend
+from analyzer import Analyzer
+from optimizer import Optimizer
+from compiler import Compiler
+from lexer import Lexer
+from parser import Parser
+from benchmarks.harness import link, measure
+
+
+examples = os.path.join(os.path.dirname(__file__), '..', 'Examples')
+
+kernels = {
+    'multiply': ('x := i * 7 + 3; y := i / 3 + 1', 'write(z)'),
+    'divide': ('x := i * 7 + 3; y := i / 5 + 1', 'write(q, r)'),
+    'gcd': ('x := (i + 1) * 6; y := (i + 1) * 4', 'write(z)')
+}
+
+
+def kernel_source(kernel, iterations):
+    with open(os.path.join(examples, 'program5.pl0')) as source_f:
+        source = source_f.read()
+
+    procedures = source[:source.rindex('BEGIN')].replace('VAR x, y, z, q, r, n, f;', 'VAR x, y, z, q, r, n, f, i;')
+    arguments, results = kernels[kernel]
+    main = [
+        'BEGIN',
+        '    i := 0;',
+        '    WHILE i < %d DO' % iterations,
+        '    BEGIN',
+        '        %s;' % arguments,
+        '        CALL %s;' % kernel,
+        '        %s;' % results,
+        '        i := i + 1;',
+        '    END',
+        'END.'
+    ]
+
+    return procedures + '\n'.join(main) + '\n'
+
+
+def build(source, promote_globals, directory, level=2):
+    program = Parser(Lexer(source).iter_tokens()).parse_program()
+    Analyzer(program, Compiler.reserved_names).analyze()
+    Optimizer(program).optimize()
+    ir_source = Compiler(program, promote_globals).compile()
+
+    target_machine = backend.create_target_machine(level)
+    module = backend.optimize_module(backend.parse_module(ir_source), level, target_machine)
+
+    return link(target_machine.emit_object(module), 'promoted' if promote_globals else 'memory', directory)
+
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    backend.initialize()
+
+    print('%10s %12s %12s %10s %10s' % ('kernel', 'globals (s)', 'promoted (s)', 'speedup', 'identical'))
+
+    with TemporaryDirectory() as directory:
+        for kernel in kernels:
+            source = kernel_source(kernel, iterations)
+
+            executables = [build(source, False, directory), build(source, True, directory)]
+            (memory_elapsed, promoted_elapsed), (memory_output, promoted_output) = measure(executables)
+
+            print('%10s %12.3f %12.3f %10.2f %10s' % (kernel, memory_elapsed, promoted_elapsed, memory_elapsed / promoted_elapsed, memory_output == promoted_output))
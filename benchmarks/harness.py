@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import platform
+import llvmlite
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import backend
+from lexer import Lexer
+from parser import Parser
+from analyzer import Analyzer
+from optimizer import Optimizer
+from compiler import Compiler
+from pipeline import compile_object
+from benchmarks.generator import ProgramGenerator
+
+
+base_config = {'statements': 500, 'expression_depth': 3, 'nesting': 2, 'procedures': 4, 'identifiers': 8, 'iterations': 16, 'repetitions': 5000}
+
+axes = {
+    'statements': (100, 2000),
+    'expression_depth': (1, 8),
+    'nesting': (0, 4),
+    'procedures': (0, 32),
+    'identifiers': (2, 256)
+}
+
+quick_axes = {
+    'statements': (2000,),
+    'expression_depth': (8,),
+    'nesting': (4,),
+    'procedures': (32,),
+    'identifiers': (256,)
+}
+
+phases = ('lex', 'parse', 'analyze', 'optimize', 'codegen', 'llvm_parse', 'llvm_optimize', 'emit_object')
+
+
+def cases(quick=False):
+    yield 'base', dict(base_config)
+
+    for axis, values in (quick_axes if quick else axes).items():
+        for value in values:
+            config = dict(base_config)
+            config[axis] = value
+            yield '%s=%d' % (axis, value), config
+
+
+def compile_phases(source, level, target_machine):
+    timings = {}
+
+    def timed(name, function, *arguments):
+        start = perf_counter()
+        result = function(*arguments)
+        timings[name] = perf_counter() - start
+
+        return result
+
+    tokens = timed('lex', Lexer(source).lex)
+    program = timed('parse', Parser(tokens).parse_program)
+    timed('analyze', Analyzer(program, Compiler.reserved_names).analyze)
+    timed('optimize', Optimizer(program).optimize)
+    ir_source = timed('codegen', Compiler(program, level > 0).compile)
+    module = timed('llvm_parse', backend.parse_module, ir_source)
+    module = timed('llvm_optimize', backend.optimize_module, module, level, target_machine)
+    object_code = timed('emit_object', target_machine.emit_object, module)
+
+    return timings, len(tokens), object_code
+
+
+def link(object_code, name, directory):
+    object_file = os.path.join(directory, name + '.o')
+    out_file = os.path.join(directory, name)
+
+    with open(object_file, 'wb') as object_f:
+        object_f.write(object_code)
+    run(['gcc', object_file, '-o', out_file], check=True)
+
+    return out_file
+
+
+def build(source, name, directory, target_machine, level=2, instrument=None, profile=None, report=None):
+    return link(compile_object(source, level, target_machine, None, False, None, instrument, profile, report), name, directory)
+
+
+def measure(executables, input=b'', repeat=5):
+    best = [None] * len(executables)
+    outputs = [None] * len(executables)
+
+    for _ in range(repeat):
+        for index, executable in enumerate(executables):
+            start = perf_counter()
+            result = run([executable], input=input, capture_output=True)
+            elapsed = perf_counter() - start
+            best[index] = elapsed if best[index] is None else min(best[index], elapsed)
+            outputs[index] = result.stdout
+
+    return best, outputs
+
+
+def measure_case(config, seed, level, repeat, target_machine, directory):
+    source = ProgramGenerator(seed, **config).generate()
+
+    best = {}
+    for _ in range(repeat):
+        timings, token_count, object_code = compile_phases(source, level, target_machine)
+        for name, elapsed in timings.items():
+            best[name] = min(elapsed, best.get(name, elapsed))
+
+    (runtime,), _ = measure([link(object_code, 'program', directory)], repeat=repeat)
+
+    return {
+        'config': config,
+        'source_bytes': len(source),
+        'tokens': token_count,
+        'object_bytes': len(object_code),
+        'phases': best,
+        'compile': sum(best.values()),
+        'runtime': runtime
+    }
+
+
+def revision():
+    result = run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    return result.stdout.decode().strip() or None
+
+
+def run_suite(seed=0, level=2, repeat=3, quick=False):
+    backend.initialize()
+    target_machine = backend.create_target_machine(level)
+
+    results = {
+        'revision': revision(),
+        'date': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'llvmlite': llvmlite.__version__,
+        'seed': seed,
+        'level': level,
+        'repeat': repeat,
+        'cases': {}
+    }
+
+    with TemporaryDirectory() as directory:
+        for name, config in cases(quick):
+            result = measure_case(config, seed, level, repeat, target_machine, directory)
+            results['cases'][name] = result
+            print('%-22s %8d tokens %10.1f ms compile %10.1f ms run' % (name, result['tokens'], result['compile'] * 1000, result['runtime'] * 1000), file=sys.stderr)
+
+    return results
+
+
+def compare(old, new, threshold):
+    print('%-22s %-14s %12s %12s %8s' % ('case', 'metric', 'old (ms)', 'new (ms)', 'ratio'))
+
+    regressions = 0
+    for name, new_case in new['cases'].items():
+        old_case = old['cases'].get(name, None)
+        if old_case is None or old_case['config'] != new_case['config']:
+            continue
+
+        metrics = [(phase, old_case['phases'][phase], new_case['phases'][phase]) for phase in phases]
+        metrics += [('compile', old_case['compile'], new_case['compile']), ('runtime', old_case['runtime'], new_case['runtime'])]
+
+        for metric, old_value, new_value in metrics:
+            ratio = new_value / old_value if old_value else 1.0
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = ' slower'
+                regressions += 1
+            elif ratio < 1 - threshold:
+                flag = ' faster'
+            print('%-22s %-14s %12.2f %12.2f %8.2f%s' % (name, metric, old_value * 1000, new_value * 1000, ratio, flag))
+
+    print('%d regressions beyond %.0f%% (%s -> %s)' % (regressions, threshold * 100, old.get('revision'), new.get('revision')))
+
+    return regressions
+
+
+if __name__ == '__main__':
+    argparser = ArgumentParser(description='Benchmark the PL0 compiler on generated programs.')
+    argparser.add_argument('-o', metavar='file', type=str, help='write the results as JSON to this file')
+    argparser.add_argument('-O', metavar='level', type=int, choices=range(4), help='optimization level (0-3)', default=2)
+    argparser.add_argument('--seed', type=int, help='seed of the program generator', default=0)
+    argparser.add_argument('--repeat', type=int, help='keep the best of this many runs', default=3)
+    argparser.add_argument('--quick', action='store_true', help='only measure the largest value of each axis')
+    argparser.add_argument('--compare', metavar='file', type=str, nargs=2, help='compare two result files instead of measuring')
+    argparser.add_argument('--threshold', type=float, help='relative slowdown reported as a regression', default=0.1)
+
+    args = argparser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as old_f, open(args.compare[1]) as new_f:
+            sys.exit(1 if compare(json.load(old_f), json.load(new_f), args.threshold) else 0)
+
+    results = run_suite(args.seed, args.O, args.repeat, args.quick)
+
+    if args.o:
+        with open(args.o, 'w') as results_f:
+            json.dump(results, results_f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,59 @@
+import os
+from random import Random
+from subprocess import run, PIPE
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import backend
+from benchmarks.optimization_levels import build
+
+
+count = 5000000
+
+sum_loop = '''
+var n, i, x, s;
+begin
+    read(n);
+    i := 0;
+    s := 0;
+    while i < n do
+    begin
+        read(x);
+        s := s + x;
+        i := i + 1;
+    end
+    write(s);
+end.
+'''
+
+
+def measure(command, **kwargs):
+    start = perf_counter()
+    result = run(command, stdout=PIPE, **kwargs)
+
+    return perf_counter() - start, int(result.stdout)
+
+
+if __name__ == '__main__':
+    backend.initialize()
+
+    random = Random(0)
+    values = [random.randint(0, 10 ** 9) for _ in range(count)]
+
+    with TemporaryDirectory() as directory:
+        input_file = os.path.join(directory, 'input.txt')
+        with open(input_file, 'w') as input_f:
+            input_f.write('%d\n' % count)
+            input_f.write('\n'.join(str(value) for value in values))
+            input_f.write('\n')
+
+        for level in (0, 2):
+            executable = build(sum_loop, level, directory)
+
+            with open(input_file, 'rb') as input_f:
+                elapsed, total = measure([executable], stdin=input_f)
+            assert total == sum(values)
+            print('-O%d, regular file: %.0f integers/second' % (level, count / elapsed))
+
+            elapsed, total = measure('cat %s | %s' % (input_file, executable), shell=True)
+            assert total == sum(values)
+            print('-O%d, pipe:         %.0f integers/second' % (level, count / elapsed))
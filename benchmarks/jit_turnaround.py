@@ -0,0 +1,36 @@
+import os
+import sys
+from glob import glob
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+
+main = os.path.join(os.path.dirname(__file__), '..', 'main.py')
+program_input = b'5 7 30 4 9 6 5\n'
+
+
+def measure(commands, directory, repeat=5):
+    best = None
+
+    for _ in range(repeat):
+        start = perf_counter()
+        for command in commands:
+            run(command, input=program_input, capture_output=True, cwd=directory)
+        elapsed = perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+if __name__ == '__main__':
+    print('%16s %14s %14s' % ('program', 'AOT (ms)', '--run (ms)'))
+
+    with TemporaryDirectory() as directory:
+        for path in sorted(glob(os.path.join(os.path.dirname(__file__), '..', 'Examples', '*.pl0'))):
+            path = os.path.abspath(path)
+            aot = measure([[sys.executable, main, path, '-o', 'program'], ['./program']], directory)
+            jit = measure([[sys.executable, main, path, '--run']], directory)
+            print('%16s %14.1f %14.1f' % (os.path.basename(path), aot * 1000, jit * 1000))
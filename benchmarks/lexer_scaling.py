@@ -0,0 +1,83 @@
+import os
+import sys
+from glob import glob
+from random import Random
+from time import perf_counter
+from lexer import Lexer
+from benchmarks.generator import ProgramGenerator
+
+
+statements = [
+    '    x := x + 1;',
+    '    y := (x * 2 + y) / 3;',
+    '    if x >= y then z := z - 1;',
+    '    write(x, y, z);'
+]
+
+
+fragments = list('abcXYZ019 \t\n\r_:=<>#+-*/(),;.!\u00e9\u0663\x0b') + ['begin', 'END', 'while', ':=', '<=', '>=', '\n\n', '  ']
+
+examples = sorted(glob(os.path.join(os.path.dirname(__file__), '..', 'Examples', '*.pl0')))
+
+
+def token_positions(tokens):
+    return [(token.type, token.object, token.line, token.index) for token in tokens]
+
+
+def differential_sources():
+    for path in examples:
+        with open(path) as source_f:
+            yield path, source_f.read()
+
+    for seed in range(20):
+        yield 'generated %d' % seed, ProgramGenerator(seed, statements=100).generate()
+
+    for seed in range(2000):
+        random = Random(seed)
+        yield 'random %d' % seed, ''.join(random.choice(fragments) for _ in range(random.randint(0, 200)))
+
+
+def check_char_by_char():
+    for name, source in differential_sources():
+        expected = token_positions(Lexer(source, True).lex())
+
+        for chunk_size in (1, 7, 1 << 16):
+            if token_positions(Lexer(source).iter_tokens_with_pattern(chunk_size)) != expected:
+                return '%s (chunk size %d)' % (name, chunk_size)
+
+
+def generate_source(lines):
+    source_lines = ['var x, y, z;', 'begin']
+    source_lines += [statements[index % len(statements)] for index in range(lines - 3)]
+    source_lines.append('end.')
+
+    return '\n'.join(source_lines)
+
+
+def benchmark(source, char_by_char):
+    start = perf_counter()
+    tokens = Lexer(source, char_by_char).lex()
+    elapsed = perf_counter() - start
+
+    return len(tokens), elapsed
+
+
+if __name__ == '__main__':
+    mismatch = check_char_by_char()
+    if mismatch is not None:
+        print('Pattern and char-by-char lexers disagree on %s' % mismatch)
+        sys.exit(1)
+
+    print('%10s %10s %14s %10s %10s' % ('lines', 'tokens', 'mode', 'seconds', 'MB/second'))
+
+    for lines in (1000, 10000, 100000, 1000000):
+        source = generate_source(lines)
+        megabytes = len(source) / 1e6
+
+        for char_by_char in (False, True):
+            if char_by_char and lines > 100000:
+                continue
+
+            token_count, elapsed = benchmark(source, char_by_char)
+            mode = 'char-by-char' if char_by_char else 'pattern'
+            print('%10d %10d %14s %10.3f %10.2f' % (lines, token_count, mode, elapsed, megabytes / elapsed))
@@ -0,0 +1,81 @@
+import os
+from glob import glob
+from subprocess import run
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import backend
+from analyzer import Analyzer
+from optimizer import Optimizer
+from compiler import Compiler
+from lexer import Lexer
+from parser import Parser
+
+
+nested_loops = '''
+var i, j, s;
+begin
+    i := 0;
+    s := 0;
+    while i < 2000 do
+    begin
+        j := 0;
+        while j < 2000 do
+        begin
+            s := s + i * j / 7 - j;
+            j := j + 1;
+        end
+        i := i + 1;
+    end
+    write(s);
+end.
+'''
+
+primes = open(os.path.join(os.path.dirname(__file__), '..', 'Examples', 'program4.pl0')).read().replace('max = 100', 'max = 20000')
+
+program_input = b'5 7 30 4 9 6 5\n'
+
+
+def build(source, level, directory):
+    program = Parser(Lexer(source).iter_tokens()).parse_program()
+    Analyzer(program, Compiler.reserved_names).analyze()
+    Optimizer(program).optimize()
+    ir_source = Compiler(program, level > 0).compile()
+
+    target_machine = backend.create_target_machine(level)
+    module = backend.optimize_module(backend.parse_module(ir_source), level, target_machine)
+
+    object_file = os.path.join(directory, 'program.o')
+    out_file = os.path.join(directory, 'program')
+    with open(object_file, 'wb') as object_f:
+        object_f.write(target_machine.emit_object(module))
+    run(['gcc', object_file, '-o', out_file], check=True)
+
+    return out_file
+
+
+def measure(executable, repeat=5):
+    best = None
+
+    for _ in range(repeat):
+        start = perf_counter()
+        run([executable], input=program_input, capture_output=True)
+        elapsed = perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+if __name__ == '__main__':
+    backend.initialize()
+
+    programs = [(os.path.basename(path), open(path).read()) for path in sorted(glob(os.path.join(os.path.dirname(__file__), '..', 'Examples', '*.pl0')))]
+    programs += [('nested loops', nested_loops), ('primes < 20000', primes)]
+
+    print('%16s' % 'program' + ''.join('%12s' % ('-O%d (ms)' % level) for level in range(4)))
+
+    with TemporaryDirectory() as directory:
+        for name, source in programs:
+            timings = [measure(build(source, level, directory)) * 1000 for level in range(4)]
+            print('%16s' % name + ''.join('%12.2f' % timing for timing in timings))
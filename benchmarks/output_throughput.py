@@ -0,0 +1,34 @@
+from subprocess import run, DEVNULL
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import backend
+from benchmarks.optimization_levels import build
+
+
+count = 10000000
+
+write_loop = '''
+var i;
+begin
+    i := 0;
+    while i < %d do
+    begin
+        write(i * 7919 - 5000000);
+        i := i + 1;
+    end
+end.
+''' % count
+
+
+if __name__ == '__main__':
+    backend.initialize()
+
+    with TemporaryDirectory() as directory:
+        for level in (0, 2):
+            executable = build(write_loop, level, directory)
+
+            start = perf_counter()
+            run([executable], stdout=DEVNULL)
+            elapsed = perf_counter() - start
+
+            print('-O%d: %d lines in %.3f seconds, %.0f lines/second' % (level, count, elapsed, count / elapsed))
@@ -0,0 +1,32 @@
+import sys
+from resource import getrusage, RUSAGE_SELF
+from subprocess import run
+from benchmarks.lexer_scaling import generate_source
+from lexer import Lexer
+from parser import Parser
+
+
+def parse(lines, streaming):
+    source = generate_source(lines)
+    baseline = getrusage(RUSAGE_SELF).ru_maxrss
+
+    lexer = Lexer(source)
+    tokens = lexer.iter_tokens() if streaming else lexer.lex()
+    Parser(tokens).parse_program()
+
+    return baseline, getrusage(RUSAGE_SELF).ru_maxrss
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        baseline, peak = parse(int(sys.argv[1]), sys.argv[2] == 'stream')
+        print(baseline, peak)
+        sys.exit()
+
+    print('%10s %8s %16s %16s' % ('lines', 'mode', 'peak RSS (MB)', 'lex+parse (MB)'))
+
+    for lines in (10000, 100000, 300000):
+        for mode in ('list', 'stream'):
+            result = run([sys.executable, '-m', 'benchmarks.parser_memory', str(lines), mode], capture_output=True, text=True)
+            baseline, peak = map(int, result.stdout.split())
+            print('%10d %8s %16.1f %16.1f' % (lines, mode, peak / 1024, (peak - baseline) / 1024))
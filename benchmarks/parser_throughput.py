@@ -0,0 +1,10 @@
+from benchmarks.lexer_scaling import generate_source
+from benchmarks.token_memory import measure_parse
+from lexer import Lexer
+
+
+if __name__ == '__main__':
+    for lines in (1000, 10000, 100000):
+        tokens = Lexer(generate_source(lines)).lex()
+        elapsed = measure_parse(tokens)
+        print('%10d lines %10d tokens %12.0f tokens/second' % (lines, len(tokens), len(tokens) / elapsed))
@@ -0,0 +1,38 @@
+import os
+from subprocess import run
+from tempfile import TemporaryDirectory
+import backend
+from profiling import read_profile
+from benchmarks.generator import ProgramGenerator
+from benchmarks.global_promotion import kernel_source
+from benchmarks.harness import build, measure
+
+
+primes = open(os.path.join(os.path.dirname(__file__), '..', 'Examples', 'program4.pl0')).read().replace('max = 100', 'max = 20000')
+
+program_input = b'5 7 30 4 9 6 5\n'
+
+
+if __name__ == '__main__':
+    backend.initialize()
+    target_machine = backend.create_target_machine(2)
+
+    programs = [
+        ('primes < 20000', primes),
+        ('generated', ProgramGenerator(0, statements=500, iterations=16, repetitions=5000).generate()),
+        ('multiply', kernel_source('multiply', 1000000)),
+        ('divide', kernel_source('divide', 1000000))
+    ]
+
+    print('%16s %10s %10s %10s %10s' % ('program', '-O2 (ms)', 'PGO (ms)', 'speedup', 'identical'))
+
+    with TemporaryDirectory() as directory:
+        profile_file = os.path.join(directory, 'pl0.profile')
+
+        for name, source in programs:
+            run([build(source, 'instrumented', directory, target_machine, instrument=profile_file)], input=program_input, capture_output=True)
+
+            executables = [build(source, 'plain', directory, target_machine), build(source, 'pgo', directory, target_machine, profile=read_profile(profile_file))]
+            (plain_elapsed, pgo_elapsed), (plain_output, pgo_output) = measure(executables, program_input)
+
+            print('%16s %10.2f %10.2f %10.2f %10s' % (name, plain_elapsed * 1000, pgo_elapsed * 1000, plain_elapsed / pgo_elapsed, plain_output == pgo_output))
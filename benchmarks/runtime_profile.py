@@ -0,0 +1,31 @@
+import os
+from tempfile import TemporaryDirectory
+import backend
+from benchmarks.generator import ProgramGenerator
+from benchmarks.global_promotion import kernel_source
+from benchmarks.harness import build, measure
+from benchmarks.pgo import primes, program_input
+
+
+if __name__ == '__main__':
+    backend.initialize()
+    target_machine = backend.create_target_machine(2)
+
+    programs = [
+        ('primes < 20000', primes),
+        ('generated', ProgramGenerator(0, statements=500, procedures=4, iterations=16, repetitions=5000).generate()),
+        ('multiply', kernel_source('multiply', 1000000)),
+        ('divide', kernel_source('divide', 1000000)),
+        ('gcd', kernel_source('gcd', 1000000))
+    ]
+
+    print('%16s %10s %12s %10s %10s' % ('program', '-O2 (ms)', 'profiled (ms)', 'overhead', 'identical'))
+
+    with TemporaryDirectory() as directory:
+        report_file = os.path.join(directory, 'pl0.report')
+
+        for name, source in programs:
+            executables = [build(source, 'plain', directory, target_machine), build(source, 'profiled', directory, target_machine, report=report_file)]
+            (plain_elapsed, profiled_elapsed), (plain_output, profiled_output) = measure(executables, program_input, 9)
+
+            print('%16s %10.2f %12.2f %9.1f%% %10s' % (name, plain_elapsed * 1000, profiled_elapsed * 1000, (profiled_elapsed / plain_elapsed - 1) * 100, plain_output == profiled_output))
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+from glob import glob
+from subprocess import run, Popen, DEVNULL
+from tempfile import TemporaryDirectory
+from time import perf_counter
+import client
+
+
+root = os.path.join(os.path.dirname(__file__), '..')
+main = os.path.join(root, 'main.py')
+examples = sorted(glob(os.path.join(root, 'Examples', '*.pl0')))
+
+
+def best_of(function, repeat=5):
+    best = None
+
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        elapsed = perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def wait_for_socket(socket_path, timeout=60):
+    deadline = time.time() + timeout
+    while not os.path.exists(socket_path):
+        if time.time() > deadline:
+            raise TimeoutError(socket_path)
+        time.sleep(0.05)
+
+
+if __name__ == '__main__':
+    with TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, 'server.sock')
+        server = Popen([sys.executable, os.path.join(root, 'server.py'), '--socket', socket_path, '-j', '1'], stdout=DEVNULL)
+
+        try:
+            wait_for_socket(socket_path)
+
+            print('%16s %6s %12s %14s %14s' % ('program', 'level', 'CLI (ms)', 'client (ms)', 'request (ms)'))
+
+            for path in examples:
+                source = open(path).read()
+                out_file = os.path.join(directory, 'program')
+
+                for level in (0, 2):
+                    cli = best_of(lambda: run([sys.executable, main, path, '-O%d' % level, '-o', out_file], check=True, cwd=directory))
+                    thin = best_of(lambda: run([sys.executable, os.path.join(root, 'client.py'), path, '-O%d' % level, '-o', out_file, '--socket', socket_path], check=True, cwd=directory))
+                    request = best_of(lambda: client.request(source, level, 'binary', socket_path))
+                    print('%16s %6d %12.1f %14.1f %14.1f' % (os.path.basename(path), level, cli * 1000, thin * 1000, request * 1000))
+        finally:
+            server.terminate()
+            server.wait()
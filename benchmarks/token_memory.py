@@ -0,0 +1,30 @@
+import tracemalloc
+from time import perf_counter
+from benchmarks.lexer_scaling import generate_source
+from lexer import Lexer
+from parser import Parser
+
+
+def measure_parse(tokens, repeat=3):
+    best = None
+
+    for _ in range(repeat):
+        start = perf_counter()
+        Parser(tokens).parse_program()
+        elapsed = perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+if __name__ == '__main__':
+    source = generate_source(100000)
+
+    tracemalloc.start()
+    tokens = Lexer(source).lex()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print('%d tokens, %.1f bytes/token, parsed in %.3f seconds' % (len(tokens), size / len(tokens), measure_parse(tokens)))
@@ -0,0 +1,129 @@
+import io
+import os
+import sys
+from time import perf_counter
+from element import Visitor
+from tokens import BinaryOperator
+from analyzer import SymbolType
+from pipeline import build_program
+from vm import Assembler, VirtualMachine, divide
+
+
+examples = os.path.join(os.path.dirname(__file__), '..', 'Examples')
+
+
+class TreeWalker(Visitor):
+
+    def __init__(self, program, output):
+        self.program = program
+        self.output = output
+        self.memory = {}
+        self.procedures = {}
+
+    def visit_assign(self, sentence):
+        self.memory[sentence.symbol.slot] = sentence.expression.accept(self)
+
+    def visit_call(self, sentence):
+        program = self.procedures[sentence.symbol.slot].program
+        saved = {local.symbol.slot: self.memory.get(local.symbol.slot, 0) for local in program.variables}
+        self.visit(program.sentence)
+        self.memory.update(saved)
+
+    def visit_if(self, sentence):
+        if sentence.condition.accept(self):
+            self.visit(sentence.body)
+
+    def visit_while(self, sentence):
+        while sentence.condition.accept(self):
+            self.visit(sentence.body)
+
+    def visit_compound(self, sentence):
+        for sub_sentence in sentence.sentences:
+            sub_sentence.accept(self)
+
+    def visit_read(self, sentence):
+        pass
+
+    def visit_write(self, sentence):
+        self.output.write(' '.join(str(expression.accept(self)) for expression in sentence.expressions) + '\n')
+
+    def visit_number(self, expression):
+        return expression.value
+
+    def visit_identifier(self, expression):
+        symbol = expression.symbol
+        if symbol.type == SymbolType.CONST:
+            return symbol.value
+
+        return self.memory.get(symbol.slot, 0)
+
+    def visit_binary(self, expression):
+        lhs = expression.lhs.accept(self)
+        rhs = expression.rhs.accept(self)
+        operator = expression.operator
+        if operator == BinaryOperator.PLUS:
+            return lhs + rhs
+        elif operator == BinaryOperator.MINUS:
+            return lhs - rhs
+        elif operator == BinaryOperator.TIMES:
+            return lhs * rhs
+
+        return divide(lhs, rhs)
+
+    def visit_odd(self, condition):
+        return condition.expression.accept(self) & 1 == 1
+
+    def visit_comparison(self, condition):
+        lhs = condition.lhs.accept(self)
+        rhs = condition.rhs.accept(self)
+        operator = condition.operator
+        if operator == BinaryOperator.EQUAL:
+            return lhs == rhs
+        elif operator == BinaryOperator.HASHTAG:
+            return lhs != rhs
+        elif operator == BinaryOperator.LESS:
+            return lhs < rhs
+        elif operator == BinaryOperator.LESSEQUAL:
+            return lhs <= rhs
+        elif operator == BinaryOperator.GREATER:
+            return lhs > rhs
+
+        return lhs >= rhs
+
+    def link(self, program):
+        for procedure in program.procedures:
+            self.procedures[procedure.symbol.slot] = procedure
+            self.link(procedure.program)
+
+    def run(self):
+        self.link(self.program)
+        self.visit(self.program.sentence)
+
+
+def primes_source(maximum):
+    with open(os.path.join(examples, 'program4.pl0')) as source_f:
+        return source_f.read().replace('max = 100', 'max = %d' % maximum)
+
+
+def measure(run):
+    output = io.StringIO()
+    start = perf_counter()
+    run(output)
+
+    return perf_counter() - start, output.getvalue()
+
+
+if __name__ == '__main__':
+    maximum = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    program = build_program(primes_source(maximum))
+    bytecode = Assembler(program).assemble()
+
+    walk_elapsed, walk_output = measure(lambda output: TreeWalker(program, output).run())
+    vm_elapsed, vm_output = measure(lambda output: VirtualMachine(bytecode, output=output).run())
+
+    print('program4.pl0 with max = %d, %d primes, %d bytecode words' % (maximum, vm_output.count('\n'), len(bytecode.code)))
+    print('%12s %10s %10s' % ('backend', 'seconds', 'speedup'))
+    print('%12s %10.3f %10.2f' % ('tree walk', walk_elapsed, 1.0))
+    print('%12s %10.3f %10.2f' % ('bytecode', vm_elapsed, walk_elapsed / vm_elapsed))
+    print('outputs identical: %s' % (walk_output == vm_output))
@@ -0,0 +1,124 @@
+import os
+import json
+import fcntl
+import hashlib
+import llvmlite
+from tempfile import NamedTemporaryFile
+from llvmlite import binding
+
+
+compiler_modules = ('tokens', 'lexer', 'element', 'parser', 'analyzer', 'optimizer', 'callgraph', 'profiling', 'profiler', 'runtime', 'compiler', 'backend', 'stats', 'pipeline', 'cache')
+
+
+def compiler_version(directory=None):
+    digest = hashlib.sha256()
+    digest.update(llvmlite.__version__.encode())
+    digest.update(repr(binding.llvm_version_info).encode())
+
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    for name in compiler_modules:
+        with open(os.path.join(directory, name + '.py'), 'rb') as module_f:
+            digest.update(module_f.read())
+
+    return digest.hexdigest()
+
+
+class Cache(object):
+
+    def __init__(self, directory, size_limit):
+        self.directory = directory
+        self.size_limit = size_limit
+        self.version = compiler_version()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source, *flags):
+        digest = hashlib.sha256()
+        digest.update(self.version.encode())
+        digest.update(repr(flags).encode())
+        digest.update(source.encode())
+
+        return digest.hexdigest()
+
+    def path(self, key, kind):
+        return os.path.join(self.directory, key + '.' + kind)
+
+    def get(self, key, kind):
+        path = self.path(key, kind)
+
+        try:
+            with open(path, 'rb') as entry_f:
+                data = entry_f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.update_stats(misses=1)
+            return
+
+        self.update_stats(hits=1)
+
+        return data
+
+    def put(self, key, kind, data):
+        with NamedTemporaryFile(dir=self.directory, prefix='.', delete=False) as entry_f:
+            entry_f.write(data)
+        os.replace(entry_f.name, self.path(key, kind))
+
+        self.evict()
+
+    def entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith('.') or entry.name == 'stats.json' or not entry.is_file():
+                continue
+
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        return entries
+
+    def size(self):
+        return sum(size for mtime, size, path in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for mtime, size, path in entries)
+        if total <= self.size_limit:
+            return
+
+        evictions = 0
+        for mtime, size, path in sorted(entries):
+            if total <= self.size_limit:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+
+            total -= size
+            evictions += 1
+
+        self.update_stats(evictions=evictions)
+
+    def update_stats(self, **counts):
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock_f:
+            fcntl.flock(lock_f, fcntl.LOCK_EX)
+
+            stats = self.stats()
+            for name, count in counts.items():
+                stats[name] += count
+
+            with NamedTemporaryFile('w', dir=self.directory, prefix='.', delete=False) as stats_f:
+                json.dump(stats, stats_f)
+            os.replace(stats_f.name, os.path.join(self.directory, 'stats.json'))
+
+    def stats(self):
+        stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+        try:
+            with open(os.path.join(self.directory, 'stats.json'), 'r') as stats_f:
+                stats.update(json.load(stats_f))
+        except (FileNotFoundError, ValueError):
+            pass
+
+        return stats
@@ -0,0 +1,81 @@
+from element import Identifier, Assign, Call, Read, walk
+from analyzer import SymbolType
+
+
+class CallGraph(object):
+
+    def __init__(self, program):
+        self.program = program
+        self.procedures = {}
+        self.calls = {}
+        self.reads = {}
+        self.writes = {}
+        self.referenced = {}
+        self.modified = {}
+
+        self.collect(None, program)
+        self.propagate()
+
+    def collect(self, symbol, program):
+        for procedure in program.procedures:
+            self.procedures[procedure.symbol] = procedure
+            self.collect(procedure.symbol, procedure.program)
+
+        calls = set()
+        reads = set()
+        writes = set()
+        for node in walk(program.sentence):
+            node_type = type(node)
+            if node_type is Identifier:
+                if node.symbol.type == SymbolType.GLOBAL:
+                    reads.add(node.symbol)
+            elif node_type is Assign:
+                if node.symbol.type == SymbolType.GLOBAL:
+                    writes.add(node.symbol)
+            elif node_type is Read:
+                writes.update(target for target in node.symbols if target.type == SymbolType.GLOBAL)
+            elif node_type is Call:
+                calls.add(node.symbol)
+
+        self.calls[symbol] = calls
+        self.reads[symbol] = reads
+        self.writes[symbol] = writes
+        self.referenced[symbol] = set(reads)
+        self.modified[symbol] = set(writes)
+
+    def propagate(self):
+        changed = True
+        while changed:
+            changed = False
+
+            for symbol, callees in self.calls.items():
+                referenced = self.referenced[symbol]
+                modified = self.modified[symbol]
+                count = len(referenced) + len(modified)
+
+                for callee in callees:
+                    referenced |= self.referenced[callee]
+                    modified |= self.modified[callee]
+
+                if len(referenced) + len(modified) != count:
+                    changed = True
+
+    def reachable(self, symbol=None):
+        reached = set()
+        pending = [symbol]
+        while pending:
+            for callee in self.calls[pending.pop()]:
+                if callee not in reached:
+                    reached.add(callee)
+                    pending.append(callee)
+
+        return reached
+
+    def recursive(self, symbol):
+        return symbol in self.reachable(symbol)
+
+    def uses(self, symbol):
+        return self.reads[symbol] | self.writes[symbol]
+
+    def touches(self, symbol):
+        return self.referenced[symbol] | self.modified[symbol]
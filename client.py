@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import socket
+from argparse import ArgumentParser
+from pathlib import Path
+from subprocess import run
+from tempfile import gettempdir, TemporaryDirectory
+
+
+default_socket = os.environ.get('PL0_SOCKET') or os.path.join(gettempdir(), 'pl0-%d.sock' % os.getuid())
+server_options = ('-cc', '-j', '--cache', '--cache-size')
+local_options = ('--vm', '--instrument', '--profile-use', '--profile-runtime', '--stats', '--stats-memory', '--stats-json', '--cache-stats', '--verbose', '-v')
+
+
+def request(source, level=0, output='binary', socket_path=default_socket):
+    data = source.encode()
+    header = {'level': level, 'output': output, 'length': len(data)}
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(header).encode() + b'\n' + data)
+
+        with connection.makefile('rb') as stream:
+            response = json.loads(stream.readline())
+            payload = stream.read(response['length'])
+
+    return response['messages'], payload
+
+
+if __name__ == '__main__':
+    argparser = ArgumentParser(description='Compile PL0 source on a running compile server.')
+    argparser.add_argument('source_file', metavar='file', type=str, help='source file of PL0 program')
+    argparser.add_argument('-o', metavar='file', type=str, help='output file of PL0 program')
+    argparser.add_argument('-c', action='store_true', help='emit an object file without linking')
+    argparser.add_argument('-S', action='store_true', help='emit optimized LLVM IR instead of an executable')
+    argparser.add_argument('--run', action='store_true', help='run the program right after compiling it')
+    argparser.add_argument('-O', metavar='level', type=int, choices=range(4), help='optimization level (0-3)', default=0)
+    argparser.add_argument('--socket', metavar='path', type=str, help='socket of the compile server', default=default_socket)
+
+    for option in sys.argv[1:]:
+        name = option.split('=')[0]
+        if name in server_options:
+            argparser.error('%s is chosen when starting server.py, not per request' % name)
+        if name in local_options:
+            argparser.error('%s is not supported by the compile server, use main.py' % name)
+
+    args = argparser.parse_args()
+    filename = Path(args.source_file).name.split('.')[0]
+
+    output = 'binary'
+    out_file = args.o or filename
+    if args.S:
+        output = 'ir'
+        out_file = args.o or filename + '.ll'
+    elif args.c:
+        output = 'object'
+        out_file = args.o or filename + '.o'
+
+    with open(args.source_file, 'r') as source_f:
+        source = source_f.read()
+
+    messages, payload = request(source, args.O, output, args.socket)
+    if messages:
+        for message in messages:
+            print(message)
+        sys.exit(1)
+
+    if args.run:
+        with TemporaryDirectory() as directory:
+            out_file = os.path.join(directory, filename)
+            with open(out_file, 'wb') as out_f:
+                out_f.write(payload)
+            os.chmod(out_file, 0o755)
+
+            run([out_file])
+        sys.exit()
+
+    with open(out_file, 'wb') as out_f:
+        out_f.write(payload)
+
+    if output == 'binary':
+        os.chmod(out_file, 0o755)
@@ -1,236 +1,340 @@
+from contextlib import nullcontext
 from llvmlite import ir, binding
-from element import SentenceType, ExpressionType, ConditionType
-from tokens import BinaryOperator, Word
+from element import Assign, If, While, Read, Write, Procedure, Visitor, walk
+from tokens import BinaryOperator
+from runtime import Runtime
+from analyzer import SymbolType
+from callgraph import CallGraph
+from profiling import ProfileError, layout_checksum, branch_weights
+from profiler import Profiler
 
 
-class VariableUndefinedError(Exception):
+class Compiler(Visitor):
 
-    def __init__(self, identifier):
-        self.identifier = identifier
+    reserved_names = ('main',) + Runtime.external_names
 
-
-class FunctionUndefinedError(Exception):
-
-    def __init__(self, identifier):
-        self.identifier = identifier
-
-
-class Compiler(object):
-
-    def __init__(self, program):
+    def __init__(self, program, promote_globals=False, instrument=None, profile=None, report=None):
         self.module = ir.Module('main')
         self.module.triple = binding.targets.get_default_triple()
+        self.runtime = Runtime(self.module)
 
         self.program = program
+        self.slots = {}
+        self.call_graph = CallGraph(program) if promote_globals else None
+        self.shadows = {}
+        self.instrument = instrument
+        self.profile = profile
+        self.counters = []
+        self.profiler = Profiler(self.runtime, report) if report is not None else None
+
+    def declare_procedures(self, program):
+        for procedure in program.procedures:
+            symbol = procedure.symbol
 
-    def emit_procedure(self, procedure):
-        identifier, subprogram = procedure
+            fnty = ir.FunctionType(ir.VoidType(), ())
+            self.slots[symbol.slot] = ir.Function(self.module, fnty, symbol.name)
 
-        try:
-            existing_func = self.module.get_global(identifier)
-            return existing_func
-        except KeyError:
-            pass
+            self.declare_procedures(procedure.program)
 
-        fnty = ir.FunctionType(ir.VoidType(), ())
-        func = ir.Function(self.module, fnty, identifier)
+    def emit_procedure(self, procedure):
+        func = self.slots[procedure.symbol.slot]
 
         block = func.append_basic_block('entry')
         builder = ir.IRBuilder(block)
 
-        self.emit_subprogram(subprogram.content, builder)
+        entry = self.count_entry(func, builder)
+        self.emit_subprogram(procedure.symbol, procedure.program, builder, entry)
         builder.ret_void()
 
         return func
 
-    def emit_printf(self):
-        try:
-            existing_func = self.module.get_global('printf')
-            return existing_func
-        except KeyError:
-            pass
+    def emit_subprogram(self, symbol, program, builder, entry):
+        for variable in program.variables:
+            self.slots[variable.symbol.slot] = builder.alloca(ir.IntType(64), name=variable.identifier)
 
-        fnty = ir.FunctionType(ir.IntType(32), (ir.PointerType(ir.IntType(8)),), var_arg=True)
-        func = ir.Function(self.module, fnty, 'printf')
+        for procedure in program.procedures:
+            self.emit_procedure(procedure)
 
-        return func
+        self.promote_globals(symbol, builder)
 
-    def emit_scanf(self):
-        try:
-            existing_func = self.module.get_global('scanf')
-            return existing_func
-        except KeyError:
-            pass
+        with self.profile_procedure(symbol, entry, builder):
+            self.visit_region(program.sentence, builder)
+            self.demote_globals(symbol, builder)
 
-        fnty = ir.FunctionType(ir.IntType(32), (ir.PointerType(ir.IntType(8)),), var_arg=True)
-        func = ir.Function(self.module, fnty, 'scanf')
+    def promote_globals(self, symbol, builder):
+        self.shadows = {}
+        if self.call_graph is None:
+            return
 
-        return func
+        for global_symbol in sorted(self.call_graph.uses(symbol), key=lambda global_symbol: global_symbol.slot):
+            variable = self.slots[global_symbol.slot]
+            shadow = builder.alloca(ir.IntType(64), name=global_symbol.identifier)
+            builder.store(builder.load(variable), shadow)
 
-    def emit_subprogram(self, program, builder):
-        consts = {}
-        if program.consts is not None:
-            for const in program.consts.content:
-                identifier, value = const
-                consts[identifier] = ir.Constant(ir.IntType(64), value)
+            self.shadows[global_symbol] = variable
+            self.slots[global_symbol.slot] = shadow
 
-        variables = {}
-        if program.variables is not None:
-            for variable in program.variables.content:
-                variable_ptr = builder.alloca(ir.IntType(64), name=variable)
-                variables[variable] = variable_ptr
+    def demote_globals(self, symbol, builder):
+        for global_symbol, variable in self.shadows.items():
+            if global_symbol in self.call_graph.writes[symbol]:
+                builder.store(builder.load(self.slots[global_symbol.slot]), variable)
 
-        for procedure in program.procedures:
-            self.emit_procedure(procedure)
+            self.slots[global_symbol.slot] = variable
+
+        self.shadows = {}
+
+    def spill_globals(self, callee, builder):
+        touched = self.call_graph.touches(callee)
+        for global_symbol, variable in self.shadows.items():
+            if global_symbol in touched:
+                builder.store(builder.load(self.slots[global_symbol.slot]), variable)
+
+    def reload_globals(self, callee, builder):
+        modified = self.call_graph.modified[callee]
+        for global_symbol, variable in self.shadows.items():
+            if global_symbol in modified:
+                builder.store(builder.load(variable), self.slots[global_symbol.slot])
+
+    def count_counters(self):
+        count = 1
+        for node in walk(self.program):
+            node_type = type(node)
+            if node_type is Procedure:
+                count += 1
+            elif node_type is If or node_type is While:
+                count += 2
+
+        return count
+
+    def counter(self, kind, builder, condition=None):
+        index = len(self.counters)
+        self.counters.append((builder.function.name, kind))
+
+        if self.profiler is not None:
+            self.profiler.increment(builder, index, condition)
+        elif self.instrument is not None:
+            self.runtime.emit_increment(builder, index, condition)
+
+        return index
+
+    def count_entry(self, func, builder):
+        index = self.counter('entry', builder)
+
+        if self.profile is not None:
+            func.set_metadata('prof', self.module.add_metadata(['function_entry_count', ir.Constant(ir.IntType(64), self.profile.counts[index])]))
+
+        return index
+
+    def weigh_branch(self, branch, taken, not_taken):
+        if taken + not_taken == 0:
+            return
+
+        weights = [ir.Constant(ir.IntType(32), weight) for weight in branch_weights(taken, not_taken)]
+        branch.set_metadata('prof', self.module.add_metadata(['branch_weights'] + weights))
+
+    def profile_procedure(self, symbol, entry, builder):
+        if self.profiler is None:
+            return nullcontext()
+
+        return self.profiler.procedure(symbol, entry, builder)
+
+    def profile_region(self, counter, builder):
+        if self.profiler is None:
+            return nullcontext()
+
+        return self.profiler.enter_region(counter, builder)
+
+    def profile_statement(self, line, builder):
+        if self.profiler is not None:
+            self.profiler.count_statement(line, builder)
+
+    def profile_branch(self, counter):
+        if self.profiler is None:
+            return nullcontext()
+
+        return self.profiler.enter_branch(counter)
+
+    def profile_segment(self, emit, builder, merge=False):
+        if self.profiler is None or self.profiler.segmenting:
+            return emit()
+
+        counters = len(self.counters)
+
+        def emit_copy():
+            del self.counters[counters:]
+            return emit()
+
+        return self.profiler.segment(builder, emit_copy, merge)
+
+    def visit_region(self, sentence, builder):
+        if self.profiler is not None and not any(type(node) is While for node in walk(sentence)):
+            return self.profile_segment(lambda: self.visit(sentence, builder), builder)
+
+        return self.visit_body(sentence, builder)
+
+    def visit_body(self, sentence, builder):
+        if self.profiler is None or type(sentence) not in Compiler._segment_sentences:
+            return self.visit(sentence, builder)
+
+        return self.visit_sentences([sentence], builder)
+
+    def visit_sentences(self, sentences, builder):
+        segment = []
+
+        for sentence in sentences:
+            if type(sentence) in Compiler._segment_sentences:
+                segment.append(sentence)
+                continue
 
-        self.emit_sentence(program.sentence, builder, consts, variables)
-
-    def emit_sentence(self, sentence, builder, consts, variables):
-        if sentence.type == SentenceType.ASSIGN:
-            identifier, expression = sentence.content
-
-            ptr = variables.get(identifier, None)
-            if ptr is None:
-                try:
-                    ptr = self.module.get_global(identifier)
-                except KeyError:
-                    raise VariableUndefinedError
-
-                if ptr.global_constant:
-                    raise VariableUndefinedError
-
-            expression_ptr = self.emit_expression(expression, builder, consts, variables)
-            return builder.store(expression_ptr, ptr)
-        elif sentence.type == SentenceType.CALL:
-            identifier = sentence.content
-
-            try:
-                func = self.module.get_global(identifier)
-            except KeyError:
-                raise FunctionUndefinedError(identifier)
-
-            return builder.call(func, ())
-        elif sentence.type == SentenceType.CONDITION:
-            condition, sentence = sentence.content
-
-            if sentence is None:
-                return
-
-            with builder.if_then(self.emit_condition(condition, builder, consts, variables)) as if_then:
-                self.emit_sentence(sentence, builder, consts, variables)
-
-            return if_then
-        elif sentence.type == SentenceType.LOOP:
-            condition, sentence = sentence.content
-
-            while_block = builder.append_basic_block(builder.block.name + '.whilecondition')
-            then_block = builder.append_basic_block(builder.block.name + '.whilethen')
-            end_while_block = builder.append_basic_block(builder.block.name + '.endwhile')
-
-            builder.branch(while_block)
-            builder.position_at_start(while_block)
-            builder.cbranch(self.emit_condition(condition, builder, consts, variables), then_block, end_while_block)
-
-            builder.position_at_start(then_block)
-            self.emit_sentence(sentence, builder, consts, variables)
-            builder.branch(while_block)
-
-            builder.position_at_start(end_while_block)
-        elif sentence.type == SentenceType.WRITE:
-            expressions = sentence.content
-
-            format = ' '.join('%i' for _ in range(len(expressions))) + '\n\00'
-            format_const = ir.Constant(ir.ArrayType(ir.IntType(8), len(format)), bytearray(format.encode('ascii')))
-            format_var = builder.alloca(ir.ArrayType(ir.IntType(8), len(format)))
-            builder.store(format_const, format_var)
-            format_ptr = builder.bitcast(format_var, ir.IntType(8).as_pointer())
-
-            printf = self.emit_printf()
-            builder.call(printf, [format_ptr] + [self.emit_expression(expression, builder, consts, variables) for expression in expressions])
-        elif sentence.type == SentenceType.READ:
-            identifiers = sentence.content
-
-            format = ' '.join('%i' for _ in range(len(identifiers))) + '\00'
-            format_const = ir.Constant(ir.ArrayType(ir.IntType(8), len(format)), bytearray(format.encode('ascii')))
-            format_var = builder.alloca(ir.ArrayType(ir.IntType(8), len(format)))
-            builder.store(format_const, format_var)
-            format_ptr = builder.bitcast(format_var, ir.IntType(8).as_pointer())
-
-            scanf = self.emit_scanf()
-            builder.call(scanf, [format_ptr] + [self.module.get_global(identifier) for identifier in identifiers])
-        elif sentence.type == SentenceType.COMPOUND:
-            sentences = sentence.content
-
-            return [self.emit_sentence(sub_sentence, builder, consts, variables) for sub_sentence in sentences]
-
-    def emit_expression(self, expression, builder, consts, variables):
-        if expression.type == ExpressionType.NUMBER:
-            value = expression.content
-            return ir.Constant(ir.IntType(64), value)
-        elif expression.type == ExpressionType.IDENTIFIER:
-            identifier = expression.content
-            variable = consts.get(identifier, None)
-            if variable is None:
-                variable = variables.get(identifier, None)
-            if variable is None:
-                variable = self.module.get_global(identifier)
-
-            value = builder.load(variable)
-
-            return value
-        elif expression.type == ExpressionType.BINARY:
-            lhs, operator, rhs = expression.content
-            lhs_expression = self.emit_expression(lhs, builder, consts, variables)
-            rhs_expression = self.emit_expression(rhs, builder, consts, variables)
-
-            if operator == BinaryOperator.PLUS:
-                return builder.add(lhs_expression, rhs_expression)
-            elif operator == BinaryOperator.MINUS:
-                return builder.sub(lhs_expression, rhs_expression)
-            elif operator == BinaryOperator.TIMES:
-                return builder.mul(lhs_expression, rhs_expression)
-            elif operator == BinaryOperator.SLASH:
-                return builder.sdiv(lhs_expression, rhs_expression)
-
-    def emit_condition(self, condition, builder, consts, variables):
-        if condition.type == ConditionType.UNARY:
-            word, expression = condition.content
-            assert word == Word.ODD
-            result = self.emit_expression(expression, builder, consts, variables)
-            return builder.trunc(result, ir.IntType(1))
-        elif condition.type == ConditionType.BINARY:
-            lhs, operator, rhs = condition.content
-            lhs_result = self.emit_expression(lhs, builder, consts, variables)
-            rhs_result = self.emit_expression(rhs, builder, consts, variables)
-
-            if operator == BinaryOperator.EQUAL:
-                return builder.icmp_signed('==', lhs_result, rhs_result)
-            elif operator == BinaryOperator.HASHTAG:
-                return builder.icmp_signed('!=', lhs_result, rhs_result)
-            elif operator == BinaryOperator.LESS:
-                return builder.icmp_signed('<', lhs_result, rhs_result)
-            elif operator == BinaryOperator.LESSEQUAL:
-                return builder.icmp_signed('<=', lhs_result, rhs_result)
-            elif operator == BinaryOperator.GREATER:
-                return builder.icmp_signed('>', lhs_result, rhs_result)
-            elif operator == BinaryOperator.GREATEREQUAL:
-                return builder.icmp_signed('>=', lhs_result, rhs_result)
+            if segment:
+                self.profile_segment(lambda: [self.visit(sub_sentence, builder) for sub_sentence in segment], builder)
+                segment = []
+
+            self.visit(sentence, builder)
+
+        if segment:
+            self.profile_segment(lambda: [self.visit(sub_sentence, builder) for sub_sentence in segment], builder)
+
+    def visit_assign(self, sentence, builder):
+        expression_ptr = sentence.expression.accept(self, builder)
+        store = builder.store(expression_ptr, self.slots[sentence.symbol.slot])
+        self.profile_statement(sentence.line, builder)
+
+        return store
+
+    def visit_call(self, sentence, builder):
+        if not self.shadows:
+            call = builder.call(self.slots[sentence.symbol.slot], ())
+        else:
+            self.spill_globals(sentence.symbol, builder)
+            call = builder.call(self.slots[sentence.symbol.slot], ())
+            self.reload_globals(sentence.symbol, builder)
+
+        if self.profiler is not None:
+            self.profiler.count_call(sentence.line, builder)
+
+        return call
+
+    def visit_if(self, sentence, builder):
+        reached = self.counter('if', builder)
+        condition = self.profile_segment(lambda: self.visit_condition(sentence, builder), builder, True)
+        taken = self.counter('then', builder, condition)
+        block = builder.block
+
+        with builder.if_then(condition) as if_then, self.profile_branch(taken):
+            self.visit_body(sentence.body, builder)
+
+        if self.profile is not None:
+            counts = self.profile.counts
+            self.weigh_branch(block.terminator, counts[taken], counts[reached] - counts[taken])
+
+        return if_then
+
+    def visit_condition(self, sentence, builder):
+        condition = sentence.condition.accept(self, builder)
+        self.profile_statement(sentence.line, builder)
+
+        return condition
+
+    def visit_while(self, sentence, builder):
+        while_block = builder.append_basic_block(builder.block.name + '.whilecondition')
+        then_block = builder.append_basic_block(builder.block.name + '.whilethen')
+        end_while_block = builder.append_basic_block(builder.block.name + '.endwhile')
+
+        reached = self.counter('while', builder)
+        if self.profiler is not None:
+            timer = self.profiler.start_loop(builder, reached)
+        builder.branch(while_block)
+        builder.position_at_start(while_block)
+        branch = builder.cbranch(sentence.condition.accept(self, builder), then_block, end_while_block)
+
+        builder.position_at_start(then_block)
+        taken = self.counter('do', builder)
+
+        with self.profile_region(taken, builder):
+            self.visit_region(sentence.body, builder)
+
+        if self.profile is not None:
+            self.weigh_branch(branch, self.profile.counts[taken], self.profile.counts[reached])
+        builder.branch(while_block)
+
+        builder.position_at_start(end_while_block)
+        if self.profiler is not None:
+            self.profiler.stop_loop(timer, builder, sentence.line, reached, taken)
+
+    def visit_write(self, sentence, builder):
+        values = [expression.accept(self, builder) for expression in sentence.expressions]
+
+        if not values:
+            builder.call(self.runtime.emit_write_character(), [ir.Constant(ir.IntType(8), ord('\n'))])
+
+        write_integer = self.runtime.emit_write_integer()
+        for index, value in enumerate(values):
+            separator = ' ' if index + 1 < len(values) else '\n'
+            builder.call(write_integer, [value, ir.Constant(ir.IntType(8), ord(separator))])
+
+        self.profile_statement(sentence.line, builder)
+
+    def visit_read(self, sentence, builder):
+        builder.call(self.runtime.emit_flush(), ())
+
+        read_integer = self.runtime.emit_read_integer()
+        for symbol in sentence.symbols:
+            builder.call(read_integer, [self.slots[symbol.slot]])
+
+        self.profile_statement(sentence.line, builder)
+
+    def visit_compound(self, sentence, builder):
+        if self.profiler is not None:
+            return self.visit_sentences(sentence.sentences, builder)
+
+        return [sub_sentence.accept(self, builder) for sub_sentence in sentence.sentences]
+
+    def visit_number(self, expression, builder):
+        return ir.Constant(ir.IntType(64), expression.value)
+
+    def visit_identifier(self, expression, builder):
+        symbol = expression.symbol
+        if symbol.type == SymbolType.CONST:
+            return ir.Constant(ir.IntType(64), symbol.value)
+
+        return builder.load(self.slots[symbol.slot])
+
+    def visit_binary(self, expression, builder):
+        lhs_expression = expression.lhs.accept(self, builder)
+        rhs_expression = expression.rhs.accept(self, builder)
+
+        return Compiler._binary_operations[expression.operator](builder, lhs_expression, rhs_expression)
+
+    def visit_odd(self, condition, builder):
+        result = condition.expression.accept(self, builder)
+
+        return builder.trunc(result, ir.IntType(1))
+
+    def visit_comparison(self, condition, builder):
+        lhs_result = condition.lhs.accept(self, builder)
+        rhs_result = condition.rhs.accept(self, builder)
+
+        return builder.icmp_signed(Compiler._comparison_operators[condition.operator], lhs_result, rhs_result)
 
     def compile(self):
-        if self.program.consts is not None:
-            for const in self.program.consts.content:
-                identifier, value = const
-                constant = ir.GlobalVariable(self.module, ir.IntType(64), identifier)
-                constant.global_constant = True
-                constant.initializer = ir.Constant(ir.IntType(64), value)
-
-        if self.program.variables is not None:
-            for variable in self.program.variables.content:
-                var = ir.GlobalVariable(self.module, ir.IntType(64), variable)
-                var.initializer = ir.Constant(ir.IntType(64), 0)
+        if self.instrument is not None or self.profiler is not None:
+            self.runtime.emit_counters(self.count_counters())
+        if self.profiler is not None:
+            self.profiler.prepare(self.program, self.call_graph or CallGraph(self.program))
+        if self.profile is not None and len(self.profile.counts) != self.count_counters():
+            raise ProfileError('Profile does not match the program')
+
+        for variable in self.program.variables:
+            symbol = variable.symbol
+            var = ir.GlobalVariable(self.module, ir.IntType(64), symbol.name)
+            var.initializer = ir.Constant(ir.IntType(64), 0)
+            self.slots[symbol.slot] = var
+
+        self.declare_procedures(self.program)
 
         for procedure in self.program.procedures:
-            self.emit_procedure(procedure.content)
+            self.emit_procedure(procedure)
 
         fnty = ir.FunctionType(ir.VoidType(), ())
         func = ir.Function(self.module, fnty, 'main')
@@ -238,7 +342,40 @@ class Compiler(object):
         block = func.append_basic_block('entry')
         builder = ir.IRBuilder(block)
 
-        self.emit_sentence(self.program.sentence, builder, {}, {})
+        entry = self.count_entry(func, builder)
+        self.promote_globals(None, builder)
+
+        with self.profile_procedure(None, entry, builder):
+            self.visit_region(self.program.sentence, builder)
+            self.demote_globals(None, builder)
+        builder.call(self.runtime.emit_flush(), ())
+
+        checksum = layout_checksum(self.counters)
+        if self.instrument is not None:
+            builder.call(self.runtime.emit_dump_counters(self.instrument, checksum, len(self.counters)), ())
+        if self.profiler is not None:
+            self.profiler.emit_report(builder)
+        if self.profile is not None and self.profile.checksum != checksum:
+            raise ProfileError('Profile does not match the program')
         builder.ret_void()
 
         return str(self.module)
+
+
+Compiler._binary_operations = {
+    BinaryOperator.PLUS: ir.IRBuilder.add,
+    BinaryOperator.MINUS: ir.IRBuilder.sub,
+    BinaryOperator.TIMES: ir.IRBuilder.mul,
+    BinaryOperator.SLASH: ir.IRBuilder.sdiv
+}
+
+Compiler._comparison_operators = {
+    BinaryOperator.EQUAL: '==',
+    BinaryOperator.HASHTAG: '!=',
+    BinaryOperator.LESS: '<',
+    BinaryOperator.LESSEQUAL: '<=',
+    BinaryOperator.GREATER: '>',
+    BinaryOperator.GREATEREQUAL: '>='
+}
+
+Compiler._segment_sentences = {Assign, Read, Write}
@@ -1,100 +1,238 @@
-from enum import Enum
+class Node(object):
+    __slots__ = ()
+    kind = None
+    category = None
 
+    def children(self):
+        return ()
 
-class ExpressionType(Enum):
-    NUMBER = 1
-    IDENTIFIER = 2
-    BINARY = 3
+    def fields(self):
+        return [getattr(self, name) for name in self.__slots__]
 
-    def name(self):
-        return ExpressionType._names[self]
+    def __str__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(str(field) for field in self.fields()))
 
+    def __repr__(self):
+        return self.__str__()
 
-ExpressionType._names = {
-    ExpressionType.NUMBER: 'number',
-    ExpressionType.IDENTIFIER: 'identifier',
-    ExpressionType.BINARY: 'binary'
-}
 
+class Number(Node):
+    __slots__ = ('value',)
+    kind = 'number'
+    category = 'expressions'
 
-class Expression(object):
+    def __init__(self, value):
+        self.value = value
 
-    def __init__(self, type, content):
-        self.type = type
-        self.content = content
+    def accept(self, visitor, *arguments):
+        return visitor.visit_number(self, *arguments)
 
-    def __str__(self):
-        return 'Expression(%s, %s)' % (self.type.name(), self.content)
 
-    def __repr__(self):
-        return self.__str__()
+class Identifier(Node):
+    __slots__ = ('identifier', 'symbol')
+    kind = 'identifier'
+    category = 'expressions'
 
+    def __init__(self, identifier, symbol=None):
+        self.identifier = identifier
+        self.symbol = symbol
 
-class ConditionType(Enum):
-    UNARY = 1
-    BINARY = 2
+    def accept(self, visitor, *arguments):
+        return visitor.visit_identifier(self, *arguments)
 
-    def name(self):
-        return ConditionType._names[self]
 
+class Binary(Node):
+    __slots__ = ('lhs', 'operator', 'rhs')
+    kind = 'binary'
+    category = 'expressions'
 
-ConditionType._names = {
-    ConditionType.UNARY: 'unary',
-    ConditionType.BINARY: 'binary'
-}
+    def __init__(self, lhs, operator, rhs):
+        self.lhs = lhs
+        self.operator = operator
+        self.rhs = rhs
 
+    def accept(self, visitor, *arguments):
+        return visitor.visit_binary(self, *arguments)
 
-class Condition(object):
+    def children(self):
+        return (self.lhs, self.rhs)
 
-    def __init__(self, type, content):
-        self.type = type
-        self.content = content
 
-    def __str__(self):
-        return 'Condition(%s, %s)' % (self.type.name(), self.content)
+class Odd(Node):
+    __slots__ = ('expression',)
+    kind = 'unary'
+    category = 'conditions'
 
-    def __repr__(self):
-        return self.__str__()
+    def __init__(self, expression):
+        self.expression = expression
 
+    def accept(self, visitor, *arguments):
+        return visitor.visit_odd(self, *arguments)
 
-class SentenceType(Enum):
-    ASSIGN = 1
-    CALL = 2
-    CONDITION = 3
-    LOOP = 4
-    COMPOUND = 5
-    READ = 6
-    WRITE = 7
+    def children(self):
+        return (self.expression,)
 
-    def name(self):
-        return SentenceType._names[self]
 
+class Comparison(Node):
+    __slots__ = ('lhs', 'operator', 'rhs')
+    kind = 'binary'
+    category = 'conditions'
 
-SentenceType._names = {
-    SentenceType.ASSIGN: 'assign',
-    SentenceType.CALL: 'call',
-    SentenceType.CONDITION: 'condition',
-    SentenceType.LOOP: 'loop',
-    SentenceType.COMPOUND: 'compound',
-    SentenceType.READ: 'read',
-    SentenceType.WRITE: 'write'
-}
+    def __init__(self, lhs, operator, rhs):
+        self.lhs = lhs
+        self.operator = operator
+        self.rhs = rhs
 
+    def accept(self, visitor, *arguments):
+        return visitor.visit_comparison(self, *arguments)
 
-class Sentence(object):
+    def children(self):
+        return (self.lhs, self.rhs)
 
-    def __init__(self, type, content):
-        self.type = type
-        self.content = content
 
-    def __str__(self):
-        return 'Sentence(%s, %s)' % (self.type.name(), self.content)
+class Assign(Node):
+    __slots__ = ('identifier', 'expression', 'symbol', 'line')
+    kind = 'assign'
+    category = 'sentences'
 
-    def __repr__(self):
-        return self.__str__()
+    def __init__(self, identifier, expression, symbol=None, line=None):
+        self.identifier = identifier
+        self.expression = expression
+        self.symbol = symbol
+        self.line = line
+
+    def accept(self, visitor, *arguments):
+        return visitor.visit_assign(self, *arguments)
+
+    def children(self):
+        return (self.expression,)
+
+
+class Call(Node):
+    __slots__ = ('identifier', 'symbol', 'line')
+    kind = 'call'
+    category = 'sentences'
+
+    def __init__(self, identifier, symbol=None, line=None):
+        self.identifier = identifier
+        self.symbol = symbol
+        self.line = line
+
+    def accept(self, visitor, *arguments):
+        return visitor.visit_call(self, *arguments)
+
+
+class If(Node):
+    __slots__ = ('condition', 'body', 'line')
+    kind = 'condition'
+    category = 'sentences'
+
+    def __init__(self, condition, body, line=None):
+        self.condition = condition
+        self.body = body
+        self.line = line
+
+    def accept(self, visitor, *arguments):
+        return visitor.visit_if(self, *arguments)
+
+    def children(self):
+        return (self.condition, self.body)
+
+
+class While(Node):
+    __slots__ = ('condition', 'body', 'line')
+    kind = 'loop'
+    category = 'sentences'
+
+    def __init__(self, condition, body, line=None):
+        self.condition = condition
+        self.body = body
+        self.line = line
+
+    def accept(self, visitor, *arguments):
+        return visitor.visit_while(self, *arguments)
+
+    def children(self):
+        return (self.condition, self.body)
+
+
+class Compound(Node):
+    __slots__ = ('sentences', 'line')
+    kind = 'compound'
+    category = 'sentences'
+
+    def __init__(self, sentences, line=None):
+        self.sentences = sentences
+        self.line = line
 
+    def accept(self, visitor, *arguments):
+        return visitor.visit_compound(self, *arguments)
 
-class Program(object):
+    def children(self):
+        return self.sentences
+
+
+class Read(Node):
+    __slots__ = ('identifiers', 'symbols', 'line')
+    kind = 'read'
+    category = 'sentences'
+
+    def __init__(self, identifiers, symbols=None, line=None):
+        self.identifiers = identifiers
+        self.symbols = symbols
+        self.line = line
+
+    def accept(self, visitor, *arguments):
+        return visitor.visit_read(self, *arguments)
+
+
+class Write(Node):
+    __slots__ = ('expressions', 'line')
+    kind = 'write'
+    category = 'sentences'
+
+    def __init__(self, expressions, line=None):
+        self.expressions = expressions
+        self.line = line
+
+    def accept(self, visitor, *arguments):
+        return visitor.visit_write(self, *arguments)
+
+    def children(self):
+        return self.expressions
+
+
+class Const(Node):
+    __slots__ = ('identifier', 'value', 'symbol')
+
+    def __init__(self, identifier, value, symbol=None):
+        self.identifier = identifier
+        self.value = value
+        self.symbol = symbol
+
+
+class Variable(Node):
+    __slots__ = ('identifier', 'symbol')
+
+    def __init__(self, identifier, symbol=None):
+        self.identifier = identifier
+        self.symbol = symbol
+
+
+class Procedure(Node):
+    __slots__ = ('identifier', 'program', 'symbol')
+
+    def __init__(self, identifier, program, symbol=None):
+        self.identifier = identifier
+        self.program = program
+        self.symbol = symbol
+
+    def children(self):
+        return (self.program,)
+
+
+class Program(Node):
+    __slots__ = ('consts', 'variables', 'procedures', 'sentence')
 
     def __init__(self, consts, variables, procedures, sentence):
         self.consts = consts
@@ -102,41 +240,25 @@ class Program(object):
         self.procedures = procedures
         self.sentence = sentence
 
-    def __str__(self):
-        return 'Program(%s, %s, %s, %s)' % (self.consts, self.variables, self.procedures, self.sentence)
+    def children(self):
+        return self.consts + self.variables + self.procedures + [self.sentence]
 
-    def __repr__(self):
-        return self.__str__()
 
+class Visitor(object):
 
-class ElementType(Enum):
-    CONSTS = 1
-    VARS = 2
-    PROCEDURE = 3
-    SUBPROGRAM = 4
-    PROGRAM = 5
+    def visit(self, node, *arguments):
+        if node is None:
+            return
 
-    def name(self):
-        return ElementType._names[self]
+        return node.accept(self, *arguments)
 
 
-ElementType._names = {
-    ElementType.CONSTS: 'consts',
-    ElementType.VARS: 'vars',
-    ElementType.PROCEDURE: 'procedure',
-    ElementType.SUBPROGRAM: 'subprogram',
-    ElementType.PROGRAM: 'program'
-}
+def walk(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
 
-
-class Element(object):
-
-    def __init__(self, type, content):
-        self.type = type
-        self.content = content
-
-    def __str__(self):
-        return 'Element(%s, %s)' % (self.type.name(), self.content)
-
-    def __repr__(self):
-        return self.__str__()
+        yield node
+        stack.extend(node.children())
@@ -1,11 +1,28 @@
+import re
+import gc
+from bisect import bisect_right
+from sys import intern
 from tokens import Token, TokenType, Sign, BinaryOperator
 
 
 class Lexer:
 
-    def __init__(self, input):
+    def __init__(self, input, char_by_char=False):
         self.input = input
         self.index = 0
+        self.line_starts = Lexer.find_line_starts(input) if char_by_char else None
+        self.char_by_char = char_by_char
+
+    @staticmethod
+    def find_line_starts(input):
+        line_starts = [0]
+        index = input.find('\n')
+
+        while index != -1:
+            line_starts.append(index + 1)
+            index = input.find('\n', index + 1)
+
+        return line_starts
 
     def advance_index(self):
         self.index += 1
@@ -17,25 +34,22 @@ class Lexer:
         return self.input[self.index]
 
     def line_index(self):
-        return self.input.count('\n', 0, self.index)
+        return bisect_right(self.line_starts, self.index) - 1
 
     def index_in_current_line(self):
-        return self.index - self.input.rfind('\n', 0, self.index) - 1
+        return self.index - self.line_starts[self.line_index()]
 
     def read_identifier_or_number(self):
-        text = ''
+        start = self.index
         line, index = self.line_index(), self.index_in_current_line()
 
         while not self.is_finished():
-            char = self.current_char()
-
-            if not char.isalnum():
+            if not self.current_char().isalnum():
                 break
 
-            text += char
             self.advance_index()
 
-        return text, line, index
+        return self.input[start:self.index], line, index
 
     def advance_to_next_token(self):
         while not self.is_finished():
@@ -84,16 +98,83 @@ class Lexer:
                 token = Token(TokenType.WORD, word, line, index)
                 return token
 
-            return Token(TokenType.IDENTIFIER, string, line, index)
-
-    def lex(self):
-        tokens = []
+            return Token(TokenType.IDENTIFIER, intern(string), line, index)
+
+    def iter_tokens_with_pattern(self, chunk_size=1 << 16):
+        input = self.input
+        length = len(input)
+        findall = Lexer._pattern.findall
+        known = Lexer._known.get
+
+        offset = self.index
+        line = input.count('\n', 0, offset)
+        line_start = input.rfind('\n', 0, offset) + 1
+
+        while offset < length:
+            chunk_end = input.find('\n', offset + chunk_size)
+            if chunk_end == -1:
+                chunk_end = length
+
+            for space, text in findall(input, offset, chunk_end):
+                if space:
+                    offset += len(space)
+                    if '\n' in space:
+                        line += space.count('\n')
+                        line_start = offset - len(space) + space.rindex('\n') + 1
+
+                index = offset - line_start
+                offset += len(text)
+
+                entry = known(text)
+                if entry is not None:
+                    yield Token(entry[0], entry[1], line, index)
+                elif text.isdecimal():
+                    yield Token(TokenType.NUMBER, int(text), line, index)
+                elif text.isalnum():
+                    text = text.lower()
+                    entry = known(text)
+                    if entry is not None:
+                        yield Token(entry[0], entry[1], line, index)
+                    else:
+                        yield Token(TokenType.IDENTIFIER, intern(text), line, index)
+                else:
+                    self.index = offset - len(text)
+                    return
+
+            newlines = input.count('\n', offset, chunk_end)
+            if newlines:
+                line += newlines
+                line_start = input.rindex('\n', offset, chunk_end) + 1
+            offset = self.index = chunk_end
+
+    def iter_tokens(self):
+        if not self.char_by_char:
+            yield from self.iter_tokens_with_pattern()
+            return
 
         while True:
             token = self.advance_to_next_token()
             if not token:
                 break
 
-            tokens.append(token)
+            yield token
+
+    def lex(self):
+        collecting = gc.isenabled()
+        gc.disable()
+
+        try:
+            return list(self.iter_tokens())
+        finally:
+            if collecting:
+                gc.enable()
+
+
+Lexer._symbols = dict([(text, (TokenType.OPERATOR, operator)) for text, operator in Token._doubles.items()] +
+                      [(text, (TokenType.SIGN if type(sign_or_operator) is Sign else TokenType.OPERATOR, sign_or_operator))
+                       for text, sign_or_operator in Token._singles.items()])
+
+Lexer._known = dict(list(Lexer._symbols.items()) + [(text, (TokenType.WORD, word)) for text, word in Token._words.items()])
 
-        return tokens
+Lexer._pattern = re.compile(r'(\s*)(%s|[^\W_]+|\S)' % '|'.join(
+    re.escape(text) for text in sorted(Lexer._symbols, key=len, reverse=True)))
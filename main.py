@@ -1,60 +1,179 @@
+import os
+import sys
+import json
 from argparse import ArgumentParser
 from subprocess import run
 from pathlib import Path
-from lexer import Lexer
-from parser import Parser, TokenError
-from compiler import Compiler
+from time import perf_counter
+from parser import TokenError
+from analyzer import SemanticError
+from cache import Cache
+from profiling import ProfileError, read_profile
+from pipeline import build_program, compile_module, compile_object, error_messages, nesting_limit
+from batch import OutputCollisionError, collect_sources, compile_batch, available_cores
+from stats import Stats, measure
+from backend import initialize, create_target_machine, execute
+from vm import Assembler, VirtualMachine
 
 
 argparser = ArgumentParser(description='Compile PL0 source.')
-argparser.add_argument('source_file', metavar='file', type=str, help='source file of PL0 program')
-argparser.add_argument('-o', metavar='file', type=str, help='output file of PL0 program')
-argparser.add_argument('-llc', metavar='llvm', type=str, help='LLVM command line tool path', default='llc')
+argparser.add_argument('source_file', metavar='file', type=str, nargs='+', help='source files or directories of PL0 programs')
+argparser.add_argument('-o', metavar='file', type=str, help='output file of PL0 program, or output directory when compiling several')
+argparser.add_argument('-c', action='store_true', help='emit an object file without linking')
+argparser.add_argument('-cc', metavar='linker', type=str, help='C compiler used to link the object file', default='gcc')
+argparser.add_argument('--run', action='store_true', help='run the program with the JIT instead of writing an executable')
+argparser.add_argument('--vm', action='store_true', help='run the program on the bytecode interpreter without LLVM code generation')
+argparser.add_argument('--instrument', metavar='file', type=str, nargs='?', const='pl0.profile', help='count branches and procedure entries, writing them to a profile file (default: pl0.profile) when the program exits')
+argparser.add_argument('--profile-use', metavar='file', type=str, help='optimize with branch weights and entry counts from a profile written by an instrumented build')
+argparser.add_argument('--profile-runtime', metavar='file', type=str, nargs='?', const='pl0.report', help='time procedures and loops in cycles and count executed lines, writing a sorted report to a file (default: pl0.report) when the program exits')
+argparser.add_argument('-O', metavar='level', type=int, choices=range(4), help='optimization level (0-3)', default=0)
+argparser.add_argument('-j', metavar='jobs', type=int, help='number of worker processes when compiling several files (default: available cores)')
+argparser.add_argument('--cache', metavar='directory', type=str, help='reuse IR and object code cached in this directory')
+argparser.add_argument('--cache-size', metavar='MB', type=int, help='size limit of the cache directory in megabytes', default=256)
+argparser.add_argument('--cache-stats', action='store_true', help='print cache hit and miss statistics')
+argparser.add_argument('--stats', action='store_true', help='print time, memory and size statistics of each compiler phase')
+argparser.add_argument('--stats-memory', action='store_true', help='also trace the Python allocation peak of each phase with tracemalloc, which slows every phase down')
+argparser.add_argument('--stats-json', metavar='file', type=str, help='write the statistics as JSON to this file')
 argparser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
 
 args = argparser.parse_args()
 verbose = args.verbose
-source_file = args.source_file
+cache = None
+stats = None
+if args.stats or args.stats_memory or args.stats_json is not None:
+    stats = Stats(args.stats_memory)
+
+
+def print_stats(files=None):
+    if args.stats or args.stats_memory:
+        print(stats.report(), file=sys.stderr)
+
+    if args.stats_json is not None:
+        data = stats.as_dict() if files is None else {'total': stats.as_dict(), 'files': files}
+        with open(args.stats_json, 'w') as stats_f:
+            json.dump(data, stats_f, indent=2)
+
+
+def print_cache_stats():
+    counts = cache.stats()
+    lookups = counts['hits'] + counts['misses']
+    hit_rate = 100.0 * counts['hits'] / lookups if lookups else 0.0
+    print('Cache: %d hits, %d misses (%.1f%% hit rate), %d evictions, %d bytes' % (counts['hits'], counts['misses'], hit_rate, counts['evictions'], cache.size()), file=sys.stderr)
+
+
+if len(args.source_file) > 1 or os.path.isdir(args.source_file[0]):
+    if args.run or args.vm or verbose or args.instrument or args.profile_use or args.profile_runtime:
+        argparser.error('--run, --vm, --verbose, --instrument, --profile-use and --profile-runtime take a single source file')
+
+    sources = collect_sources(args.source_file)
+    jobs = args.j or available_cores()
+    failures = 0
+    files = []
+
+    try:
+        results = compile_batch(sources, args.o or '.', args.O, args.c, args.cc, jobs, args.cache, args.cache_size << 20, stats is not None, args.stats_memory)
+    except OutputCollisionError as error:
+        argparser.error(error.message)
+
+    start = perf_counter()
+    for source_file, messages, elapsed, file_stats in results:
+        if stats is not None:
+            files.append({'file': source_file, 'errors': messages, 'wall': elapsed, 'stats': file_stats})
+            if file_stats is not None:
+                stats.add(file_stats)
+
+        if messages:
+            failures += 1
+            print('FAIL %s (%.3fs)' % (source_file, elapsed))
+            for message in messages:
+                print('    ' + message)
+        else:
+            print('ok   %s (%.3fs)' % (source_file, elapsed))
+    elapsed = perf_counter() - start
+
+    print('%d succeeded, %d failed, %d files in %.3fs with %d jobs' % (len(sources) - failures, failures, len(sources), elapsed, jobs))
+
+    if stats is not None:
+        print_stats(files)
+
+    if args.cache_stats and args.cache is not None:
+        cache = Cache(args.cache, args.cache_size << 20)
+        print_cache_stats()
+
+    sys.exit(1 if failures else 0)
+
+if args.vm and (args.instrument or args.profile_use or args.profile_runtime):
+    argparser.error('--instrument, --profile-use and --profile-runtime need LLVM code generation, not --vm')
+
+source_file = args.source_file[0]
 filename = Path(source_file).name.split('.')[0]
-bit_code_file = filename + '.bc'
 object_file = filename + '.o'
 out_file = args.o
 if out_file is None:
     out_file = filename
+if args.c:
+    object_file = args.o or object_file
 
 source_f = open(source_file, 'r')
 source = source_f.read()
 source_f.close()
 
 try:
-    tokens = Lexer(source).lex()
+    profile = None
+    if args.profile_use is not None:
+        profile = read_profile(args.profile_use)
+
+    if args.vm:
+        program = build_program(source, verbose, stats)
+
+        with measure(stats, 'assemble'), nesting_limit():
+            bytecode = Assembler(program).assemble()
+
+        if verbose:
+            print('Bytecode:')
+            print(bytecode.disassemble())
+            print()
+
+        sys.stdout.flush()
+        with measure(stats, 'run'):
+            VirtualMachine(bytecode).run()
+        sys.exit()
+
+    initialize()
+    target_machine = create_target_machine(args.O, jit=args.run)
 
-    if verbose:
-        print('Tokens:')
-        for token in tokens:
-            print(token)
-        print()
+    if args.cache is not None and not verbose:
+        cache = Cache(args.cache, args.cache_size << 20)
 
-    program = Parser(tokens).parse_program()
+    if args.run:
+        module = compile_module(source, args.O, target_machine, True, cache, verbose, stats, args.instrument, profile, args.profile_runtime)
 
-    if verbose:
-        print('Program:')
-        print(program)
-        print()
+        sys.stdout.flush()
+        with measure(stats, 'run'):
+            execute(module, target_machine)
+        sys.exit()
 
-    compiler = Compiler(program.content.content)
-    ir_source = compiler.compile()
+    object_code = compile_object(source, args.O, target_machine, cache, verbose, stats, args.instrument, profile, args.profile_runtime)
 
-    if verbose:
-        print('LLVM IR source:')
-        print(ir_source)
-        print()
+    object_f = open(object_file, 'wb')
+    object_f.write(object_code)
+    object_f.close()
 
-    bit_code_f = open(bit_code_file, 'w')
-    bit_code_f.write(ir_source)
-    bit_code_f.close()
+    if not args.c:
+        with measure(stats, 'link', True):
+            run([args.cc, object_file, '-o', out_file])
+except (TokenError, SemanticError) as error:
+    for message in error_messages(error):
+        print(message)
+except ProfileError as error:
+    print(error.message, file=sys.stderr)
+    sys.exit(1)
+except ZeroDivisionError:
+    print('Division by zero', file=sys.stderr)
+    sys.exit(1)
+finally:
+    if stats is not None and stats.phases:
+        print_stats()
 
-    run([args.llc, '-filetype=obj', bit_code_file, '-o', object_file])
-    run(['gcc', object_file, '-o', out_file])
-except TokenError as error:
-    print('Unexcepted token \'%s\' in line %d, at %d' % (error.token.value(), error.token.line + 1, error.token.index + 1))
+    if args.cache_stats and cache is not None:
+        print_cache_stats()
@@ -0,0 +1,235 @@
+from element import Number, Identifier, Compound, Procedure, Visitor, walk
+from tokens import BinaryOperator
+from analyzer import SymbolType
+from callgraph import CallGraph
+
+
+def wrap_integer(value):
+    value &= 0xFFFFFFFFFFFFFFFF
+    if value >= 0x8000000000000000:
+        value -= 0x10000000000000000
+
+    return value
+
+
+def divide_integer(lhs, rhs):
+    quotient = abs(lhs) // abs(rhs)
+    if (lhs < 0) != (rhs < 0):
+        quotient = -quotient
+
+    return wrap_integer(quotient)
+
+
+def is_number(expression, value=None):
+    return type(expression) is Number and (value is None or expression.value == value)
+
+
+def is_same_variable(lhs, rhs):
+    return type(lhs) is Identifier and type(rhs) is Identifier and lhs.symbol is rhs.symbol
+
+
+class Optimizer(Visitor):
+
+    def __init__(self, program, drop_unreachable=True):
+        self.program = program
+        self.drop_unreachable = drop_unreachable
+        self.removed = 0
+        self.dropped = []
+
+    def count_subprogram(self, program):
+        return sum(1 for node in walk(program) if node.category is not None)
+
+    def optimize_subprogram(self, program):
+        for procedure in program.procedures:
+            self.optimize_subprogram(procedure.program)
+
+        program.sentence = self.visit(program.sentence)
+
+    def drop_procedures(self, program, reachable):
+        procedures = []
+        for procedure in program.procedures:
+            if procedure.symbol in reachable:
+                procedures.append(procedure)
+                self.drop_procedures(procedure.program, reachable)
+            else:
+                self.dropped.extend(node.symbol for node in walk(procedure) if type(node) is Procedure)
+
+        program.procedures = procedures
+
+    def visit_assign(self, sentence):
+        sentence.expression = sentence.expression.accept(self)
+
+        return sentence
+
+    def visit_call(self, sentence):
+        return sentence
+
+    def visit_read(self, sentence):
+        return sentence
+
+    def visit_if(self, sentence):
+        condition = sentence.condition.accept(self)
+        body = self.visit(sentence.body)
+
+        if condition is False or body is None:
+            return
+        if condition is True:
+            return body
+
+        sentence.condition = condition
+        sentence.body = body
+
+        return sentence
+
+    def visit_while(self, sentence):
+        folded = sentence.condition.accept(self)
+
+        if folded is False:
+            return
+        if folded is not True:
+            sentence.condition = folded
+
+        sentence.body = self.visit(sentence.body)
+
+        return sentence
+
+    def visit_compound(self, sentence):
+        sentences = []
+        for sub_sentence in sentence.sentences:
+            sub_sentence = sub_sentence.accept(self)
+            if sub_sentence is None:
+                continue
+
+            if type(sub_sentence) is Compound:
+                sentences.extend(sub_sentence.sentences)
+            else:
+                sentences.append(sub_sentence)
+
+        if not sentences:
+            return
+        if len(sentences) == 1:
+            return sentences[0]
+
+        sentence.sentences = sentences
+
+        return sentence
+
+    def visit_write(self, sentence):
+        sentence.expressions = [expression.accept(self) for expression in sentence.expressions]
+
+        return sentence
+
+    def visit_identifier(self, expression):
+        symbol = expression.symbol
+        if symbol.type == SymbolType.CONST:
+            return Number(wrap_integer(symbol.value))
+
+        return expression
+
+    def visit_number(self, expression):
+        expression.value = wrap_integer(expression.value)
+
+        return expression
+
+    def visit_binary(self, expression):
+        lhs = expression.lhs.accept(self)
+        rhs = expression.rhs.accept(self)
+        operator = expression.operator
+
+        if is_number(lhs) and is_number(rhs):
+            value = self.fold_binary(lhs.value, operator, rhs.value)
+            if value is not None:
+                return Number(value)
+
+        simplified = self.simplify_binary(lhs, operator, rhs)
+        if simplified is not None:
+            return simplified
+
+        expression.lhs = lhs
+        expression.rhs = rhs
+
+        return expression
+
+    def fold_binary(self, lhs, operator, rhs):
+        if operator == BinaryOperator.PLUS:
+            return wrap_integer(lhs + rhs)
+        elif operator == BinaryOperator.MINUS:
+            return wrap_integer(lhs - rhs)
+        elif operator == BinaryOperator.TIMES:
+            return wrap_integer(lhs * rhs)
+        elif operator == BinaryOperator.SLASH:
+            if rhs == 0 or (lhs == -0x8000000000000000 and rhs == -1):
+                return
+
+            return divide_integer(lhs, rhs)
+
+    def simplify_binary(self, lhs, operator, rhs):
+        if operator == BinaryOperator.PLUS:
+            if is_number(rhs, 0):
+                return lhs
+            if is_number(lhs, 0):
+                return rhs
+        elif operator == BinaryOperator.MINUS:
+            if is_number(rhs, 0):
+                return lhs
+            if is_same_variable(lhs, rhs):
+                return Number(0)
+        elif operator == BinaryOperator.TIMES:
+            if is_number(rhs, 1):
+                return lhs
+            if is_number(lhs, 1):
+                return rhs
+            if is_number(lhs, 0) or is_number(rhs, 0):
+                return Number(0)
+        elif operator == BinaryOperator.SLASH:
+            if is_number(rhs, 1):
+                return lhs
+
+    def visit_odd(self, condition):
+        expression = condition.expression.accept(self)
+
+        if is_number(expression):
+            return expression.value % 2 == 1
+
+        condition.expression = expression
+
+        return condition
+
+    def visit_comparison(self, condition):
+        lhs = condition.lhs.accept(self)
+        rhs = condition.rhs.accept(self)
+
+        if is_number(lhs) and is_number(rhs):
+            return Optimizer._comparisons[condition.operator](lhs.value, rhs.value)
+        if is_same_variable(lhs, rhs):
+            return condition.operator in Optimizer._reflexive_operators
+
+        condition.lhs = lhs
+        condition.rhs = rhs
+
+        return condition
+
+    def optimize(self):
+        before = self.count_subprogram(self.program)
+        self.optimize_subprogram(self.program)
+        if self.drop_unreachable:
+            self.drop_procedures(self.program, CallGraph(self.program).reachable())
+        self.removed = before - self.count_subprogram(self.program)
+
+        return self.program
+
+
+Optimizer._comparisons = {
+    BinaryOperator.EQUAL: lambda lhs, rhs: lhs == rhs,
+    BinaryOperator.HASHTAG: lambda lhs, rhs: lhs != rhs,
+    BinaryOperator.LESS: lambda lhs, rhs: lhs < rhs,
+    BinaryOperator.LESSEQUAL: lambda lhs, rhs: lhs <= rhs,
+    BinaryOperator.GREATER: lambda lhs, rhs: lhs > rhs,
+    BinaryOperator.GREATEREQUAL: lambda lhs, rhs: lhs >= rhs
+}
+
+Optimizer._reflexive_operators = {
+    BinaryOperator.EQUAL,
+    BinaryOperator.LESSEQUAL,
+    BinaryOperator.GREATEREQUAL
+}
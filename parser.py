@@ -1,5 +1,6 @@
+from collections import deque
 from tokens import Token, TokenType, Sign, BinaryOperator, Word
-from element import Expression, ExpressionType, Condition, ConditionType, Sentence, SentenceType, Element, ElementType, Program
+from element import Number, Identifier, Binary, Odd, Comparison, Assign, Call, If, While, Compound, Read, Write, Const, Variable, Procedure, Program
 
 
 class TokenError(Exception):
@@ -10,21 +11,47 @@ class TokenError(Exception):
         self.expected_object = expected_object
 
 
+PERIOD = Token(TokenType.SIGN, Sign.PERIOD)
+SEMICOLON = Token(TokenType.SIGN, Sign.SEMICOLON)
+LEFTPAREN = Token(TokenType.SIGN, Sign.LEFTPAREN)
+RIGHTPAREN = Token(TokenType.SIGN, Sign.RIGHTPAREN)
+COMMA = Token(TokenType.SIGN, Sign.COMMA)
+EQUAL = Token(TokenType.OPERATOR, BinaryOperator.EQUAL)
+END = Token(TokenType.WORD, Word.END)
+THEN = Token(TokenType.WORD, Word.THEN)
+DO = Token(TokenType.WORD, Word.DO)
+
+
 class Parser(object):
 
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.index = 0
+        self.tokens = iter(tokens)
+        self.lookahead = deque()
+
+    def peek_token(self, offset=0):
+        while len(self.lookahead) <= offset:
+            token = next(self.tokens, None)
+            if token is None:
+                return
+
+            self.lookahead.append(token)
+
+        return self.lookahead[offset]
 
     def current_token(self):
-        return self.tokens[self.index]
+        self.peek_token()
+
+        return self.lookahead[0]
 
     def advance_to_next_token(self):
-        self.index += 1
+        if self.lookahead:
+            self.lookahead.popleft()
+        else:
+            next(self.tokens, None)
 
     def parse_identifier(self):
         token = self.current_token()
-        if token.type != TokenType.IDENTIFIER:
+        if token.type is not TokenType.IDENTIFIER:
             raise TokenError(token, TokenType.IDENTIFIER)
 
         self.advance_to_next_token()
@@ -33,7 +60,7 @@ class Parser(object):
 
     def parse_number(self):
         token = self.current_token()
-        if token.type != TokenType.NUMBER:
+        if token.type is not TokenType.NUMBER:
             raise TokenError(token, TokenType.NUMBER)
 
         self.advance_to_next_token()
@@ -41,215 +68,146 @@ class Parser(object):
         return token.object
 
     def parse_token(self, token):
-        if token != self.current_token():
+        if self.current_token().object is not token.object:
             raise TokenError(self.current_token(), token.type, token.object)
 
         self.advance_to_next_token()
 
     def parse_comma_if_possible(self):
-        if self.current_token() == Token(TokenType.SIGN, Sign.COMMA):
+        if self.current_token().object is Sign.COMMA:
             self.advance_to_next_token()
 
     def parse_consts(self):
-        if self.current_token() != Token(TokenType.WORD, Word.CONST):
-            return
+        if self.current_token().object is not Word.CONST:
+            return []
 
         self.advance_to_next_token()
 
         consts = []
 
-        while self.current_token() != Token(TokenType.SIGN, Sign.SEMICOLON):
+        while self.current_token().object is not Sign.SEMICOLON:
             identifier = self.parse_identifier()
-            self.parse_token(Token(TokenType.OPERATOR, BinaryOperator.EQUAL))
+            self.parse_token(EQUAL)
             number = self.parse_number()
             self.parse_comma_if_possible()
 
-            consts.append((identifier, number))
+            consts.append(Const(identifier, number))
 
         self.advance_to_next_token()
 
-        return Element(ElementType.CONSTS, consts)
+        return consts
 
     def parse_variables(self):
-        if self.current_token() != Token(TokenType.WORD, Word.VAR):
-            return
+        if self.current_token().object is not Word.VAR:
+            return []
 
         self.advance_to_next_token()
 
         variables = []
 
-        while self.current_token() != Token(TokenType.SIGN, Sign.SEMICOLON):
+        while self.current_token().object is not Sign.SEMICOLON:
             identifier = self.parse_identifier()
             self.parse_comma_if_possible()
 
-            variables.append(identifier)
+            variables.append(Variable(identifier))
 
         self.advance_to_next_token()
 
-        return Element(ElementType.VARS, variables)
+        return variables
 
     def parse_sentence(self):
-        assign = self.parse_assign()
-        if assign:
-            return assign
-
-        condition = self.parse_condition_sentence()
-        if condition:
-            return condition
-
-        loop = self.parse_loop_sentence()
-        if loop:
-            return loop
-
-        call = self.parse_call()
-        if call:
-            return call
+        next_token = self.peek_token(1)
+        if next_token is not None and next_token.object is BinaryOperator.ASSIGN:
+            return self.parse_assign()
 
-        compound = self.parse_compound()
-        if compound:
-            return compound
-
-        read = self.parse_read()
-        if read:
-            return read
+        token = self.current_token()
 
-        write = self.parse_write()
-        if write:
-            return write
+        parse = Parser._sentence_parsers.get(token.object, None)
+        if parse:
+            self.advance_to_next_token()
+            return parse(self, token.line)
 
-        if self.current_token() == Token(TokenType.SIGN, Sign.SEMICOLON):
+        if token.object is Sign.SEMICOLON:
             self.advance_to_next_token()
 
     def parse_assign(self):
-        if self.index + 1 >= len(self.tokens) or self.tokens[self.index + 1] != Token(TokenType.OPERATOR, BinaryOperator.ASSIGN):
-            return
-
+        line = self.current_token().line
         identifier = self.parse_identifier()
         self.advance_to_next_token()
 
-        expression_tokens = []
-        token = self.current_token()
-        while token != Token(TokenType.SIGN, Sign.SEMICOLON):
-            expression_tokens.append(token)
-            self.advance_to_next_token()
-            token = self.current_token()
-        self.advance_to_next_token()
+        expression = self.parse_expression()
+        self.parse_token(SEMICOLON)
 
-        expression = Parser.parse_expression(expression_tokens)
+        return Assign(identifier, expression, line=line)
 
-        return Sentence(SentenceType.ASSIGN, (identifier, expression))
+    def parse_condition_sentence(self, line):
+        condition_expression = self.parse_condition_expression()
+        self.parse_token(THEN)
 
-    def parse_condition_sentence(self):
-        if self.current_token() != Token(TokenType.WORD, Word.IF):
-            return
-        self.advance_to_next_token()
-
-        condition_tokens = []
-        token = self.current_token()
-        while token != Token(TokenType.WORD, Word.THEN):
-            condition_tokens.append(self.current_token())
-            self.advance_to_next_token()
-            token = self.current_token()
-        self.advance_to_next_token()
-
-        condition_expression = Parser.parse_condition_expression(condition_tokens)
         sentence = self.parse_sentence()
 
-        return Sentence(SentenceType.CONDITION, (condition_expression, sentence))
+        return If(condition_expression, sentence, line)
 
-    def parse_loop_sentence(self):
-        if self.current_token() != Token(TokenType.WORD, Word.WHILE):
-            return
-        self.advance_to_next_token()
+    def parse_loop_sentence(self, line):
+        condition_expression = self.parse_condition_expression()
+        self.parse_token(DO)
 
-        condition_tokens = []
-        token = self.current_token()
-        while token != Token(TokenType.WORD, Word.DO):
-            condition_tokens.append(self.current_token())
-            self.advance_to_next_token()
-            token = self.current_token()
-        self.advance_to_next_token()
-
-        condition_expression = Parser.parse_condition_expression(condition_tokens)
         sentence = self.parse_sentence()
 
-        return Sentence(SentenceType.LOOP, (condition_expression, sentence))
-
-    def parse_call(self):
-        if self.current_token() != Token(TokenType.WORD, Word.CALL):
-            return
-        self.advance_to_next_token()
+        return While(condition_expression, sentence, line)
 
+    def parse_call(self, line):
         identifier = self.parse_identifier()
 
-        self.parse_token(Token(TokenType.SIGN, Sign.SEMICOLON))
+        self.parse_token(SEMICOLON)
 
-        return Sentence(SentenceType.CALL, identifier)
-
-    def parse_compound(self):
-        if self.current_token() != Token(TokenType.WORD, Word.BEGIN):
-            return
-        self.advance_to_next_token()
+        return Call(identifier, line=line)
 
+    def parse_compound(self, line):
         sentence = self.parse_sentence()
         sentences = []
-        while self.current_token() != Token(TokenType.WORD, Word.END) and sentence is not None:
+        while self.current_token().object is not Word.END and sentence is not None:
             sentences.append(sentence)
             sentence = self.parse_sentence()
 
         if sentence is not None:
             sentences.append(sentence)
 
-        self.parse_token(Token(TokenType.WORD, Word.END))
+        self.parse_token(END)
 
-        return Sentence(SentenceType.COMPOUND, sentences)
-
-    def parse_read(self):
-        if self.current_token() != Token(TokenType.WORD, Word.READ):
-            return
-        self.advance_to_next_token()
+        return Compound(sentences, line)
 
-        self.parse_token(Token(TokenType.SIGN, Sign.LEFTPAREN))
+    def parse_read(self, line):
+        self.parse_token(LEFTPAREN)
 
         identifiers = []
 
-        while self.current_token() != Token(TokenType.SIGN, Sign.RIGHTPAREN):
+        while self.current_token().object is not Sign.RIGHTPAREN:
             identifier = self.parse_identifier()
             self.parse_comma_if_possible()
 
             identifiers.append(identifier)
 
         self.advance_to_next_token()
-        self.parse_token(Token(TokenType.SIGN, Sign.SEMICOLON))
-
-        return Sentence(SentenceType.READ, identifiers)
+        self.parse_token(SEMICOLON)
 
-    def parse_write(self):
-        if self.current_token() != Token(TokenType.WORD, Word.WRITE):
-            return
-        self.advance_to_next_token()
+        return Read(identifiers, line=line)
 
-        self.parse_token(Token(TokenType.SIGN, Sign.LEFTPAREN))
+    def parse_write(self, line):
+        self.parse_token(LEFTPAREN)
 
         expressions = []
 
-        while self.current_token() != Token(TokenType.SIGN, Sign.RIGHTPAREN):
-            token = self.current_token()
-            tokens = []
-            while token != Token(TokenType.SIGN, Sign.COMMA) and token != Token(TokenType.SIGN, Sign.RIGHTPAREN):
-                tokens.append(token)
-                self.advance_to_next_token()
-                token = self.current_token()
-
-            if token == Token(TokenType.SIGN, Sign.COMMA):
-                self.advance_to_next_token()
+        while self.current_token().object is not Sign.RIGHTPAREN:
+            expressions.append(self.parse_expression())
 
-            expressions.append(Parser.parse_expression(tokens))
+            if self.current_token().object is not Sign.RIGHTPAREN:
+                self.parse_token(COMMA)
 
         self.advance_to_next_token()
-        self.parse_token(Token(TokenType.SIGN, Sign.SEMICOLON))
+        self.parse_token(SEMICOLON)
 
-        return Sentence(SentenceType.WRITE, expressions)
+        return Write(expressions, line)
 
     def parse_subprogram(self):
         consts = self.parse_consts()
@@ -263,158 +221,106 @@ class Parser(object):
 
         sentence = self.parse_sentence()
 
-        return Element(ElementType.SUBPROGRAM, Program(consts, variables, procedures, sentence))
+        return Program(consts, variables, procedures, sentence)
 
     def parse_procedure(self):
-        if self.current_token() != Token(TokenType.WORD, Word.PROCEDURE):
+        if self.current_token().object is not Word.PROCEDURE:
             return
         self.advance_to_next_token()
 
         identifier = self.parse_identifier()
-        self.parse_token(Token(TokenType.SIGN, Sign.SEMICOLON))
+        self.parse_token(SEMICOLON)
         subprogram = self.parse_subprogram()
 
-        return Element(ElementType.PROCEDURE, (identifier, subprogram))
+        return Procedure(identifier, subprogram)
 
     def parse_program(self):
-        subprogram = self.parse_subprogram()
-
-        self.parse_token(Token(TokenType.SIGN, Sign.PERIOD))
+        program = self.parse_subprogram()
 
-        return Element(ElementType.PROGRAM, subprogram)
+        self.parse_token(PERIOD)
 
-    @staticmethod
-    def parse_expression(tokens):
-        expressions = []
-        operators = []
-
-        def peak(stack):
-            return stack[-1] if stack else None
+        return program
 
-        def apply_operator():
-            operator = operators.pop()
-            right = expressions.pop()
-            left = expressions.pop()
-            expressions.append(Expression(ExpressionType.BINARY, (left, operator, right)))
+    def reduce_expression(self, operands, operators):
+        operator = operators.pop()
+        after = operands.pop()
+        operands.append(Binary(operands.pop(), operator, after))
 
-        precedences = {
-            BinaryOperator.PLUS: 1,
-            BinaryOperator.MINUS: 1,
-            BinaryOperator.TIMES: 2,
-            BinaryOperator.SLASH: 2
-        }
+    def parse_expression(self):
+        operands = []
+        operators = []
 
-        last_token_type = TokenType.OPERATOR
+        while True:
+            token = self.current_token()
+            while token.object is Sign.LEFTPAREN:
+                operators.append(None)
+                self.advance_to_next_token()
+                token = self.current_token()
 
-        for token in tokens:
-            if last_token_type == token.type:
-                raise TokenError(token)
-            last_token_type = token.type
-
-            if token.type == TokenType.NUMBER:
-                expressions.append(Expression(ExpressionType.NUMBER, token.object))
-            elif token.type == TokenType.IDENTIFIER:
-                expressions.append(Expression(ExpressionType.IDENTIFIER, token.object))
-            elif token == Token(TokenType.SIGN, Sign.LEFTPAREN):
-                operators.append(token.object)
-            elif token == Token(TokenType.SIGN, Sign.RIGHTPAREN):
-                top = peak(operators)
-                while top is not None and top != Sign.LEFTPAREN:
-                    apply_operator()
-                    top = peak(operators)
-                operators.pop()
+            if token.type is TokenType.NUMBER:
+                operands.append(Number(token.object))
+            elif token.type is TokenType.IDENTIFIER:
+                operands.append(Identifier(token.object))
             else:
-                if token.object not in {BinaryOperator.PLUS, BinaryOperator.MINUS, BinaryOperator.TIMES,
-                                        BinaryOperator.SLASH}:
-                    raise TokenError(token, TokenType.OPERATOR)
-
-                top = peak(operators)
-                while top is not None and top not in {Sign.LEFTPAREN, Sign.RIGHTPAREN} and precedences[top] >= \
-                        precedences[token.object]:
-                    apply_operator()
-                    top = peak(operators)
-                operators.append(token.object)
-        while peak(operators) is not None:
-            apply_operator()
-
-        return expressions[0] if expressions else None
-
-    @staticmethod
-    def parse_condition_expression(tokens):
-        if len(tokens) == 0:
-            return
-
-        if tokens[0] == Token(TokenType.WORD, Word.ODD):
-            expression = Parser.parse_expression(tokens[1:])
-            if not expression:
-                raise TokenError(tokens.get(1, None))
-
-            return Condition(ConditionType.UNARY, (Word.ODD, expression))
-
-        condition_operators = [
-            BinaryOperator.EQUAL,
-            BinaryOperator.HASHTAG,
-            BinaryOperator.LESS,
-            BinaryOperator.LESSEQUAL,
-            BinaryOperator.GREATER,
-            BinaryOperator.GREATEREQUAL
-        ]
-
-        separated_tokens = Parser.separate_tokens_with_operators(tokens, condition_operators)
-        if separated_tokens:
-            previous_tokens, operator, after_tokens = separated_tokens
-
-            previous = Parser.parse_expression(previous_tokens)
-            after = Parser.parse_expression(after_tokens)
-
-            if not previous or not after:
-                raise TokenError(Token(TokenType.OPERATOR, operator))
-
-            return Condition(ConditionType.BINARY, (previous, operator, after))
-
-        raise TokenError(tokens[1])
-
-    @staticmethod
-    def separate_tokens_with_operators(tokens, operators):
-        generator = (index for index, token in enumerate(tokens) if token.type is TokenType.OPERATOR and token.object in operators)
-        try:
-            op_index = next(generator)
-        except StopIteration:
-            return
-
-        previous_tokens = tokens[:op_index]
-        after_tokens = tokens[op_index + 1:]
-
-        if not Parser.is_parans_match(previous_tokens):
-            return
-        if not Parser.is_parans_match(after_tokens):
-            return
-
-        return previous_tokens, tokens[op_index].object, after_tokens
+                raise TokenError(token)
+            self.advance_to_next_token()
 
-    @staticmethod
-    def is_parans_match(tokens):
-        count = 0
+            while True:
+                operator = self.current_token().object
+                precedence = Parser._precedences.get(operator, None)
+                if precedence is not None:
+                    while operators and operators[-1] is not None and Parser._precedences[operators[-1]] >= precedence:
+                        self.reduce_expression(operands, operators)
+                    operators.append(operator)
+                    self.advance_to_next_token()
+                    break
+
+                while operators and operators[-1] is not None:
+                    self.reduce_expression(operands, operators)
+                if not operators:
+                    return operands.pop()
+
+                self.parse_token(RIGHTPAREN)
+                operators.pop()
 
-        for token in tokens:
-            if token.type == TokenType.SIGN:
-                if token.object == Sign.LEFTPAREN:
-                    count += 1
-                elif token.object == Sign.RIGHTPAREN:
-                    count -= 1
+    def parse_condition_expression(self):
+        if self.current_token().object is Word.ODD:
+            self.advance_to_next_token()
+            return Odd(self.parse_expression())
 
-            if count < 0:
-                return False
+        previous = self.parse_expression()
 
-        return count == 0
+        token = self.current_token()
+        if token.object not in Parser._condition_operators:
+            raise TokenError(token, TokenType.OPERATOR)
+        self.advance_to_next_token()
 
-    @staticmethod
-    def split_list(l, sep):
-        current = []
-        for x in l:
-            if x == sep:
-                yield current
-                current = []
-            else:
-                current.append(x)
-        yield current
+        after = self.parse_expression()
+
+        return Comparison(previous, token.object, after)
+
+
+Parser._sentence_parsers = {
+    Word.IF: Parser.parse_condition_sentence,
+    Word.WHILE: Parser.parse_loop_sentence,
+    Word.CALL: Parser.parse_call,
+    Word.BEGIN: Parser.parse_compound,
+    Word.READ: Parser.parse_read,
+    Word.WRITE: Parser.parse_write
+}
+
+Parser._precedences = {
+    BinaryOperator.PLUS: 1,
+    BinaryOperator.MINUS: 1,
+    BinaryOperator.TIMES: 2,
+    BinaryOperator.SLASH: 2
+}
+
+Parser._condition_operators = {
+    BinaryOperator.EQUAL,
+    BinaryOperator.HASHTAG,
+    BinaryOperator.LESS,
+    BinaryOperator.LESSEQUAL,
+    BinaryOperator.GREATER,
+    BinaryOperator.GREATEREQUAL
+}
@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+from lexer import Lexer
+from parser import Parser, TokenError
+from analyzer import Analyzer, SemanticError, VariableUndefinedError, NonlocalVariableError, FunctionUndefinedError, NestingError
+from optimizer import Optimizer
+from compiler import Compiler
+from backend import parse_module, optimize_module
+from stats import measure
+
+
+def error_messages(error):
+    if isinstance(error, TokenError):
+        return ['Unexcepted token \'%s\' in line %d, at %d' % (error.token.value(), error.token.line + 1, error.token.index + 1)]
+
+    messages = []
+    for semantic_error in error.errors:
+        if isinstance(semantic_error, VariableUndefinedError):
+            messages.append('Undefined variable \'%s\'' % semantic_error.identifier)
+        elif isinstance(semantic_error, NonlocalVariableError):
+            messages.append('Variable \'%s\' of an enclosing procedure is not accessible' % semantic_error.identifier)
+        elif isinstance(semantic_error, FunctionUndefinedError):
+            messages.append('Undefined procedure \'%s\'' % semantic_error.identifier)
+        elif isinstance(semantic_error, NestingError):
+            messages.append('Expression nested too deeply')
+        else:
+            messages.append('Redefinition of \'%s\'' % semantic_error.identifier)
+
+    return messages
+
+
+@contextmanager
+def nesting_limit():
+    try:
+        yield
+    except RecursionError:
+        raise SemanticError([NestingError()]) from None
+
+
+def build_program(source, verbose=False, stats=None):
+    with measure(stats, 'lex'):
+        tokens = Lexer(source).iter_tokens()
+        if verbose or stats is not None:
+            tokens = list(tokens)
+
+    if stats is not None:
+        stats.count_tokens(tokens)
+
+    if verbose:
+        print('Tokens:')
+        for token in tokens:
+            print(token)
+        print()
+
+    with measure(stats, 'parse'):
+        program = Parser(tokens).parse_program()
+
+    if stats is not None:
+        stats.count_program('ast', program)
+
+    if verbose:
+        print('Program:')
+        print(program)
+        print()
+
+    with measure(stats, 'analyze'), nesting_limit():
+        Analyzer(program, Compiler.reserved_names).analyze()
+
+    with measure(stats, 'optimize'), nesting_limit():
+        optimizer = Optimizer(program)
+        optimizer.optimize()
+
+    if stats is not None:
+        stats.count_program('optimized_ast', program)
+        stats.count_dropped_procedures(optimizer.dropped)
+
+    if verbose:
+        if optimizer.dropped:
+            print('Dropped unreachable procedures: %s' % ', '.join(symbol.identifier for symbol in optimizer.dropped))
+        print('Optimized program (%d nodes removed):' % optimizer.removed)
+        print(program)
+        print()
+
+    return program
+
+
+def build_module(source, level, target_machine, verbose=False, stats=None, instrument=None, profile=None, report=None):
+    program = build_program(source, verbose, stats)
+
+    with measure(stats, 'codegen'), nesting_limit():
+        ir_source = Compiler(program, level > 0, instrument, profile, report).compile()
+
+    with measure(stats, 'llvm_parse'):
+        module = parse_module(ir_source)
+
+    if stats is not None:
+        stats.count_module('ir', module)
+
+    with measure(stats, 'llvm_optimize'):
+        module = optimize_module(module, level, target_machine)
+
+    if stats is not None:
+        stats.count_module('optimized_ir', module)
+
+    if verbose:
+        print('LLVM IR source:')
+        print(module)
+        print()
+
+    return module
+
+
+def profile_key(profile):
+    return None if profile is None else profile.key()
+
+
+def compile_module(source, level, target_machine, jit=False, cache=None, verbose=False, stats=None, instrument=None, profile=None, report=None):
+    if cache is None:
+        return build_module(source, level, target_machine, verbose, stats, instrument, profile, report)
+
+    key = cache.key(source, level, jit, target_machine.triple, instrument, profile_key(profile), report)
+
+    with measure(stats, 'cache_lookup'):
+        ir_source = cache.get(key, 'll')
+
+    if ir_source is not None:
+        with measure(stats, 'llvm_parse'):
+            return parse_module(ir_source.decode())
+
+    module = build_module(source, level, target_machine, verbose, stats, instrument, profile, report)
+    cache.put(key, 'll', str(module).encode())
+
+    return module
+
+
+def emit_object(module, target_machine, stats=None):
+    with measure(stats, 'emit_object'):
+        return target_machine.emit_object(module)
+
+
+def compile_object(source, level, target_machine, cache=None, verbose=False, stats=None, instrument=None, profile=None, report=None):
+    if cache is None:
+        return emit_object(build_module(source, level, target_machine, verbose, stats, instrument, profile, report), target_machine, stats)
+
+    key = cache.key(source, level, False, target_machine.triple, instrument, profile_key(profile), report)
+
+    with measure(stats, 'cache_lookup'):
+        object_code = cache.get(key, 'o')
+
+    if object_code is not None:
+        return object_code
+
+    object_code = emit_object(compile_module(source, level, target_machine, False, cache, verbose, stats, instrument, profile, report), target_machine, stats)
+    cache.put(key, 'o', object_code)
+
+    return object_code
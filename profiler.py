@@ -0,0 +1,225 @@
+from contextlib import contextmanager
+from llvmlite import ir
+from element import Assign, If, While, Read, Write, Procedure, walk
+
+
+class Profiler(object):
+
+    def __init__(self, runtime, path):
+        self.runtime = runtime
+        self.module = runtime.module
+        self.path = path
+        self.recursive = set()
+        self.recursion = False
+        self.procedure_name = '(main)'
+        self.region = None
+        self.segmenting = False
+        self.timing = False
+        self.clock = None
+        self.countdown = None
+        self.entries = {}
+        self.counts = {}
+        self.bases = {}
+        self.timers = []
+        self.procedures = []
+        self.loops = []
+        self.lines = {}
+        self.line_timers = {}
+
+    def prepare(self, program, call_graph):
+        timers = 1 + sum(1 for node in walk(program) if type(node) in Profiler._timed_nodes)
+        self.runtime.emit_timers(timers)
+        self.recursive = set(symbol for symbol in call_graph.procedures if call_graph.recursive(symbol))
+
+    def source_name(self, symbol):
+        if symbol is None:
+            return '(main)'
+
+        names = []
+        while symbol is not None:
+            names.append(symbol.identifier)
+            symbol = symbol.procedure
+
+        return '/'.join(reversed(names))
+
+    def start_timer(self, builder, counter):
+        index = len(self.timers)
+
+        if self.recursion:
+            outermost, depth = self.runtime.emit_enter(builder, index)
+            self.timers.append((self.module.get_global('pl0.activations'), index, 1))
+            activations = self.runtime.emit_count_activation(builder, index, outermost)
+        else:
+            outermost, depth = ir.Constant(ir.IntType(1), 1), None
+            self.timers.append((self.module.get_global('pl0.counters'), counter, 1))
+            activations = self.activations(builder, counter)
+
+        return (index, depth) + self.runtime.emit_start_timer(builder, index, outermost, activations)
+
+    def stop_timer(self, timer, builder):
+        index, depth, sampled, first, start = timer
+        self.runtime.emit_stop_timer(builder, index, sampled, first, start)
+
+        if depth is not None:
+            self.runtime.emit_leave(builder, index, depth)
+
+    def entry_builder(self, function):
+        entry = self.entries.get(function, None)
+        if entry is None:
+            entry = self.entries[function] = ir.IRBuilder(function.entry_basic_block)
+            entry.position_at_start(function.entry_basic_block)
+
+        return entry
+
+    def local_count(self, builder, index):
+        counts = self.counts.setdefault(builder.function, {})
+        if index not in counts:
+            entry = self.entry_builder(builder.function)
+            counts[index] = entry.alloca(ir.IntType(64))
+            entry.store(ir.Constant(ir.IntType(64), 0), counts[index])
+            builder.position_at_end(builder.block)
+
+        return counts[index]
+
+    def increment(self, builder, index, condition=None):
+        count = self.local_count(builder, index)
+        amount = ir.Constant(ir.IntType(64), 1) if condition is None else builder.zext(condition, ir.IntType(64))
+        builder.store(builder.add(builder.load(count), amount), count)
+
+    def activations(self, builder, index):
+        count = self.local_count(builder, index)
+        bases = self.bases.setdefault(builder.function, {})
+        if index not in bases:
+            entry = self.entry_builder(builder.function)
+            bases[index] = entry.load(self.runtime.emit_counter(entry, index))
+            builder.position_at_end(builder.block)
+
+        return builder.add(bases[index], builder.load(count))
+
+    def flush_counts(self, builder):
+        for index, count in self.counts.get(builder.function, {}).items():
+            counter = self.runtime.emit_counter(builder, index)
+            builder.store(builder.add(builder.load(counter), builder.load(count)), counter)
+
+    def count_line(self, line, counters):
+        points = self.lines.setdefault(line, [])
+        if counters not in points:
+            points.append(counters)
+
+    @contextmanager
+    def procedure(self, symbol, entry, builder):
+        self.procedure_name = self.source_name(symbol)
+        self.recursion = symbol in self.recursive
+        self.clock = builder.alloca(ir.IntType(64), name='clock')
+
+        timer = self.start_timer(builder, entry)
+        self.procedures.append((self.procedure_name, entry, timer[0]))
+
+        countdown_ptr = self.runtime.emit_timer(builder, 'pl0.countdowns', timer[0])
+        self.countdown = builder.alloca(ir.IntType(64), name='countdown')
+        builder.store(builder.load(countdown_ptr), self.countdown)
+        self.start_region(entry, builder)
+
+        yield
+
+        self.stop_timer(timer, builder)
+        builder.store(builder.load(self.countdown), countdown_ptr)
+        self.flush_counts(builder)
+
+    def start_region(self, counter, builder):
+        self.region = (counter, self.runtime.emit_countdown(builder, self.countdown))
+
+    @contextmanager
+    def enter_region(self, counter, builder):
+        region = self.region
+        self.start_region(counter, builder)
+
+        yield
+
+        self.region = region
+
+    @contextmanager
+    def enter_branch(self, counter):
+        region = self.region
+        self.region = (counter, region[1])
+
+        yield
+
+        self.region = region
+
+    def segment(self, builder, emit, merge):
+        sampled = self.region[1]
+        self.segmenting = True
+
+        with builder.if_else(sampled, likely=False) as (timed, untimed):
+            with timed:
+                self.timing = True
+                self.runtime.emit_reset_clock(builder, self.clock)
+                timed_value = emit()
+                timed_block = builder.block
+                self.timing = False
+
+            with untimed:
+                value = emit()
+                untimed_block = builder.block
+
+        self.segmenting = False
+        if not merge:
+            return value
+
+        merged = builder.phi(value.type)
+        merged.add_incoming(timed_value, timed_block)
+        merged.add_incoming(value, untimed_block)
+
+        return merged
+
+    def count_statement(self, line, builder):
+        counter = self.region[0]
+        self.count_line(line, (counter,))
+
+        if self.timing:
+            index = len(self.timers)
+            self.timers.append((self.module.get_global('pl0.counters'), counter, 0))
+            self.line_timers.setdefault(line, []).append(index)
+            self.runtime.emit_read_clock(builder, index, self.clock)
+
+    def count_call(self, line, builder):
+        self.count_line(line, (self.region[0],))
+
+        if self.timing:
+            self.runtime.emit_reset_clock(builder, self.clock)
+
+    def start_loop(self, builder, reached):
+        return self.start_timer(builder, reached)
+
+    def stop_loop(self, timer, builder, line, reached, taken):
+        self.stop_timer(timer, builder)
+        self.count_line(line, (reached, taken))
+        self.loops.append(('%s:%d' % (self.procedure_name, line + 1), taken, timer[0]))
+
+    def sections(self):
+        counters = self.module.get_global('pl0.counters')
+        cycles = self.module.get_global('pl0.cycles')
+
+        procedures = [(name, ([[(counters, entry)]], [[(cycles, timer)]])) for name, entry, timer in self.procedures]
+        loops = [(label, ([[(counters, taken)]], [[(cycles, timer)]])) for label, taken, timer in self.loops]
+        lines = []
+        for line in sorted(self.lines):
+            timers = self.line_timers.get(line, [])
+            counts = [[(counters, index) for index in point] for point in self.lines[line]]
+            lines.append((str(line + 1), (counts, [[(cycles, timer) for timer in timers]] if timers else [])))
+
+        untimed = '- no cycles: calls are timed in the procedure section, loop conditions in the loop section\n'
+
+        return [
+            ('procedure', ('calls', 'cycles'), procedures, 1, None),
+            ('loop', ('iterations', 'cycles'), loops, 1, None),
+            ('line', ('count', 'cycles'), lines, 1, untimed)
+        ]
+
+    def emit_report(self, builder):
+        builder.call(self.runtime.emit_estimate_cycles(self.timers), ())
+        builder.call(self.runtime.emit_report(self.path, self.sections()), ())
+
+
+Profiler._timed_nodes = {Procedure, While, Assign, If, Read, Write}
@@ -0,0 +1,57 @@
+import zlib
+
+
+class ProfileError(Exception):
+
+    def __init__(self, message):
+        self.message = message
+
+
+class Profile(object):
+
+    def __init__(self, checksum, counts):
+        self.checksum = checksum
+        self.counts = counts
+
+    def key(self):
+        return self.checksum, tuple(self.counts)
+
+    def __str__(self):
+        return 'Profile(%08x, %d counters)' % (self.checksum, len(self.counts))
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def layout_checksum(layout):
+    return zlib.crc32('\n'.join('%s %s' % counter for counter in layout).encode())
+
+
+def read_profile(path):
+    try:
+        with open(path) as profile_f:
+            lines = profile_f.read().split('\n')
+    except OSError as error:
+        raise ProfileError('Cannot read profile \'%s\': %s' % (path, error.strerror))
+
+    header = lines[0].split()
+    if len(header) != 3 or header[0] != 'pl0-profile':
+        raise ProfileError('\'%s\' is not a PL0 profile' % path)
+
+    try:
+        checksum = int(header[1], 16)
+        count = int(header[2])
+        counts = [int(line) for line in lines[1:count + 1]]
+    except ValueError:
+        raise ProfileError('Profile \'%s\' is corrupt' % path)
+
+    if len(counts) != count:
+        raise ProfileError('Profile \'%s\' is truncated' % path)
+
+    return Profile(checksum, counts)
+
+
+def branch_weights(taken, not_taken):
+    scale = max(1, (max(taken, not_taken) >> 32) + 1)
+
+    return taken // scale, not_taken // scale
@@ -0,0 +1,894 @@
+from llvmlite import ir
+
+
+class Runtime(object):
+
+    external_names = ('write', 'read', 'lseek', 'mmap', 'fopen', 'fprintf', 'fclose', 'qsort')
+    buffer_size = 1 << 16
+    sample_interval = 64
+    region_interval = 1024
+    seed = 0x2545f4914f6cdd1d
+    calibration_rounds = 256
+    timer_names = ('pl0.cycles', 'pl0.first_cycles', 'pl0.samples', 'pl0.activations', 'pl0.depths', 'pl0.countdowns')
+    integer_length = 20
+    reciprocal_of_ten = 0xcccccccccccccccd
+
+    def __init__(self, module):
+        self.module = module
+
+    def emit_write(self):
+        try:
+            existing_func = self.module.get_global('write')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(64), (ir.IntType(32), ir.IntType(8).as_pointer(), ir.IntType(64)))
+        func = ir.Function(self.module, fnty, 'write')
+
+        return func
+
+    def emit_output_buffer(self):
+        try:
+            return self.module.get_global('pl0.output'), self.module.get_global('pl0.output.length')
+        except KeyError:
+            pass
+
+        buffer_type = ir.ArrayType(ir.IntType(8), Runtime.buffer_size)
+        buffer = ir.GlobalVariable(self.module, buffer_type, 'pl0.output')
+        buffer.linkage = 'internal'
+        buffer.initializer = ir.Constant(buffer_type, None)
+
+        length = ir.GlobalVariable(self.module, ir.IntType(64), 'pl0.output.length')
+        length.linkage = 'internal'
+        length.initializer = ir.Constant(ir.IntType(64), 0)
+
+        return buffer, length
+
+    def emit_flush(self):
+        try:
+            existing_func = self.module.get_global('pl0.flush')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.VoidType(), ())
+        func = ir.Function(self.module, fnty, 'pl0.flush')
+        func.linkage = 'internal'
+
+        buffer, length_ptr = self.emit_output_buffer()
+        write = self.emit_write()
+
+        entry_block = func.append_basic_block('entry')
+        loop_block = func.append_basic_block('loop')
+        write_block = func.append_basic_block('write')
+        end_block = func.append_basic_block('end')
+
+        builder = ir.IRBuilder(entry_block)
+        length = builder.load(length_ptr)
+        builder.branch(loop_block)
+
+        builder.position_at_start(loop_block)
+        written = builder.phi(ir.IntType(64))
+        written.add_incoming(ir.Constant(ir.IntType(64), 0), entry_block)
+        builder.cbranch(builder.icmp_signed('<', written, length), write_block, end_block)
+
+        builder.position_at_start(write_block)
+        ptr = builder.gep(buffer, (ir.Constant(ir.IntType(32), 0), written))
+        count = builder.call(write, (ir.Constant(ir.IntType(32), 1), ptr, builder.sub(length, written)))
+        written.add_incoming(builder.add(written, count), write_block)
+        builder.cbranch(builder.icmp_signed('>', count, ir.Constant(ir.IntType(64), 0)), loop_block, end_block)
+
+        builder.position_at_start(end_block)
+        builder.store(ir.Constant(ir.IntType(64), 0), length_ptr)
+        builder.ret_void()
+
+        return func
+
+    def emit_reserve(self, builder, size):
+        buffer, length_ptr = self.emit_output_buffer()
+
+        with builder.if_then(builder.icmp_signed('>', builder.load(length_ptr), ir.Constant(ir.IntType(64), Runtime.buffer_size - size))):
+            builder.call(self.emit_flush(), ())
+
+        return builder.load(length_ptr)
+
+    def emit_write_character(self):
+        try:
+            existing_func = self.module.get_global('pl0.write_character')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.VoidType(), (ir.IntType(8),))
+        func = ir.Function(self.module, fnty, 'pl0.write_character')
+        func.linkage = 'internal'
+        character, = func.args
+
+        buffer, length_ptr = self.emit_output_buffer()
+
+        builder = ir.IRBuilder(func.append_basic_block('entry'))
+        length = self.emit_reserve(builder, 1)
+        builder.store(character, builder.gep(buffer, (ir.Constant(ir.IntType(32), 0), length)))
+        builder.store(builder.add(length, ir.Constant(ir.IntType(64), 1)), length_ptr)
+        builder.ret_void()
+
+        return func
+
+    def emit_write_integer(self):
+        try:
+            existing_func = self.module.get_global('pl0.write_integer')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.VoidType(), (ir.IntType(64), ir.IntType(8)))
+        func = ir.Function(self.module, fnty, 'pl0.write_integer')
+        func.linkage = 'internal'
+        value, separator = func.args
+
+        buffer, length_ptr = self.emit_output_buffer()
+        memcpy = self.module.declare_intrinsic('llvm.memcpy', [ir.IntType(8).as_pointer(), ir.IntType(8).as_pointer(), ir.IntType(64)])
+
+        zero = ir.Constant(ir.IntType(32), 0)
+        ten = ir.Constant(ir.IntType(64), 10)
+        reciprocal = ir.Constant(ir.IntType(128), Runtime.reciprocal_of_ten)
+        integer_length = ir.Constant(ir.IntType(64), Runtime.integer_length)
+
+        entry_block = func.append_basic_block('entry')
+        digit_block = func.append_basic_block('digit')
+        copy_block = func.append_basic_block('copy')
+
+        builder = ir.IRBuilder(entry_block)
+        digits = builder.alloca(ir.ArrayType(ir.IntType(8), Runtime.integer_length))
+        negative = builder.icmp_signed('<', value, ir.Constant(ir.IntType(64), 0))
+        magnitude = builder.select(negative, builder.neg(value), value)
+        builder.branch(digit_block)
+
+        builder.position_at_start(digit_block)
+        remaining = builder.phi(ir.IntType(64))
+        remaining.add_incoming(magnitude, entry_block)
+        position = builder.phi(ir.IntType(64))
+        position.add_incoming(integer_length, entry_block)
+
+        product = builder.mul(builder.zext(remaining, ir.IntType(128)), reciprocal)
+        next_remaining = builder.trunc(builder.lshr(product, ir.Constant(ir.IntType(128), 67)), ir.IntType(64))
+        digit = builder.trunc(builder.sub(remaining, builder.mul(next_remaining, ten)), ir.IntType(8))
+        next_position = builder.sub(position, ir.Constant(ir.IntType(64), 1))
+        builder.store(builder.add(digit, ir.Constant(ir.IntType(8), ord('0'))), builder.gep(digits, (zero, next_position)))
+
+        remaining.add_incoming(next_remaining, digit_block)
+        position.add_incoming(next_position, digit_block)
+        builder.cbranch(builder.icmp_unsigned('!=', next_remaining, ir.Constant(ir.IntType(64), 0)), digit_block, copy_block)
+
+        builder.position_at_start(copy_block)
+        sign_position = builder.sub(next_position, ir.Constant(ir.IntType(64), 1))
+        builder.store(ir.Constant(ir.IntType(8), ord('-')), builder.gep(digits, (zero, sign_position)))
+        start = builder.select(negative, sign_position, next_position)
+        count = builder.sub(integer_length, start)
+
+        length = self.emit_reserve(builder, Runtime.integer_length + 1)
+        builder.call(memcpy, (builder.gep(buffer, (zero, length)), builder.gep(digits, (zero, start)), count, ir.Constant(ir.IntType(1), 0)))
+        end = builder.add(length, count)
+        builder.store(separator, builder.gep(buffer, (zero, end)))
+        builder.store(builder.add(end, ir.Constant(ir.IntType(64), 1)), length_ptr)
+        builder.ret_void()
+
+        return func
+
+    def emit_read(self):
+        try:
+            existing_func = self.module.get_global('read')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(64), (ir.IntType(32), ir.IntType(8).as_pointer(), ir.IntType(64)))
+        func = ir.Function(self.module, fnty, 'read')
+
+        return func
+
+    def emit_lseek(self):
+        try:
+            existing_func = self.module.get_global('lseek')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(64), (ir.IntType(32), ir.IntType(64), ir.IntType(32)))
+        func = ir.Function(self.module, fnty, 'lseek')
+
+        return func
+
+    def emit_mmap(self):
+        try:
+            existing_func = self.module.get_global('mmap')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(8).as_pointer(), (ir.IntType(8).as_pointer(), ir.IntType(64), ir.IntType(32), ir.IntType(32), ir.IntType(32), ir.IntType(64)))
+        func = ir.Function(self.module, fnty, 'mmap')
+
+        return func
+
+    def emit_input_state(self):
+        try:
+            return (self.module.get_global('pl0.input.buffer'), self.module.get_global('pl0.input'),
+                    self.module.get_global('pl0.input.position'), self.module.get_global('pl0.input.length'),
+                    self.module.get_global('pl0.input.mapped'))
+        except KeyError:
+            pass
+
+        buffer_type = ir.ArrayType(ir.IntType(8), Runtime.buffer_size)
+        buffer = ir.GlobalVariable(self.module, buffer_type, 'pl0.input.buffer')
+        buffer.linkage = 'internal'
+        buffer.initializer = ir.Constant(buffer_type, None)
+
+        input = ir.GlobalVariable(self.module, ir.IntType(8).as_pointer(), 'pl0.input')
+        input.linkage = 'internal'
+        input.initializer = ir.Constant(ir.IntType(8).as_pointer(), None)
+
+        state = [buffer, input]
+        for name, type in (('pl0.input.position', ir.IntType(64)), ('pl0.input.length', ir.IntType(64)), ('pl0.input.mapped', ir.IntType(1))):
+            variable = ir.GlobalVariable(self.module, type, name)
+            variable.linkage = 'internal'
+            variable.initializer = ir.Constant(type, 0)
+            state.append(variable)
+
+        return tuple(state)
+
+    def emit_open_input(self):
+        try:
+            existing_func = self.module.get_global('pl0.open_input')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.VoidType(), ())
+        func = ir.Function(self.module, fnty, 'pl0.open_input')
+        func.linkage = 'internal'
+
+        buffer, input, position_ptr, length_ptr, mapped_ptr = self.emit_input_state()
+        lseek = self.emit_lseek()
+
+        entry_block = func.append_basic_block('entry')
+        seek_block = func.append_basic_block('seek')
+        map_block = func.append_basic_block('map')
+        mapped_block = func.append_basic_block('mapped')
+        rewind_block = func.append_basic_block('rewind')
+        stream_block = func.append_basic_block('stream')
+
+        builder = ir.IRBuilder(entry_block)
+        stdin = ir.Constant(ir.IntType(32), 0)
+        builder.store(builder.gep(buffer, (ir.Constant(ir.IntType(32), 0), ir.Constant(ir.IntType(32), 0))), input)
+        current = builder.call(lseek, (stdin, ir.Constant(ir.IntType(64), 0), ir.Constant(ir.IntType(32), 1)))
+        builder.cbranch(builder.icmp_signed('>=', current, ir.Constant(ir.IntType(64), 0)), seek_block, stream_block)
+
+        builder.position_at_start(seek_block)
+        end = builder.call(lseek, (stdin, ir.Constant(ir.IntType(64), 0), ir.Constant(ir.IntType(32), 2)))
+        builder.cbranch(builder.icmp_signed('>', end, current), map_block, rewind_block)
+
+        builder.position_at_start(map_block)
+        address = builder.call(self.emit_mmap(), (ir.Constant(ir.IntType(8).as_pointer(), None), end, ir.Constant(ir.IntType(32), 1),
+                                                  ir.Constant(ir.IntType(32), 2), stdin, ir.Constant(ir.IntType(64), 0)))
+        failed = builder.icmp_signed('==', builder.ptrtoint(address, ir.IntType(64)), ir.Constant(ir.IntType(64), -1))
+        builder.cbranch(failed, rewind_block, mapped_block)
+
+        builder.position_at_start(mapped_block)
+        builder.store(address, input)
+        builder.store(current, position_ptr)
+        builder.store(end, length_ptr)
+        builder.store(ir.Constant(ir.IntType(1), 1), mapped_ptr)
+        builder.ret_void()
+
+        builder.position_at_start(rewind_block)
+        builder.call(lseek, (stdin, current, ir.Constant(ir.IntType(32), 0)))
+        builder.branch(stream_block)
+
+        builder.position_at_start(stream_block)
+        builder.ret_void()
+
+        return func
+
+    def emit_read_character(self):
+        try:
+            existing_func = self.module.get_global('pl0.read_character')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(32), ())
+        func = ir.Function(self.module, fnty, 'pl0.read_character')
+        func.linkage = 'internal'
+
+        buffer, input, position_ptr, length_ptr, mapped_ptr = self.emit_input_state()
+
+        entry_block = func.append_basic_block('entry')
+        buffered_block = func.append_basic_block('buffered')
+        refill_block = func.append_basic_block('refill')
+        read_block = func.append_basic_block('read')
+        filled_block = func.append_basic_block('filled')
+        end_block = func.append_basic_block('end')
+
+        builder = ir.IRBuilder(entry_block)
+        position = builder.load(position_ptr)
+        builder.cbranch(builder.icmp_signed('<', position, builder.load(length_ptr)), buffered_block, refill_block)
+
+        builder.position_at_start(buffered_block)
+        character = builder.load(builder.gep(builder.load(input), (position,)))
+        builder.store(builder.add(position, ir.Constant(ir.IntType(64), 1)), position_ptr)
+        builder.ret(builder.zext(character, ir.IntType(32)))
+
+        builder.position_at_start(refill_block)
+        builder.cbranch(builder.load(mapped_ptr), end_block, read_block)
+
+        builder.position_at_start(read_block)
+        start = builder.gep(buffer, (ir.Constant(ir.IntType(32), 0), ir.Constant(ir.IntType(32), 0)))
+        count = builder.call(self.emit_read(), (ir.Constant(ir.IntType(32), 0), start, ir.Constant(ir.IntType(64), Runtime.buffer_size)))
+        builder.cbranch(builder.icmp_signed('>', count, ir.Constant(ir.IntType(64), 0)), filled_block, end_block)
+
+        builder.position_at_start(filled_block)
+        builder.store(ir.Constant(ir.IntType(64), 1), position_ptr)
+        builder.store(count, length_ptr)
+        builder.ret(builder.zext(builder.load(start), ir.IntType(32)))
+
+        builder.position_at_start(end_block)
+        builder.ret(ir.Constant(ir.IntType(32), -1))
+
+        return func
+
+    def emit_read_integer(self):
+        try:
+            existing_func = self.module.get_global('pl0.read_integer')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.VoidType(), (ir.IntType(64).as_pointer(),))
+        func = ir.Function(self.module, fnty, 'pl0.read_integer')
+        func.linkage = 'internal'
+        target, = func.args
+
+        buffer, input, position_ptr, length_ptr, mapped_ptr = self.emit_input_state()
+        read_character = self.emit_read_character()
+
+        def is_digit(character):
+            return builder.icmp_unsigned('<', builder.sub(character, ir.Constant(ir.IntType(32), ord('0'))), ir.Constant(ir.IntType(32), 10))
+
+        def unread(character):
+            with builder.if_then(builder.icmp_signed('>=', character, ir.Constant(ir.IntType(32), 0))):
+                builder.store(builder.sub(builder.load(position_ptr), ir.Constant(ir.IntType(64), 1)), position_ptr)
+
+        entry_block = func.append_basic_block('entry')
+        space_block = func.append_basic_block('space')
+        sign_block = func.append_basic_block('sign')
+        number_block = func.append_basic_block('number')
+        digit_block = func.append_basic_block('digit')
+        store_block = func.append_basic_block('store')
+        fail_block = func.append_basic_block('fail')
+
+        builder = ir.IRBuilder(entry_block)
+        with builder.if_then(builder.icmp_unsigned('==', builder.load(input), ir.Constant(ir.IntType(8).as_pointer(), None))):
+            builder.call(self.emit_open_input(), ())
+        builder.branch(space_block)
+
+        builder.position_at_start(space_block)
+        character = builder.call(read_character, ())
+        is_space = builder.or_(builder.icmp_signed('==', character, ir.Constant(ir.IntType(32), ord(' '))),
+                               builder.icmp_unsigned('<', builder.sub(character, ir.Constant(ir.IntType(32), ord('\t'))), ir.Constant(ir.IntType(32), 5)))
+        builder.cbranch(is_space, space_block, sign_block)
+
+        builder.position_at_start(sign_block)
+        negative = builder.icmp_signed('==', character, ir.Constant(ir.IntType(32), ord('-')))
+        has_sign = builder.or_(negative, builder.icmp_signed('==', character, ir.Constant(ir.IntType(32), ord('+'))))
+        with builder.if_then(has_sign):
+            signed_character = builder.call(read_character, ())
+            signed_block = builder.block
+        first = builder.phi(ir.IntType(32))
+        first.add_incoming(character, sign_block)
+        first.add_incoming(signed_character, signed_block)
+        builder.cbranch(is_digit(first), number_block, fail_block)
+
+        builder.position_at_start(number_block)
+        builder.branch(digit_block)
+
+        builder.position_at_start(digit_block)
+        value = builder.phi(ir.IntType(64))
+        value.add_incoming(ir.Constant(ir.IntType(64), 0), number_block)
+        digit = builder.phi(ir.IntType(32))
+        digit.add_incoming(first, number_block)
+        next_value = builder.add(builder.mul(value, ir.Constant(ir.IntType(64), 10)),
+                                 builder.zext(builder.sub(digit, ir.Constant(ir.IntType(32), ord('0'))), ir.IntType(64)))
+        next_character = builder.call(read_character, ())
+        value.add_incoming(next_value, digit_block)
+        digit.add_incoming(next_character, digit_block)
+        builder.cbranch(is_digit(next_character), digit_block, store_block)
+
+        builder.position_at_start(store_block)
+        unread(next_character)
+        builder.store(builder.select(negative, builder.neg(next_value), next_value), target)
+        builder.ret_void()
+
+        builder.position_at_start(fail_block)
+        unread(first)
+        builder.ret_void()
+
+        return func
+
+    def emit_fopen(self):
+        try:
+            existing_func = self.module.get_global('fopen')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(8).as_pointer(), (ir.IntType(8).as_pointer(), ir.IntType(8).as_pointer()))
+        func = ir.Function(self.module, fnty, 'fopen')
+
+        return func
+
+    def emit_fprintf(self):
+        try:
+            existing_func = self.module.get_global('fprintf')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(32), (ir.IntType(8).as_pointer(), ir.IntType(8).as_pointer()), var_arg=True)
+        func = ir.Function(self.module, fnty, 'fprintf')
+
+        return func
+
+    def emit_fclose(self):
+        try:
+            existing_func = self.module.get_global('fclose')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(32), (ir.IntType(8).as_pointer(),))
+        func = ir.Function(self.module, fnty, 'fclose')
+
+        return func
+
+    def emit_string(self, name, text):
+        data = bytearray(text.encode() + b'\0')
+        string_type = ir.ArrayType(ir.IntType(8), len(data))
+
+        string = ir.GlobalVariable(self.module, string_type, name)
+        string.linkage = 'internal'
+        string.global_constant = True
+        string.initializer = ir.Constant(string_type, data)
+
+        return string
+
+    def emit_counters(self, count):
+        try:
+            return self.module.get_global('pl0.counters')
+        except KeyError:
+            pass
+
+        counters_type = ir.ArrayType(ir.IntType(64), count)
+        counters = ir.GlobalVariable(self.module, counters_type, 'pl0.counters')
+        counters.linkage = 'internal'
+        counters.initializer = ir.Constant(counters_type, None)
+
+        return counters
+
+    def emit_counter(self, builder, index):
+        return builder.gep(self.module.get_global('pl0.counters'), (ir.Constant(ir.IntType(32), 0), ir.Constant(ir.IntType(32), index)))
+
+    def emit_increment(self, builder, index, condition=None):
+        counter = self.emit_counter(builder, index)
+        amount = ir.Constant(ir.IntType(64), 1) if condition is None else builder.zext(condition, ir.IntType(64))
+        builder.store(builder.add(builder.load(counter), amount), counter)
+
+    def emit_dump_counters(self, path, checksum, count):
+        fnty = ir.FunctionType(ir.VoidType(), ())
+        func = ir.Function(self.module, fnty, 'pl0.dump_counters')
+        func.linkage = 'internal'
+
+        counters = self.emit_counters(count)
+        fprintf = self.emit_fprintf()
+        zero = ir.Constant(ir.IntType(32), 0)
+
+        entry_block = func.append_basic_block('entry')
+        header_block = func.append_basic_block('header')
+        loop_block = func.append_basic_block('loop')
+        close_block = func.append_basic_block('close')
+        end_block = func.append_basic_block('end')
+
+        builder = ir.IRBuilder(entry_block)
+        path_string = builder.gep(self.emit_string('pl0.profile.path', path), (zero, zero))
+        mode_string = builder.gep(self.emit_string('pl0.profile.mode', 'w'), (zero, zero))
+        file = builder.call(self.emit_fopen(), (path_string, mode_string))
+        builder.cbranch(builder.icmp_unsigned('==', file, ir.Constant(file.type, None)), end_block, header_block)
+
+        builder.position_at_start(header_block)
+        header_string = builder.gep(self.emit_string('pl0.profile.header', 'pl0-profile %08x %d\n' % (checksum, count)), (zero, zero))
+        count_string = builder.gep(self.emit_string('pl0.profile.count', '%lld\n'), (zero, zero))
+        builder.call(fprintf, (file, header_string))
+        builder.branch(loop_block)
+
+        builder.position_at_start(loop_block)
+        index = builder.phi(ir.IntType(64))
+        index.add_incoming(ir.Constant(ir.IntType(64), 0), header_block)
+        builder.call(fprintf, (file, count_string, builder.load(builder.gep(counters, (zero, index)))))
+        next_index = builder.add(index, ir.Constant(ir.IntType(64), 1))
+        index.add_incoming(next_index, loop_block)
+        builder.cbranch(builder.icmp_signed('<', next_index, ir.Constant(ir.IntType(64), count)), loop_block, close_block)
+
+        builder.position_at_start(close_block)
+        builder.call(self.emit_fclose(), (file,))
+        builder.branch(end_block)
+
+        builder.position_at_start(end_block)
+        builder.ret_void()
+
+        return func
+
+    def emit_qsort(self):
+        try:
+            existing_func = self.module.get_global('qsort')
+            return existing_func
+        except KeyError:
+            pass
+
+        compare_type = ir.FunctionType(ir.IntType(32), (ir.IntType(8).as_pointer(), ir.IntType(8).as_pointer()))
+        fnty = ir.FunctionType(ir.VoidType(), (ir.IntType(8).as_pointer(), ir.IntType(64), ir.IntType(64), compare_type.as_pointer()))
+        func = ir.Function(self.module, fnty, 'qsort')
+
+        return func
+
+    def emit_cycle_counter(self):
+        try:
+            existing_func = self.module.get_global('llvm.readcyclecounter')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(64), ())
+        func = ir.Function(self.module, fnty, 'llvm.readcyclecounter')
+
+        return func
+
+    def emit_load_fence(self):
+        try:
+            existing_func = self.module.get_global('llvm.x86.sse2.lfence')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.VoidType(), ())
+        func = ir.Function(self.module, fnty, 'llvm.x86.sse2.lfence')
+
+        return func
+
+    def emit_read_cycles(self, builder):
+        if self.module.triple.startswith('x86_64'):
+            builder.call(self.emit_load_fence(), ())
+
+        return builder.call(self.emit_cycle_counter(), ())
+
+    def emit_timers(self, count):
+        timers_type = ir.ArrayType(ir.IntType(64), count)
+
+        for name in Runtime.timer_names:
+            timer = ir.GlobalVariable(self.module, timers_type, name)
+            timer.linkage = 'internal'
+            timer.initializer = ir.Constant(timers_type, None)
+
+        spent = ir.GlobalVariable(self.module, ir.IntType(64), 'pl0.spent')
+        spent.linkage = 'internal'
+        spent.initializer = ir.Constant(ir.IntType(64), 0)
+
+        seed = ir.GlobalVariable(self.module, ir.IntType(64), 'pl0.seed')
+        seed.linkage = 'internal'
+        seed.initializer = ir.Constant(ir.IntType(64), Runtime.seed)
+
+    def emit_timer(self, builder, name, index):
+        return builder.gep(self.module.get_global(name), (ir.Constant(ir.IntType(32), 0), ir.Constant(ir.IntType(32), index)))
+
+    def emit_enter(self, builder, index):
+        depth_ptr = self.emit_timer(builder, 'pl0.depths', index)
+        depth = builder.load(depth_ptr)
+        builder.store(builder.add(depth, ir.Constant(ir.IntType(64), 1)), depth_ptr)
+
+        return builder.icmp_signed('==', depth, ir.Constant(ir.IntType(64), 0)), depth
+
+    def emit_leave(self, builder, index, depth):
+        builder.store(depth, self.emit_timer(builder, 'pl0.depths', index))
+
+    def emit_count_activation(self, builder, index, outermost):
+        activations_ptr = self.emit_timer(builder, 'pl0.activations', index)
+        activations = builder.add(builder.load(activations_ptr), builder.zext(outermost, ir.IntType(64)))
+        builder.store(activations, activations_ptr)
+
+        return activations
+
+    def emit_sample(self, builder, key, outermost, activations):
+        phase = builder.and_(activations, ir.Constant(ir.IntType(64), Runtime.sample_interval - 1))
+        first = builder.icmp_unsigned('==', activations, ir.Constant(ir.IntType(64), 1))
+        in_phase = builder.icmp_unsigned('==', phase, ir.Constant(ir.IntType(64), key * 37 % Runtime.sample_interval))
+
+        return builder.and_(outermost, builder.or_(first, in_phase)), first
+
+    def emit_start_timer(self, builder, key, outermost, activations):
+        sampled, first = self.emit_sample(builder, key, outermost, activations)
+
+        block = builder.block
+        with builder.if_then(sampled, likely=False):
+            sample_block = builder.block
+            sample = builder.sub(self.emit_read_cycles(builder), builder.load(self.module.get_global('pl0.spent')))
+
+        start = builder.phi(ir.IntType(64))
+        start.add_incoming(sample, sample_block)
+        start.add_incoming(ir.Constant(ir.IntType(64), 0), block)
+
+        return sampled, first, start
+
+    def emit_record_sample(self):
+        try:
+            existing_func = self.module.get_global('pl0.record_sample')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.VoidType(), (ir.IntType(64), ir.IntType(1), ir.IntType(64)))
+        func = ir.Function(self.module, fnty, 'pl0.record_sample')
+        func.linkage = 'internal'
+        func.attributes.add('cold')
+        func.attributes.add('noinline')
+
+        index, first, elapsed = func.args
+        zero = ir.Constant(ir.IntType(32), 0)
+
+        builder = ir.IRBuilder(func.append_basic_block('entry'))
+        with builder.if_else(first) as (then, otherwise):
+            with then:
+                builder.store(elapsed, builder.gep(self.module.get_global('pl0.first_cycles'), (zero, index)))
+            with otherwise:
+                cycles_ptr = builder.gep(self.module.get_global('pl0.cycles'), (zero, index))
+                builder.store(builder.add(builder.load(cycles_ptr), elapsed), cycles_ptr)
+                samples_ptr = builder.gep(self.module.get_global('pl0.samples'), (zero, index))
+                builder.store(builder.add(builder.load(samples_ptr), ir.Constant(ir.IntType(64), 1)), samples_ptr)
+        builder.ret_void()
+
+        return func
+
+    def emit_record_elapsed(self, builder, index, first, now, elapsed):
+        builder.call(self.emit_record_sample(), (ir.Constant(ir.IntType(64), index), first, elapsed))
+
+        spent_ptr = self.module.get_global('pl0.spent')
+        later = self.emit_read_cycles(builder)
+        builder.store(builder.add(builder.load(spent_ptr), builder.sub(later, now)), spent_ptr)
+
+        return later
+
+    def emit_stop_timer(self, builder, index, sampled, first, start):
+        with builder.if_then(sampled, likely=False):
+            now = self.emit_read_cycles(builder)
+            elapsed = builder.sub(builder.sub(now, builder.load(self.module.get_global('pl0.spent'))), start)
+            self.emit_record_elapsed(builder, index, first, now, elapsed)
+
+    def emit_next_interval(self):
+        try:
+            existing_func = self.module.get_global('pl0.next_interval')
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(64), ())
+        func = ir.Function(self.module, fnty, 'pl0.next_interval')
+        func.linkage = 'internal'
+        func.attributes.add('cold')
+        func.attributes.add('noinline')
+
+        builder = ir.IRBuilder(func.append_basic_block('entry'))
+        seed_ptr = self.module.get_global('pl0.seed')
+        seed = builder.load(seed_ptr)
+        seed = builder.xor(seed, builder.shl(seed, ir.Constant(ir.IntType(64), 13)))
+        seed = builder.xor(seed, builder.lshr(seed, ir.Constant(ir.IntType(64), 7)))
+        seed = builder.xor(seed, builder.shl(seed, ir.Constant(ir.IntType(64), 17)))
+        builder.store(seed, seed_ptr)
+        interval = builder.and_(seed, ir.Constant(ir.IntType(64), 2 * Runtime.region_interval - 1))
+        builder.ret(builder.add(interval, ir.Constant(ir.IntType(64), 1)))
+
+        return func
+
+    def emit_countdown(self, builder, countdown_ptr):
+        remaining = builder.sub(builder.load(countdown_ptr), ir.Constant(ir.IntType(64), 1))
+        builder.store(remaining, countdown_ptr)
+        sampled = builder.icmp_signed('<=', remaining, ir.Constant(ir.IntType(64), 0))
+
+        with builder.if_then(sampled, likely=False):
+            builder.store(builder.call(self.emit_next_interval(), ()), countdown_ptr)
+
+        return sampled
+
+    def emit_reset_clock(self, builder, clock):
+        builder.store(self.emit_read_cycles(builder), clock)
+
+    def emit_read_clock(self, builder, index, clock):
+        now = self.emit_read_cycles(builder)
+        builder.store(self.emit_record_elapsed(builder, index, ir.Constant(ir.IntType(1), 0), now, builder.sub(now, builder.load(clock))), clock)
+
+    def emit_subtract_overhead(self, builder, cycles, overhead):
+        return builder.select(builder.icmp_unsigned('>', cycles, overhead), builder.sub(cycles, overhead), ir.Constant(ir.IntType(64), 0))
+
+    def emit_estimate_cycles(self, activations):
+        fnty = ir.FunctionType(ir.VoidType(), ())
+        func = ir.Function(self.module, fnty, 'pl0.estimate_cycles')
+        func.linkage = 'internal'
+
+        zero = ir.Constant(ir.IntType(32), 0)
+        entry_block = func.append_basic_block('entry')
+        calibrate_block = func.append_basic_block('calibrate')
+        estimate_block = func.append_basic_block('estimate')
+
+        builder = ir.IRBuilder(entry_block)
+        builder.branch(calibrate_block)
+
+        builder.position_at_start(calibrate_block)
+        attempt = builder.phi(ir.IntType(64))
+        attempt.add_incoming(ir.Constant(ir.IntType(64), 0), entry_block)
+        total = builder.phi(ir.IntType(64))
+        total.add_incoming(ir.Constant(ir.IntType(64), 0), entry_block)
+        start = self.emit_read_cycles(builder)
+        next_total = builder.add(total, builder.sub(self.emit_read_cycles(builder), start))
+        next_attempt = builder.add(attempt, ir.Constant(ir.IntType(64), 1))
+        attempt.add_incoming(next_attempt, calibrate_block)
+        total.add_incoming(next_total, calibrate_block)
+        builder.cbranch(builder.icmp_unsigned('<', next_attempt, ir.Constant(ir.IntType(64), Runtime.calibration_rounds)), calibrate_block, estimate_block)
+
+        builder.position_at_start(estimate_block)
+        overhead = builder.udiv(next_total, ir.Constant(ir.IntType(64), Runtime.calibration_rounds))
+        for index, (array, counter, first) in enumerate(activations):
+            remaining = builder.sub(builder.load(builder.gep(array, (zero, ir.Constant(ir.IntType(32), counter)))), ir.Constant(ir.IntType(64), first))
+            sample_count = builder.load(self.emit_timer(builder, 'pl0.samples', index))
+            first_cycles = self.emit_subtract_overhead(builder, builder.load(self.emit_timer(builder, 'pl0.first_cycles', index)), overhead)
+            cycles_ptr = self.emit_timer(builder, 'pl0.cycles', index)
+            sampled_cycles = self.emit_subtract_overhead(builder, builder.load(cycles_ptr), builder.mul(overhead, sample_count))
+
+            sampled = builder.icmp_unsigned('!=', sample_count, ir.Constant(ir.IntType(64), 0))
+            cycles = builder.uitofp(builder.select(sampled, sampled_cycles, first_cycles), ir.DoubleType())
+            scale = builder.fdiv(builder.uitofp(remaining, ir.DoubleType()), builder.uitofp(builder.select(sampled, sample_count, ir.Constant(ir.IntType(64), 1)), ir.DoubleType()))
+            builder.store(builder.add(first_cycles, builder.fptoui(builder.fmul(cycles, scale), ir.IntType(64))), cycles_ptr)
+
+        builder.ret_void()
+
+        return func
+
+    def emit_compare_rows(self, column):
+        name = 'pl0.compare_rows.%d' % column
+        try:
+            existing_func = self.module.get_global(name)
+            return existing_func
+        except KeyError:
+            pass
+
+        fnty = ir.FunctionType(ir.IntType(32), (ir.IntType(8).as_pointer(), ir.IntType(8).as_pointer()))
+        func = ir.Function(self.module, fnty, name)
+        func.linkage = 'internal'
+
+        builder = ir.IRBuilder(func.append_basic_block('entry'))
+        lhs = builder.bitcast(func.args[0], ir.IntType(64).as_pointer())
+        rhs = builder.bitcast(func.args[1], ir.IntType(64).as_pointer())
+
+        lhs_key = builder.load(builder.gep(lhs, (ir.Constant(ir.IntType(32), column),)))
+        rhs_key = builder.load(builder.gep(rhs, (ir.Constant(ir.IntType(32), column),)))
+        first = builder.icmp_signed('<', builder.load(lhs), builder.load(rhs))
+
+        before, after = ir.Constant(ir.IntType(32), -1), ir.Constant(ir.IntType(32), 1)
+        order = builder.select(builder.icmp_signed('<', lhs_key, rhs_key), after, builder.select(first, before, after))
+        builder.ret(builder.select(builder.icmp_signed('>', lhs_key, rhs_key), before, order))
+
+        return func
+
+    def emit_report_value(self, builder, alternatives):
+        value = ir.Constant(ir.IntType(64), -1)
+        for alternative in alternatives:
+            total = None
+            for array, index in alternative:
+                count = builder.load(builder.gep(array, (ir.Constant(ir.IntType(32), 0), ir.Constant(ir.IntType(32), index))))
+                total = count if total is None else builder.add(total, count)
+
+            value = builder.select(builder.icmp_signed('>', total, value), total, value)
+
+        return value
+
+    def emit_report_section(self, builder, file, number, title, columns, rows, key, note):
+        zero = ir.Constant(ir.IntType(32), 0)
+        fprintf = self.emit_fprintf()
+        func = builder.function
+
+        row_type = ir.ArrayType(ir.IntType(64), len(columns) + 1)
+        table_type = ir.ArrayType(row_type, len(rows))
+        table = ir.GlobalVariable(self.module, table_type, 'pl0.report.%d.rows' % number)
+        table.linkage = 'internal'
+        table.initializer = ir.Constant(table_type, None)
+
+        strings = [self.emit_string('pl0.report.%d.label.%d' % (number, index), label) for index, (label, values) in enumerate(rows)]
+        labels_type = ir.ArrayType(ir.IntType(8).as_pointer(), len(rows))
+        labels = ir.GlobalVariable(self.module, labels_type, 'pl0.report.%d.labels' % number)
+        labels.linkage = 'internal'
+        labels.global_constant = True
+        labels.initializer = ir.Constant(labels_type, [string.gep((zero, zero)) for string in strings])
+
+        header = '%-24s' % title + ''.join(' %16s' % column for column in columns) + '\n'
+        header_string = builder.gep(self.emit_string('pl0.report.%d.header' % number, header if number == 0 else '\n' + header), (zero, zero))
+        label_string = builder.gep(self.emit_string('pl0.report.%d.format.label' % number, '%-24s'), (zero, zero))
+        value_string = builder.gep(self.emit_string('pl0.report.%d.format.value' % number, ' %16lld'), (zero, zero))
+        missing_string = builder.gep(self.emit_string('pl0.report.%d.format.missing' % number, ' %16s'), (zero, zero))
+        dash_string = builder.gep(self.emit_string('pl0.report.%d.missing' % number, '-'), (zero, zero))
+        newline_string = builder.gep(self.emit_string('pl0.report.%d.format.newline' % number, '\n'), (zero, zero))
+        builder.call(fprintf, (file, header_string))
+
+        for index, (label, values) in enumerate(rows):
+            row = builder.gep(table, (zero, ir.Constant(ir.IntType(32), index)))
+            builder.store(ir.Constant(ir.IntType(64), index), builder.gep(row, (zero, zero)))
+            for column, alternatives in enumerate(values):
+                builder.store(self.emit_report_value(builder, alternatives), builder.gep(row, (zero, ir.Constant(ir.IntType(32), column + 1))))
+
+        row_size = ir.Constant(ir.IntType(64), 8 * (len(columns) + 1))
+        builder.call(self.emit_qsort(), (builder.bitcast(table, ir.IntType(8).as_pointer()), ir.Constant(ir.IntType(64), len(rows)), row_size, self.emit_compare_rows(key + 1)))
+
+        start_block = builder.block
+        loop_block = func.append_basic_block('section.%d' % number)
+        end_block = func.append_basic_block('section.%d.end' % number)
+        builder.branch(loop_block)
+
+        builder.position_at_start(loop_block)
+        index = builder.phi(ir.IntType(64))
+        index.add_incoming(ir.Constant(ir.IntType(64), 0), start_block)
+        row = builder.gep(table, (zero, index))
+        label = builder.load(builder.gep(labels, (zero, builder.load(builder.gep(row, (zero, zero))))))
+        builder.call(fprintf, (file, label_string, label))
+        for column in range(len(columns)):
+            value = builder.load(builder.gep(row, (zero, ir.Constant(ir.IntType(32), column + 1))))
+            with builder.if_else(builder.icmp_signed('<', value, ir.Constant(ir.IntType(64), 0))) as (missing, present):
+                with missing:
+                    builder.call(fprintf, (file, missing_string, dash_string))
+                with present:
+                    builder.call(fprintf, (file, value_string, value))
+        builder.call(fprintf, (file, newline_string))
+        next_index = builder.add(index, ir.Constant(ir.IntType(64), 1))
+        index.add_incoming(next_index, builder.block)
+        builder.cbranch(builder.icmp_signed('<', next_index, ir.Constant(ir.IntType(64), len(rows))), loop_block, end_block)
+
+        builder.position_at_start(end_block)
+        if any(not alternatives for label, values in rows for alternatives in values):
+            builder.call(fprintf, (file, builder.gep(self.emit_string('pl0.report.%d.note' % number, note), (zero, zero))))
+
+    def emit_report(self, path, sections):
+        fnty = ir.FunctionType(ir.VoidType(), ())
+        func = ir.Function(self.module, fnty, 'pl0.report')
+        func.linkage = 'internal'
+
+        zero = ir.Constant(ir.IntType(32), 0)
+
+        entry_block = func.append_basic_block('entry')
+        write_block = func.append_basic_block('write')
+        end_block = func.append_basic_block('end')
+
+        builder = ir.IRBuilder(entry_block)
+        path_string = builder.gep(self.emit_string('pl0.report.path', path), (zero, zero))
+        mode_string = builder.gep(self.emit_string('pl0.report.mode', 'w'), (zero, zero))
+        file = builder.call(self.emit_fopen(), (path_string, mode_string))
+        builder.cbranch(builder.icmp_unsigned('==', file, ir.Constant(file.type, None)), end_block, write_block)
+
+        builder.position_at_start(write_block)
+        number = 0
+        for title, columns, rows, key, note in sections:
+            if rows:
+                self.emit_report_section(builder, file, number, title, columns, rows, key, note)
+                number += 1
+
+        builder.call(self.emit_fclose(), (file,))
+        builder.branch(end_block)
+
+        builder.position_at_start(end_block)
+        builder.ret_void()
+
+        return func
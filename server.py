@@ -0,0 +1,137 @@
+import os
+import json
+import signal
+import asyncio
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from subprocess import run, PIPE, STDOUT
+from tempfile import TemporaryDirectory
+from parser import TokenError
+from analyzer import SemanticError
+from pipeline import compile_module, compile_object, error_messages
+from client import default_socket
+import batch
+
+
+outputs = ('ir', 'object', 'binary')
+levels = (0, 1, 2, 3)
+
+
+def link(object_code, cc):
+    with TemporaryDirectory() as directory:
+        object_file = os.path.join(directory, 'program.o')
+        out_file = os.path.join(directory, 'program')
+
+        with open(object_file, 'wb') as object_f:
+            object_f.write(object_code)
+
+        result = run([cc, object_file, '-o', out_file], stdout=PIPE, stderr=STDOUT)
+        if result.returncode != 0:
+            return [result.stdout.decode(errors='replace').strip() or '%s exited with status %d' % (cc, result.returncode)], b''
+
+        with open(out_file, 'rb') as out_f:
+            return [], out_f.read()
+
+
+def serve_request(source, level, output, cc):
+    target_machine = batch.target_machines[level]
+
+    try:
+        if output == 'ir':
+            return [], str(compile_module(source, level, target_machine, False, batch.cache)).encode()
+
+        object_code = compile_object(source, level, target_machine, batch.cache)
+    except (TokenError, SemanticError) as error:
+        return error_messages(error), b''
+
+    if output == 'object':
+        return [], object_code
+
+    return link(object_code, cc)
+
+
+class Server(object):
+
+    def __init__(self, socket_path=default_socket, jobs=None, cache_directory=None, cache_size=0, cc='gcc'):
+        self.socket_path = socket_path
+        self.jobs = jobs or batch.available_cores()
+        self.cache_directory = cache_directory
+        self.cache_size = cache_size
+        self.cc = cc
+        self.executor = None
+
+    async def compile(self, header, source):
+        level = header.get('level', 0)
+        output = header.get('output', 'binary')
+        if level not in levels or output not in outputs or 'cc' in header:
+            return ['Invalid request %s' % json.dumps(header)], b''
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, serve_request, source, level, output, self.cc)
+
+    async def handle(self, reader, writer):
+        try:
+            line = await reader.readline()
+            while line:
+                header = json.loads(line)
+                source = await reader.readexactly(header['length'])
+
+                try:
+                    messages, payload = await self.compile(header, source.decode())
+                except Exception as error:
+                    messages, payload = [repr(error)], b''
+
+                response = {'messages': messages, 'length': len(payload)}
+                writer.write(json.dumps(response).encode() + b'\n' + payload)
+                await writer.drain()
+
+                line = await reader.readline()
+        except (ValueError, KeyError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        initargs = (levels, self.cache_directory, self.cache_size)
+        self.executor = ProcessPoolExecutor(self.jobs, get_context('fork'), batch.initialize_worker, initargs)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, os.getpid)
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        stopped = asyncio.Event()
+        loop.add_signal_handler(signal.SIGINT, stopped.set)
+        loop.add_signal_handler(signal.SIGTERM, stopped.set)
+
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self.handle, self.socket_path, start_serving=False)
+        finally:
+            os.umask(umask)
+        os.chmod(self.socket_path, 0o600)
+        await server.start_serving()
+        print('Listening on %s with %d workers' % (self.socket_path, self.jobs), flush=True)
+
+        try:
+            await stopped.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            self.executor.shutdown()
+            os.remove(self.socket_path)
+
+
+if __name__ == '__main__':
+    argparser = ArgumentParser(description='Serve PL0 compilations on a Unix socket.')
+    argparser.add_argument('--socket', metavar='path', type=str, help='socket to listen on', default=default_socket)
+    argparser.add_argument('-cc', metavar='linker', type=str, help='C compiler used to link executables for every client', default='gcc')
+    argparser.add_argument('-j', metavar='jobs', type=int, help='number of compiler worker processes (default: available cores)')
+    argparser.add_argument('--cache', metavar='directory', type=str, help='reuse IR and object code cached in this directory')
+    argparser.add_argument('--cache-size', metavar='MB', type=int, help='size limit of the cache directory in megabytes', default=256)
+
+    args = argparser.parse_args()
+
+    asyncio.run(Server(args.socket, args.j, args.cache, args.cache_size << 20, args.cc).serve())
@@ -0,0 +1,189 @@
+import json
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from resource import getrusage, RUSAGE_SELF, RUSAGE_CHILDREN
+from time import perf_counter, process_time
+from element import Procedure, walk
+
+
+def measure(stats, name, children=False):
+    if stats is None:
+        return nullcontext()
+
+    return stats.phase(name, children)
+
+
+def add_counts(total, counts):
+    for name, value in counts.items():
+        if isinstance(value, dict):
+            add_counts(total.setdefault(name, {}), value)
+        else:
+            total[name] = total.get(name, 0) + value
+
+
+def reset_resident_peak():
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs_f:
+            clear_refs_f.write('5')
+    except OSError:
+        return False
+
+    return True
+
+
+def resident_peak():
+    try:
+        with open('/proc/self/status') as status_f:
+            for line in status_f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+
+class Stats(object):
+
+    def __init__(self, trace_memory=False):
+        self.phases = []
+        self.counts = {}
+        self.trace_memory = trace_memory
+        self.peak_rss = 0
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name, children=False):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced = tracemalloc.get_traced_memory()[0]
+
+        self.peak_rss = max(self.peak_rss, getrusage(RUSAGE_SELF).ru_maxrss * 1024)
+        resetting = not children and reset_resident_peak()
+
+        who = RUSAGE_CHILDREN if children else RUSAGE_SELF
+        usage = getrusage(who)
+        wall = perf_counter()
+        cpu = process_time()
+
+        try:
+            yield
+        finally:
+            wall = perf_counter() - wall
+            if children:
+                finished = getrusage(who)
+                cpu = finished.ru_utime + finished.ru_stime - usage.ru_utime - usage.ru_stime
+            else:
+                cpu = process_time() - cpu
+
+            phase = {'name': name, 'wall': wall, 'cpu': cpu}
+            if self.trace_memory:
+                phase['python_peak'] = tracemalloc.get_traced_memory()[1] - traced
+            if resetting:
+                rss_peak = resident_peak()
+                if rss_peak is not None:
+                    phase['rss_peak'] = rss_peak
+            self.phases.append(phase)
+
+            self.peak_rss = max(self.peak_rss, getrusage(RUSAGE_SELF).ru_maxrss * 1024)
+
+    def count_tokens(self, tokens):
+        self.counts['tokens'] = len(tokens)
+
+    def count_dropped_procedures(self, symbols):
+        self.counts['dropped_procedures'] = len(symbols)
+
+    def count_program(self, name, program):
+        counts = {'procedures': 0, 'sentences': {}, 'expressions': {}, 'conditions': {}}
+
+        for node in walk(program):
+            if isinstance(node, Procedure):
+                counts['procedures'] += 1
+            elif node.category is not None:
+                category = counts[node.category]
+                category[node.kind] = category.get(node.kind, 0) + 1
+
+        self.counts[name] = counts
+
+    def count_module(self, name, module):
+        counts = {'functions': 0, 'blocks': 0, 'instructions': 0}
+
+        for function in module.functions:
+            if function.is_declaration:
+                continue
+
+            counts['functions'] += 1
+            for block in function.blocks:
+                counts['blocks'] += 1
+                counts['instructions'] += sum(1 for instruction in block.instructions)
+
+        self.counts[name] = counts
+
+    def add(self, other):
+        phases = {phase['name']: phase for phase in self.phases}
+
+        for phase in other['phases']:
+            total = phases.get(phase['name'], None)
+            if total is None:
+                total = phases[phase['name']] = dict(phase)
+                self.phases.append(total)
+                continue
+
+            total['wall'] += phase['wall']
+            total['cpu'] += phase['cpu']
+            if 'python_peak' in phase:
+                total['python_peak'] = max(total.get('python_peak', 0), phase['python_peak'])
+            if 'rss_peak' in phase:
+                total['rss_peak'] = max(total.get('rss_peak', 0), phase['rss_peak'])
+
+        self.peak_rss = max(self.peak_rss, other['peak_rss'])
+        add_counts(self.counts, other['counts'])
+
+    def as_dict(self):
+        return {'phases': self.phases, 'counts': self.counts, 'peak_rss': self.peak_rss}
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=2)
+
+    def report(self):
+        rss_peaks = any('rss_peak' in phase for phase in self.phases)
+
+        header = '%-16s %10s %10s' % ('phase', 'wall (ms)', 'CPU (ms)')
+        if rss_peaks:
+            header += ' %11s' % 'RSS peak'
+        if self.trace_memory:
+            header += ' %14s' % 'Python peak'
+        lines = [header]
+
+        for phase in self.phases:
+            line = '%-16s %10.2f %10.2f' % (phase['name'], phase['wall'] * 1000, phase['cpu'] * 1000)
+            if rss_peaks:
+                line += ' %8.1f MB' % (phase['rss_peak'] / 1e6) if 'rss_peak' in phase else ' %11s' % '-'
+            if 'python_peak' in phase:
+                line += ' %11.1f MB' % (phase['python_peak'] / 1e6)
+            lines.append(line)
+        lines.append('%-16s %10.2f %10.2f' % ('total', sum(phase['wall'] for phase in self.phases) * 1000, sum(phase['cpu'] for phase in self.phases) * 1000))
+
+        if rss_peaks:
+            lines.append('RSS peak: resident set high-water mark of the compiler process during each phase, LLVM allocations included')
+        else:
+            lines.append('no per-phase RSS peak: /proc/self/clear_refs is not available, so LLVM phases are only covered by the process peak RSS')
+        if self.trace_memory:
+            lines.append('Python peak: allocations above the start of each phase, traced with tracemalloc, which also slows every phase down')
+        lines.append('peak RSS of the whole compiler process: %.1f MB' % (self.peak_rss / 1e6))
+
+        for name, counts in self.counts.items():
+            if not isinstance(counts, dict):
+                lines.append('%s: %d' % (name, counts))
+                continue
+
+            fields = []
+            for key, value in counts.items():
+                if isinstance(value, dict):
+                    value = ', '.join('%s %d' % item for item in sorted(value.items())) or 'none'
+                    fields.append('%s (%s)' % (key, value))
+                else:
+                    fields.append('%s %d' % (key, value))
+            lines.append('%s: %s' % (name, '; '.join(fields)))
+
+        return '\n'.join(lines)
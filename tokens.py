@@ -148,6 +148,8 @@ class TokenType(Enum):
 
 class Token(object):
 
+    __slots__ = ('type', 'object', 'line', 'index')
+
     def __init__(self, type, object, line=0, index=0):
         self.type = type
         self.object = object
@@ -177,7 +179,7 @@ class Token(object):
         return self.__str__()
 
     def __eq__(self, other):
-        return self.type == other.type and self.object == other.object
+        return self.type is other.type and self.object == other.object
 
     @staticmethod
     def word(value):
@@ -0,0 +1,494 @@
+import os
+import re
+import sys
+import operator
+from array import array
+from element import Number, Identifier, Visitor
+from tokens import BinaryOperator
+from analyzer import SymbolType
+from optimizer import wrap_integer
+
+
+PUSH_VAR = 0
+PUSH_CONST = 1
+STORE = 2
+INC = 3
+MOVE = 4
+SET = 5
+JUMP = 6
+JUMP_IF_VV = 7
+JUMP_IF_VC = 8
+JUMP_IF = 9
+JUMP_IF_ODD = 10
+JUMP_IF_EVEN = 11
+ADD = 12
+SUB = 13
+MUL = 14
+DIV = 15
+ADD_VAR = 16
+SUB_VAR = 17
+MUL_VAR = 18
+DIV_VAR = 19
+ADD_CONST = 20
+MUL_CONST = 21
+DIV_CONST = 22
+CALL = 23
+RETURN = 24
+READ = 25
+WRITE = 26
+HALT = 27
+
+
+opcode_names = ('push_var', 'push_const', 'store', 'inc', 'move', 'set', 'jump', 'jump_if_vv', 'jump_if_vc', 'jump_if',
+                'jump_if_odd', 'jump_if_even', 'add', 'sub', 'mul', 'div', 'add_var', 'sub_var', 'mul_var', 'div_var',
+                'add_const', 'mul_const', 'div_const', 'call', 'return', 'read', 'write', 'halt')
+
+operand_counts = (1, 1, 1, 2, 2, 2, 1, 4, 4, 2, 1, 1, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 1, 1, 0)
+
+comparison_operators = (BinaryOperator.EQUAL, BinaryOperator.HASHTAG, BinaryOperator.LESS,
+                        BinaryOperator.LESSEQUAL, BinaryOperator.GREATER, BinaryOperator.GREATEREQUAL)
+
+INT64_MIN = -0x8000000000000000
+INT64_MAX = 0x7FFFFFFFFFFFFFFF
+
+comparisons = (operator.eq, operator.ne, operator.lt, operator.le, operator.gt, operator.ge)
+
+
+def wrap(value):
+    if INT64_MIN <= value <= INT64_MAX:
+        return value
+
+    return wrap_integer(value)
+
+
+def divide(lhs, rhs):
+    if not (INT64_MIN <= lhs <= INT64_MAX and INT64_MIN <= rhs <= INT64_MAX):
+        lhs = wrap_integer(lhs)
+        rhs = wrap_integer(rhs)
+
+    quotient = lhs // rhs
+    if quotient < 0 and quotient * rhs != lhs:
+        quotient += 1
+    elif quotient > INT64_MAX:
+        quotient = wrap_integer(quotient)
+
+    return quotient
+
+
+class Bytecode(object):
+
+    def __init__(self, code, slot_count, procedures):
+        self.code = code
+        self.slot_count = slot_count
+        self.procedures = procedures
+
+    def disassemble(self):
+        lines = []
+        entries = {entry: index for index, (entry, local_slots) in enumerate(self.procedures)}
+
+        pc = 0
+        while pc < len(self.code):
+            if pc in entries:
+                lines.append('procedure %d:' % entries[pc])
+
+            opcode = self.code[pc]
+            operands = self.code[pc + 1:pc + 1 + operand_counts[opcode]]
+            lines.append('%6d %-12s %s' % (pc, opcode_names[opcode], ' '.join(str(operand) for operand in operands)))
+            pc += 1 + operand_counts[opcode]
+
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return 'Bytecode(%d words, %d slots, %d procedures)' % (len(self.code), self.slot_count, len(self.procedures))
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class Assembler(Visitor):
+
+    def __init__(self, program):
+        self.program = program
+        self.code = array('q')
+        self.slot_count = 0
+        self.procedures = []
+        self.procedure_indexes = {}
+
+    def emit(self, *words):
+        self.code.extend(words)
+
+        return len(self.code) - 1
+
+    def patch(self, position, target):
+        self.code[position] = target
+
+    def declare_slots(self, program):
+        for const in program.consts:
+            self.slot_count = max(self.slot_count, const.symbol.slot + 1)
+
+        for variable in program.variables:
+            self.slot_count = max(self.slot_count, variable.symbol.slot + 1)
+
+        for procedure in program.procedures:
+            symbol = procedure.symbol
+            self.slot_count = max(self.slot_count, symbol.slot + 1)
+
+            local_slots = tuple(local.symbol.slot for local in procedure.program.variables)
+
+            self.procedure_indexes[symbol.slot] = len(self.procedures)
+            self.procedures.append([0, local_slots])
+
+            self.declare_slots(procedure.program)
+
+    def assemble_procedures(self, program):
+        for procedure in program.procedures:
+            self.procedures[self.procedure_indexes[procedure.symbol.slot]][0] = len(self.code)
+            self.visit(procedure.program.sentence)
+            self.emit(RETURN)
+
+            self.assemble_procedures(procedure.program)
+
+    def visit_assign(self, sentence):
+        self.assemble_assign(sentence.symbol.slot, sentence.expression)
+
+    def visit_call(self, sentence):
+        self.emit(CALL, self.procedure_indexes[sentence.symbol.slot])
+
+    def visit_if(self, sentence):
+        position = sentence.condition.accept(self, False)
+        self.visit(sentence.body)
+        self.patch(position, len(self.code))
+
+    def visit_while(self, sentence):
+        position = self.emit(JUMP, 0)
+        start = len(self.code)
+        self.visit(sentence.body)
+        self.patch(position, len(self.code))
+        self.patch(sentence.condition.accept(self, True), start)
+
+    def visit_compound(self, sentence):
+        for sub_sentence in sentence.sentences:
+            sub_sentence.accept(self)
+
+    def visit_read(self, sentence):
+        for symbol in sentence.symbols:
+            self.emit(READ, symbol.slot)
+
+    def visit_write(self, sentence):
+        for expression in sentence.expressions:
+            expression.accept(self)
+        self.emit(WRITE, len(sentence.expressions))
+
+    def assemble_assign(self, slot, expression):
+        if self.is_immediate(expression):
+            self.emit(SET, slot, self.const_value(expression))
+            return
+        elif type(expression) is Identifier:
+            self.emit(MOVE, slot, expression.symbol.slot)
+            return
+
+        lhs, operator, rhs = expression.lhs, expression.operator, expression.rhs
+        if operator == BinaryOperator.PLUS or operator == BinaryOperator.MINUS:
+            if self.is_variable(lhs, slot) and self.is_immediate(rhs):
+                value = self.const_value(rhs)
+                self.emit(INC, slot, value if operator == BinaryOperator.PLUS else wrap_integer(-value))
+                return
+            if operator == BinaryOperator.PLUS and self.is_immediate(lhs) and self.is_variable(rhs, slot):
+                self.emit(INC, slot, self.const_value(lhs))
+                return
+
+        expression.accept(self)
+        self.emit(STORE, slot)
+
+    def is_const(self, expression):
+        return type(expression) is Identifier and expression.symbol.type == SymbolType.CONST
+
+    def is_immediate(self, expression):
+        return type(expression) is Number or self.is_const(expression)
+
+    def is_variable(self, expression, slot=None):
+        if type(expression) is not Identifier or expression.symbol.type == SymbolType.CONST:
+            return False
+
+        return slot is None or expression.symbol.slot == slot
+
+    def const_value(self, expression):
+        if type(expression) is Number:
+            return expression.value
+
+        return expression.symbol.value
+
+    def visit_number(self, expression):
+        self.emit(PUSH_CONST, expression.value)
+
+    def visit_identifier(self, expression):
+        if self.is_const(expression):
+            self.emit(PUSH_CONST, expression.symbol.value)
+        else:
+            self.emit(PUSH_VAR, expression.symbol.slot)
+
+    def visit_binary(self, expression):
+        operator, rhs = expression.operator, expression.rhs
+        expression.lhs.accept(self)
+
+        if self.is_immediate(rhs):
+            value = self.const_value(rhs)
+            if operator == BinaryOperator.PLUS:
+                self.emit(ADD_CONST, value)
+            elif operator == BinaryOperator.MINUS:
+                self.emit(ADD_CONST, wrap_integer(-value))
+            elif operator == BinaryOperator.TIMES:
+                self.emit(MUL_CONST, value)
+            else:
+                self.emit(DIV_CONST, value)
+        elif self.is_variable(rhs):
+            self.emit(Assembler._variable_operations[operator], rhs.symbol.slot)
+        else:
+            rhs.accept(self)
+            self.emit(Assembler._stack_operations[operator])
+
+    def visit_odd(self, condition, jump_if):
+        condition.expression.accept(self)
+
+        return self.emit(JUMP_IF_ODD if jump_if else JUMP_IF_EVEN, 0)
+
+    def visit_comparison(self, condition, jump_if):
+        lhs, operator, rhs = condition.lhs, condition.operator, condition.rhs
+        if not jump_if:
+            operator = Assembler._negated_comparisons[operator]
+
+        if self.is_immediate(lhs) and self.is_variable(rhs):
+            lhs, rhs = rhs, lhs
+            operator = Assembler._mirrored_comparisons[operator]
+
+        comparison = comparison_operators.index(operator)
+        if self.is_variable(lhs) and self.is_variable(rhs):
+            return self.emit(JUMP_IF_VV, comparison, lhs.symbol.slot, rhs.symbol.slot, 0)
+        elif self.is_variable(lhs) and self.is_immediate(rhs):
+            return self.emit(JUMP_IF_VC, comparison, lhs.symbol.slot, self.const_value(rhs), 0)
+
+        lhs.accept(self)
+        rhs.accept(self)
+        return self.emit(JUMP_IF, comparison, 0)
+
+    def assemble(self):
+        self.declare_slots(self.program)
+
+        self.visit(self.program.sentence)
+        self.emit(HALT)
+        self.assemble_procedures(self.program)
+
+        return Bytecode(self.code, self.slot_count, [tuple(procedure) for procedure in self.procedures])
+
+
+Assembler._stack_operations = {
+    BinaryOperator.PLUS: ADD,
+    BinaryOperator.MINUS: SUB,
+    BinaryOperator.TIMES: MUL,
+    BinaryOperator.SLASH: DIV
+}
+
+Assembler._variable_operations = {
+    BinaryOperator.PLUS: ADD_VAR,
+    BinaryOperator.MINUS: SUB_VAR,
+    BinaryOperator.TIMES: MUL_VAR,
+    BinaryOperator.SLASH: DIV_VAR
+}
+
+Assembler._negated_comparisons = {
+    BinaryOperator.EQUAL: BinaryOperator.HASHTAG,
+    BinaryOperator.HASHTAG: BinaryOperator.EQUAL,
+    BinaryOperator.LESS: BinaryOperator.GREATEREQUAL,
+    BinaryOperator.LESSEQUAL: BinaryOperator.GREATER,
+    BinaryOperator.GREATER: BinaryOperator.LESSEQUAL,
+    BinaryOperator.GREATEREQUAL: BinaryOperator.LESS
+}
+
+Assembler._mirrored_comparisons = {
+    BinaryOperator.EQUAL: BinaryOperator.EQUAL,
+    BinaryOperator.HASHTAG: BinaryOperator.HASHTAG,
+    BinaryOperator.LESS: BinaryOperator.GREATER,
+    BinaryOperator.LESSEQUAL: BinaryOperator.GREATEREQUAL,
+    BinaryOperator.GREATER: BinaryOperator.LESS,
+    BinaryOperator.GREATEREQUAL: BinaryOperator.LESSEQUAL
+}
+
+
+class InputReader(object):
+
+    def __init__(self, fd=0):
+        self.fd = fd
+        self.buffer = b''
+        self.position = 0
+        self.end_of_input = False
+
+    def fill(self):
+        chunk = os.read(self.fd, 1 << 16)
+        if not chunk:
+            self.end_of_input = True
+
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def read_integer(self):
+        match = InputReader._pattern.match(self.buffer, self.position)
+        while match.end() == len(self.buffer) and not self.end_of_input:
+            self.fill()
+            match = InputReader._pattern.match(self.buffer, self.position)
+
+        sign, digits = match.groups()
+        if not digits:
+            self.position = match.start(2)
+            return
+
+        self.position = match.end()
+
+        return -int(digits) if sign == b'-' else int(digits)
+
+
+InputReader._pattern = re.compile(rb'[ \t\n\x0b\x0c\r]*([+-]?)([0-9]*)')
+
+
+class VirtualMachine(object):
+
+    def __init__(self, bytecode, input_fd=0, output=None):
+        self.bytecode = bytecode
+        self.reader = InputReader(input_fd)
+        self.output = output or sys.stdout
+
+    def run(self):
+        code = self.bytecode.code.tolist()
+        procedures = self.bytecode.procedures
+        memory = [0] * self.bytecode.slot_count
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        frames = []
+        lines = []
+        output = self.output
+
+        pc = 0
+        while True:
+            opcode = code[pc]
+
+            if opcode == JUMP_IF_VV:
+                if comparisons[code[pc + 1]](memory[code[pc + 2]], memory[code[pc + 3]]):
+                    pc = code[pc + 4]
+                else:
+                    pc += 5
+            elif opcode == INC:
+                value = memory[code[pc + 1]] + code[pc + 2]
+                memory[code[pc + 1]] = value if INT64_MIN <= value <= INT64_MAX else wrap_integer(value)
+                pc += 3
+            elif opcode == PUSH_VAR:
+                push(memory[code[pc + 1]])
+                pc += 2
+            elif opcode == JUMP_IF_VC:
+                if comparisons[code[pc + 1]](memory[code[pc + 2]], code[pc + 3]):
+                    pc = code[pc + 4]
+                else:
+                    pc += 5
+            elif opcode == STORE:
+                value = pop()
+                memory[code[pc + 1]] = value if INT64_MIN <= value <= INT64_MAX else wrap_integer(value)
+                pc += 2
+            elif opcode == JUMP:
+                pc = code[pc + 1]
+            elif opcode == JUMP_IF:
+                rhs = wrap(pop())
+                if comparisons[code[pc + 1]](wrap(pop()), rhs):
+                    pc = code[pc + 2]
+                else:
+                    pc += 3
+            elif opcode == MUL_VAR:
+                stack[-1] *= memory[code[pc + 1]]
+                pc += 2
+            elif opcode == DIV_VAR:
+                stack[-1] = divide(stack[-1], memory[code[pc + 1]])
+                pc += 2
+            elif opcode == ADD_VAR:
+                stack[-1] += memory[code[pc + 1]]
+                pc += 2
+            elif opcode == SUB_VAR:
+                stack[-1] -= memory[code[pc + 1]]
+                pc += 2
+            elif opcode == ADD_CONST:
+                stack[-1] += code[pc + 1]
+                pc += 2
+            elif opcode == MUL_CONST:
+                stack[-1] *= code[pc + 1]
+                pc += 2
+            elif opcode == DIV_CONST:
+                stack[-1] = divide(stack[-1], code[pc + 1])
+                pc += 2
+            elif opcode == PUSH_CONST:
+                push(code[pc + 1])
+                pc += 2
+            elif opcode == MOVE:
+                memory[code[pc + 1]] = memory[code[pc + 2]]
+                pc += 3
+            elif opcode == SET:
+                memory[code[pc + 1]] = code[pc + 2]
+                pc += 3
+            elif opcode == CALL:
+                entry, local_slots = procedures[code[pc + 1]]
+                frames.append((pc + 2, local_slots, [memory[slot] for slot in local_slots]))
+                pc = entry
+            elif opcode == RETURN:
+                pc, local_slots, values = frames.pop()
+                for slot, value in zip(local_slots, values):
+                    memory[slot] = value
+            elif opcode == ADD:
+                rhs = pop()
+                stack[-1] += rhs
+                pc += 1
+            elif opcode == SUB:
+                rhs = pop()
+                stack[-1] -= rhs
+                pc += 1
+            elif opcode == MUL:
+                rhs = pop()
+                stack[-1] *= rhs
+                pc += 1
+            elif opcode == DIV:
+                rhs = pop()
+                stack[-1] = divide(stack[-1], rhs)
+                pc += 1
+            elif opcode == JUMP_IF_ODD:
+                if pop() & 1:
+                    pc = code[pc + 1]
+                else:
+                    pc += 2
+            elif opcode == JUMP_IF_EVEN:
+                if pop() & 1:
+                    pc += 2
+                else:
+                    pc = code[pc + 1]
+            elif opcode == WRITE:
+                count = code[pc + 1]
+                if count:
+                    lines.append(' '.join(map(str, map(wrap, stack[-count:]))))
+                    del stack[-count:]
+                else:
+                    lines.append('')
+
+                if len(lines) >= 4096:
+                    output.write('\n'.join(lines) + '\n')
+                    lines.clear()
+                pc += 2
+            elif opcode == READ:
+                if lines:
+                    output.write('\n'.join(lines) + '\n')
+                    lines.clear()
+                output.flush()
+
+                value = self.reader.read_integer()
+                if value is not None:
+                    memory[code[pc + 1]] = wrap(value)
+                pc += 2
+            elif opcode == HALT:
+                break
+
+        if lines:
+            output.write('\n'.join(lines) + '\n')
+        output.flush()